@@ -10,60 +10,235 @@ from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
                              QWidget, QTabWidget, QLabel, QPushButton, QTextEdit, 
                              QGroupBox, QGridLayout, QComboBox, QSpinBox, 
-                             QDoubleSpinBox, QCheckBox, QProgressBar, QTableWidget, 
-                             QTableWidgetItem, QMessageBox, QSplitter)
-from PyQt6.QtCore import QTimer, QThread, pyqtSignal, Qt
+                             QDoubleSpinBox, QCheckBox, QProgressBar, QTableView, 
+                             QHeaderView, QMessageBox, QSplitter, QFileDialog)
+from PyQt6.QtCore import QTimer, QThread, pyqtSignal, Qt, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QFont, QIcon, QPalette, QColor
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 import json
 import datetime
+import time
+import asyncio
+
+from src.core import CHANNELS, DEFAULT_CAPACITY, MeasurementBuffer, SegmentStore
+from src.core.acquisition import AcquisitionProcess, AcquisitionScheduler
+from src.core.anomaly import DETECTORS, AnomalyMonitor
+from src.core.config import load_config
+from src.core.downsample import downsample_columns
+from src.core.export import EXPORT_CHUNK_ROWS, EXPORTERS, available_formats, export_chunks
+from src.core.filters import create_filter
+from src.core.recording import Recording
+from src.drivers import SimulationDriver, create_driver
+
+# Samples kept in memory by the desktop app (~16 min at 1 kHz)
+BUFFER_CAPACITY = 1_000_000
+
+# Target interval between sample blocks delivered to the UI thread (s)
+BLOCK_INTERVAL = 0.1
+
+# Seconds of samples the acquisition process keeps in shared memory for the UI thread
+PROCESS_BUFFER_SECONDS = 60
+
+# Time span shown in the real-time plots (s); decimated to the canvas width
+PLOT_WINDOW_SECONDS = 10
+
+# Rows of an opened recording read per table page
+RECORDING_PAGE_ROWS = 256
+
+# Delay before a zoomed or panned recording plot is re-read at the new range (ms)
+RECORDING_RELOAD_DELAY = 150
+
+# Channel holding the AI error-corrected current (the raw current is never overwritten)
+CORRECTED_CHANNEL = 'current_corrected'
+
+# Device selector entries and their ids in config/devices.yaml
+DEVICE_NAMES = {
+    "Quantum Device 001": 'quantum_device_001',
+    "Quantum Device 002": 'quantum_device_002',
+    "Simulation Mode": 'simulation_device',
+}
+
+FILTER_NAMES = {
+    "Moving Average": 'moving_average',
+    "Exponential Moving Average": 'ema',
+    "Median": 'median',
+}
 
 class MeasurementThread(QThread):
-    """Thread for collecting measurement data"""
-    data_ready = pyqtSignal(dict)
+    """Thread for collecting measurement data
+    
+    Runs an AcquisitionScheduler for the selected device, which reads blocks
+    of samples on drift-free monotonic deadlines; each block is delivered
+    with one ``data_ready`` signal (dict of NumPy columns). With ``process``
+    the scheduler runs in an AcquisitionProcess, so UI work cannot delay it.
+    """
+    data_ready = pyqtSignal(object)
+    error = pyqtSignal(str)
     
-    def __init__(self, sampling_rate):
+    def __init__(self, device_id, config, sampling_rate, block_interval=BLOCK_INTERVAL, process=False):
         super().__init__()
-        self.sampling_rate = sampling_rate
-        self.running = False
+        on_block = lambda device_id, block: self.data_ready.emit(block)
+        on_error = lambda device_id, e: self.error.emit(str(e))
+        if process:
+            self.scheduler = AcquisitionProcess({device_id: config}, rates={device_id: sampling_rate},
+                                                capacity=max(int(sampling_rate * PROCESS_BUFFER_SECONDS), DEFAULT_CAPACITY),
+                                                block_interval=block_interval, on_block=on_block,
+                                                on_error=on_error, simulate_unsupported=True)
+        else:
+            # Devices without a driver for their connection are simulated
+            source = create_driver(config) or SimulationDriver(config)
+            self.scheduler = AcquisitionScheduler({device_id: config}, rates={device_id: sampling_rate},
+                                                  capacity=None, block_interval=block_interval,
+                                                  on_block=on_block, sources={device_id: source},
+                                                  on_error=on_error)
         
     def run(self):
         """Main measurement loop"""
-        self.running = True
-        while self.running:
-            # Simulate quantum measurement
-            data = self.simulate_quantum_measurement()
-            self.data_ready.emit(data)
-            self.msleep(1000 // self.sampling_rate)
+        if isinstance(self.scheduler, AcquisitionProcess):
+            self.scheduler.run()
+        else:
+            asyncio.run(self.scheduler.run())
             
     def stop(self):
         """Stop measurement"""
-        self.running = False
-        
-    def simulate_quantum_measurement(self):
-        """Simulate quantum measurement data"""
-        timestamp = datetime.datetime.now()
-        
-        # Generate realistic quantum measurement data
-        base_current = 1e-9  # 1 nA base current
-        noise = np.random.normal(0, base_current * 0.01)
-        current = base_current + noise
-        
-        voltage = 1.0 + np.random.normal(0, 0.001)
-        resistance = voltage / current if current != 0 else 1e12
-        temperature = 23.0 + np.random.normal(0, 0.1)
-        
-        return {
-            'timestamp': timestamp,
-            'current': current,
-            'voltage': voltage,
-            'resistance': resistance,
-            'temperature': temperature
-        }
+        self.scheduler.stop()
+
+class ExportThread(QThread):
+    """Thread writing measurement chunks to an export file
+    
+    Chunks are encoded and written one at a time, so large exports neither
+    block the UI nor hold the whole dataset in memory.
+    """
+    finished_export = pyqtSignal(int, str)
+    error = pyqtSignal(str)
+    
+    def __init__(self, chunks, filename, export_format, columns):
+        super().__init__()
+        self.chunks = chunks
+        self.filename = filename
+        self.export_format = export_format
+        self.columns = columns
+        
+    def run(self):
+        """Write the export file"""
+        try:
+            rows = export_chunks(self.chunks, self.filename, self.export_format, self.columns)
+        except Exception as e:
+            self.error.emit(str(e))
+        else:
+            self.finished_export.emit(rows, self.filename)
+
+class MeasurementTableModel(QAbstractTableModel):
+    """Table model reading rows directly from a MeasurementBuffer
+    
+    Cells are formatted lazily in ``data()``, so only the rows a view
+    actually paints are ever converted to text.
+    """
+    
+    COLUMNS = [
+        ("Timestamp", 'timestamp', None),
+        ("Current (A)", 'current', "{:.2e}"),
+        ("Corrected Current (A)", CORRECTED_CHANNEL, "{:.2e}"),
+        ("Voltage (V)", 'voltage', "{:.6f}"),
+        ("Resistance (Ω)", 'resistance', "{:.2e}"),
+        ("Temperature (°C)", 'temperature', "{:.1f}"),
+    ]
+    
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.first = 0  # absolute sample index of row 0
+        self.rows = 0
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+        
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return str(self.first + section + 1)
+        
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+            
+        title, key, fmt = self.COLUMNS[index.column()]
+        value = self.value(key, index.row())
+        if value is None:
+            return None
+        if fmt is None:
+            return np.datetime_as_string(value, unit='ms').replace('T', ' ')
+        if np.isnan(value):
+            return None
+        return fmt.format(value)
+        
+    def value(self, key, row):
+        """Return the raw value of a column at a table row, or None if it is gone"""
+        # Translate the row into a position of the buffer's current window
+        position = self.first + row - (self.buffer.total - len(self.buffer))
+        if not 0 <= position < len(self.buffer):
+            return None
+        return self.buffer[key][position]
+        
+    def refresh(self):
+        """Synchronize rows with the buffer using incremental insert/remove notifications"""
+        total = self.buffer.total
+        first = total - len(self.buffer)
+        last = self.first + self.rows
+        
+        if total < last or first >= last:
+            # Buffer was cleared or has rolled over completely
+            self.beginResetModel()
+            self.first, self.rows = first, len(self.buffer)
+            self.endResetModel()
+            return
+            
+        dropped = first - self.first
+        if dropped > 0:
+            self.beginRemoveRows(QModelIndex(), 0, dropped - 1)
+            self.first, self.rows = first, self.rows - dropped
+            self.endRemoveRows()
+            
+        added = total - last
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), self.rows, self.rows + added - 1)
+            self.rows += added
+            self.endInsertRows()
+
+class RecordingTableModel(MeasurementTableModel):
+    """Table model paging rows of a memory-mapped Recording
+    
+    Only the page of ``RECORDING_PAGE_ROWS`` rows around the painted cells is
+    read, so scrolling through billions of rows keeps memory use constant.
+    """
+    
+    def __init__(self, recording, parent=None):
+        super().__init__(None, parent)
+        self.recording = recording
+        self.rows = len(recording)
+        self.page_start = None
+        self.page = None
+        
+    def value(self, key, row):
+        start = row - row % RECORDING_PAGE_ROWS
+        if start != self.page_start:
+            channels = [key for title, key, fmt in self.COLUMNS if key != 'timestamp']
+            self.page = self.recording.rows(start, start + RECORDING_PAGE_ROWS, channels)
+            self.page_start = start
+        return self.page[key][row - start]
+        
+    def refresh(self):
+        """Recordings are read-only; there is nothing to synchronize"""
 
 class QuantumMeterPro(QMainWindow):
     """Main application window"""
@@ -74,18 +249,31 @@ class QuantumMeterPro(QMainWindow):
         self.setGeometry(100, 100, 1600, 1000)
         
         # Initialize data storage
-        self.measurement_data = {
-            'timestamp': [],
-            'current': [],
-            'voltage': [],
-            'resistance': [],
-            'temperature': []
-        }
+        self.measurement_data = MeasurementBuffer(capacity=BUFFER_CAPACITY,
+                                                  channels=CHANNELS + (CORRECTED_CHANNEL,))
+        self.correction_filter = create_filter('moving_average', window=5)
+        
+        # Persist every acquired sample and replay the last session on startup
+        config = load_config()
+        self.devices = config['devices']
+        settings = config['global_settings']
+        self.export_formats = available_formats(settings.get('export_formats', ['csv']))
+        self.acquisition_process = bool(settings.get('acquisition_process', False))
+        self.measurement_store = SegmentStore(
+            Path(settings.get('storage_directory', 'data/measurements')) / 'desktop',
+            channels=self.measurement_data.channels,
+            segment_seconds=int(settings.get('segment_hours', 1) * 3600),
+            retention_days=settings.get('data_retention_days'))
+        self.anomaly_monitor = AnomalyMonitor(self.measurement_data)
+        self.recording = None
+        # Timestamp of the first sample of the current session; exports start there
+        self.session_start = None
         
         # Setup UI
         self.setup_ui()
         self.setup_timers()
         self.setup_styles()
+        self.replay_stored_data()
         
     def setup_ui(self):
         """Setup the main user interface"""
@@ -118,7 +306,9 @@ class QuantumMeterPro(QMainWindow):
         connection_layout = QVBoxLayout(connection_group)
         
         self.device_combo = QComboBox()
-        self.device_combo.addItems(["Quantum Device 001", "Quantum Device 002", "Simulation Mode"])
+        self.device_combo.addItems(list(DEVICE_NAMES))
+        # Hardware needs a reachable port in config/devices.yaml
+        self.device_combo.setCurrentText("Simulation Mode")
         connection_layout.addWidget(QLabel("Select Device:"))
         connection_layout.addWidget(self.device_combo)
         
@@ -166,8 +356,15 @@ class QuantumMeterPro(QMainWindow):
         
         self.ai_correction = QCheckBox("Enable AI Error Correction")
         self.ai_correction.setChecked(True)
+        self.ai_correction.toggled.connect(self.reset_correction_filter)
         ai_layout.addWidget(self.ai_correction)
         
+        ai_layout.addWidget(QLabel("Correction Filter:"))
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItems(list(FILTER_NAMES))
+        self.filter_combo.currentTextChanged.connect(self.reset_correction_filter)
+        ai_layout.addWidget(self.filter_combo)
+        
         layout.addWidget(ai_group)
         
         # Control Buttons
@@ -184,9 +381,18 @@ class QuantumMeterPro(QMainWindow):
         self.stop_btn.setEnabled(False)
         control_layout.addWidget(self.stop_btn)
         
+        export_layout = QHBoxLayout()
+        self.export_format_combo = QComboBox()
+        self.export_format_combo.addItems(self.export_formats)
+        export_layout.addWidget(self.export_format_combo)
         self.export_btn = QPushButton("📊 Export Data")
         self.export_btn.clicked.connect(self.export_data)
-        control_layout.addWidget(self.export_btn)
+        export_layout.addWidget(self.export_btn)
+        control_layout.addLayout(export_layout)
+        
+        self.open_recording_btn = QPushButton("📂 Open Recording")
+        self.open_recording_btn.clicked.connect(self.open_recording)
+        control_layout.addWidget(self.open_recording_btn)
         
         layout.addWidget(control_group)
         
@@ -200,6 +406,9 @@ class QuantumMeterPro(QMainWindow):
         self.progress_bar = QProgressBar()
         status_layout.addWidget(self.progress_bar)
         
+        self.frame_time_label = QLabel("Render: -")
+        status_layout.addWidget(self.frame_time_label)
+        
         layout.addWidget(status_group)
         
         layout.addStretch()
@@ -220,14 +429,17 @@ class QuantumMeterPro(QMainWindow):
         # Create matplotlib figure
         self.figure = Figure(figsize=(12, 8))
         self.canvas = FigureCanvas(self.figure)
+        # Zoom and pan tools; used to navigate opened recordings
+        self.toolbar = NavigationToolbar(self.canvas, plots_tab)
+        plots_layout.addWidget(self.toolbar)
         plots_layout.addWidget(self.canvas)
         
         # Setup subplots
         self.ax1 = self.figure.add_subplot(311)  # Current
-        self.ax2 = self.figure.add_subplot(312)  # Voltage
-        self.ax3 = self.figure.add_subplot(313)  # Resistance
-        
-        self.figure.tight_layout()
+        self.ax2 = self.figure.add_subplot(312, sharex=self.ax1)  # Voltage
+        self.ax3 = self.figure.add_subplot(313, sharex=self.ax1)  # Resistance
+        self.setup_plot_artists()
+        self.ax1.callbacks.connect('xlim_changed', self.on_xlim_changed)
         
         self.tab_widget.addTab(plots_tab, "📈 Real-time Plots")
         
@@ -235,9 +447,12 @@ class QuantumMeterPro(QMainWindow):
         table_tab = QWidget()
         table_layout = QVBoxLayout(table_tab)
         
-        self.data_table = QTableWidget()
-        self.data_table.setColumnCount(5)
-        self.data_table.setHorizontalHeaderLabels(["Timestamp", "Current (A)", "Voltage (V)", "Resistance (Ω)", "Temperature (°C)"])
+        self.table_model = MeasurementTableModel(self.measurement_data, self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.table_model)
+        # Fixed row heights let the view scroll millions of rows without measuring them
+        self.data_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         table_layout.addWidget(self.data_table)
         
         self.tab_widget.addTab(table_tab, "📋 Data Table")
@@ -261,6 +476,12 @@ class QuantumMeterPro(QMainWindow):
         self.plot_timer.timeout.connect(self.update_plots)
         self.plot_timer.start(1000)  # Update plots every second
         
+        # Re-reads an opened recording once zooming or panning settles
+        self.recording_timer = QTimer()
+        self.recording_timer.setSingleShot(True)
+        self.recording_timer.setInterval(RECORDING_RELOAD_DELAY)
+        self.recording_timer.timeout.connect(self.plot_recording)
+        
     def setup_styles(self):
         """Setup application styling"""
         self.setStyleSheet("""
@@ -326,6 +547,23 @@ class QuantumMeterPro(QMainWindow):
             }
         """)
         
+    def replay_stored_data(self):
+        """Load the most recent persisted samples into the in-memory buffer"""
+        if not len(self.measurement_store):
+            return
+        data = self.measurement_store.tail(self.measurement_data.capacity)
+        self.session_start = data['timestamp'][0]
+        self.measurement_data.extend(data.pop('timestamp'), **data)
+        self.status_label.setText(f"Replayed {len(self.measurement_data)} stored measurements")
+        
+    def closeEvent(self, event):
+        """Stop acquisition and flush pending samples before closing"""
+        self.stop_measurement()
+        if hasattr(self, 'export_thread'):
+            self.export_thread.wait()
+        self.measurement_store.close()
+        super().closeEvent(event)
+        
     def toggle_connection(self):
         """Toggle device connection"""
         if self.connect_btn.text() == "Connect":
@@ -340,9 +578,15 @@ class QuantumMeterPro(QMainWindow):
             
     def start_measurement(self):
         """Start data collection"""
+        self.close_recording()
+        
         # Create and start measurement thread
-        self.measurement_thread = MeasurementThread(self.sampling_rate.value())
+        device_id = DEVICE_NAMES[self.device_combo.currentText()]
+        self.measurement_thread = MeasurementThread(device_id, self.devices.get(device_id, {}),
+                                                    self.sampling_rate.value(),
+                                                    process=self.acquisition_process)
         self.measurement_thread.data_ready.connect(self.process_measurement)
+        self.measurement_thread.error.connect(self.on_measurement_error)
         self.measurement_thread.start()
         
         self.start_btn.setEnabled(False)
@@ -350,136 +594,302 @@ class QuantumMeterPro(QMainWindow):
         self.status_label.setText("Measuring...")
         
         # Clear previous data
-        for key in self.measurement_data:
-            self.measurement_data[key] = []
+        self.measurement_data.clear()
+        self.session_start = None
+        self.reset_correction_filter()
             
     def stop_measurement(self):
         """Stop data collection"""
         if hasattr(self, 'measurement_thread'):
             self.measurement_thread.stop()
             self.measurement_thread.wait()
+        self.measurement_store.flush()
             
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.status_label.setText("Measurement stopped")
         
+    def on_measurement_error(self, message):
+        """Show a device error reported by the acquisition thread"""
+        self.status_label.setText(f"Device error: {message}")
+        
     def process_measurement(self, data):
-        """Process incoming measurement data"""
+        """Process an incoming block of measurement data"""
+        # AI error correction writes a separate channel; raw data is kept intact
+        corrected = None
+        if self.ai_correction.isChecked():
+            corrected = self.correction_filter.process(data['current'])
+            
         # Store data
-        self.measurement_data['timestamp'].append(data['timestamp'])
-        self.measurement_data['current'].append(data['current'])
-        self.measurement_data['voltage'].append(data['voltage'])
-        self.measurement_data['resistance'].append(data['resistance'])
-        self.measurement_data['temperature'].append(data['temperature'])
+        columns = {
+            'current': data['current'],
+            'voltage': data['voltage'],
+            'resistance': data['resistance'],
+            'temperature': data['temperature'],
+            CORRECTED_CHANNEL: corrected
+        }
+        if self.session_start is None and len(data['timestamp']):
+            self.session_start = data['timestamp'][0]
+        self.measurement_data.extend(data['timestamp'], **columns)
+        self.measurement_store.append(data['timestamp'], **columns)
         
         # Update progress bar
-        self.progress_bar.setValue((len(self.measurement_data['timestamp']) % 100))
+        self.progress_bar.setValue(self.measurement_data.total % 100)
         
         # AI analysis
         if self.ai_enabled.isChecked():
             self.perform_ai_analysis()
             
-    def update_plots(self):
-        """Update real-time plots"""
-        if not self.measurement_data['timestamp']:
-            return
-            
-        # Clear previous plots
-        self.ax1.clear()
-        self.ax2.clear()
-        self.ax3.clear()
-        
-        # Get recent data (last 100 points)
-        recent_data = {key: values[-100:] for key, values in self.measurement_data.items()}
-        
-        # Plot current
-        self.ax1.plot(recent_data['timestamp'], recent_data['current'], 'b-', linewidth=1.5)
+    def setup_plot_artists(self):
+        """Create the persistent plot lines used by the blitting render path"""
         self.ax1.set_ylabel('Current (A)')
         self.ax1.set_title('QuantumMeter Pro - Real-time Measurements', fontsize=14, fontweight='bold')
-        self.ax1.grid(True, alpha=0.3)
-        self.ax1.tick_params(axis='x', rotation=45)
-        
-        # Plot voltage
-        self.ax2.plot(recent_data['timestamp'], recent_data['voltage'], 'g-', linewidth=1.5)
         self.ax2.set_ylabel('Voltage (V)')
-        self.ax2.grid(True, alpha=0.3)
-        self.ax2.tick_params(axis='x', rotation=45)
-        
-        # Plot resistance
-        self.ax3.plot(recent_data['timestamp'], recent_data['resistance'], 'r-', linewidth=1.5)
         self.ax3.set_ylabel('Resistance (Ω)')
         self.ax3.set_xlabel('Time')
-        self.ax3.grid(True, alpha=0.3)
-        self.ax3.tick_params(axis='x', rotation=45)
         
+        self.plot_lines = []
+        for ax in (self.ax1, self.ax2, self.ax3):
+            ax.xaxis_date()
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='x', rotation=45)
+        for ax, key, style in ((self.ax1, 'current', 'b-'),
+                               (self.ax1, CORRECTED_CHANNEL, 'c-'),
+                               (self.ax2, 'voltage', 'g-'),
+                               (self.ax3, 'resistance', 'r-')):
+            line, = ax.plot([], [], style, linewidth=1.5, animated=True)
+            self.plot_lines.append((ax, key, line))
+            
+        self.plot_background = None
+        self.frame_time_avg = None
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
         self.figure.tight_layout()
-        self.canvas.draw()
+        
+    def on_canvas_draw(self, event):
+        """Cache the static background after every full redraw (resize, rescale)"""
+        self.plot_background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for ax, key, line in self.plot_lines:
+            ax.draw_artist(line)
+            
+    def axis_data_range(self, ax, recent_data):
+        """Return the finite (min, max) over every series drawn on ``ax``"""
+        values = np.concatenate([recent_data[key] for axis, key, line in self.plot_lines if axis is ax])
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return None
+        return values.min(), values.max()
+        
+    def rescale_plots(self, x, recent_data):
+        """Fit axis limits around the data, leaving headroom so rescales stay rare"""
+        span = max(x[-1] - x[0], 1.0 / 86400)
+        for ax in (self.ax1, self.ax2, self.ax3):
+            ax.set_xlim(x[0], x[-1] + 0.5 * span)
+            self.fit_y_limits(ax, recent_data)
+        self.figure.tight_layout()
+        
+    def fit_y_limits(self, ax, data):
+        """Set the y limits of ``ax`` around its data with a 10% margin"""
+        data_range = self.axis_data_range(ax, data)
+        if data_range is None:
+            return
+        low, high = data_range
+        margin = 0.1 * (high - low) or 0.01 * abs(high) or 1.0
+        ax.set_ylim(low - margin, high + margin)
+        
+    def plots_need_rescale(self, x, recent_data):
+        """Return True if any data point lies outside the current axis limits"""
+        for ax in (self.ax1, self.ax2, self.ax3):
+            x_low, x_high = ax.get_xlim()
+            y_low, y_high = ax.get_ylim()
+            data_range = self.axis_data_range(ax, recent_data)
+            if x[0] < x_low or x[-1] > x_high:
+                return True
+            if data_range is not None and (data_range[0] < y_low or data_range[1] > y_high):
+                return True
+        return False
+            
+    def update_plots(self):
+        """Update real-time plots"""
+        if self.recording is not None or not len(self.measurement_data):
+            return
+            
+        if self.canvas.isVisible():
+            start = time.perf_counter()
+            
+            recent_data = self.plot_data()
+            x = mdates.date2num(recent_data['timestamp'])
+            for ax, key, line in self.plot_lines:
+                line.set_data(x, recent_data[key])
+                
+            if self.plot_background is None or self.plots_need_rescale(x, recent_data):
+                # Full redraw; on_canvas_draw re-caches the background and lines
+                self.rescale_plots(x, recent_data)
+                self.canvas.draw()
+            else:
+                self.canvas.restore_region(self.plot_background)
+                for ax, key, line in self.plot_lines:
+                    ax.draw_artist(line)
+            self.canvas.blit(self.figure.bbox)
+            
+            self.record_frame_time(time.perf_counter() - start)
         
         # Update data table
         self.update_data_table()
         
-    def update_data_table(self):
-        """Update the data table"""
-        if not self.measurement_data['timestamp']:
+    def plot_data(self):
+        """Return the plotted window, min/max-decimated to about one point per pixel"""
+        latest = self.measurement_data.latest()['timestamp']
+        window = self.measurement_data.between(start=latest - np.timedelta64(PLOT_WINDOW_SECONDS, 's'),
+                                               channels=[key for ax, key, line in self.plot_lines])
+        return downsample_columns(window, points=max(2 * self.canvas.width(), 200))
+        
+    def open_recording(self):
+        """Open a recorded run read-only, memory-mapped instead of loaded"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Open Recording", str(self.measurement_store.root.parent),
+            "Recordings (index.json *.npy timestamp.i8);;All Files (*)")
+        if not filename:
+            return
+        try:
+            recording = Recording.open(filename)
+        except (ValueError, OSError) as e:
+            QMessageBox.warning(self, "Open Recording Failed", str(e))
+            return
+        if not len(recording):
+            QMessageBox.warning(self, "No Data", "The recording contains no measurements.")
             return
             
-        # Show last 50 measurements
-        recent_data = {key: values[-50:] for key, values in self.measurement_data.items()}
+        self.stop_measurement()
+        self.recording = recording
+        self.recording_model = RecordingTableModel(recording, self)
+        self.data_table.setModel(self.recording_model)
+        
+        self.ax1.set_title(f'QuantumMeter Pro - Recording {Path(filename).parent.name}',
+                           fontsize=14, fontweight='bold')
+        start, end = mdates.date2num(np.array([recording.start, recording.end]))
+        self.ax1.set_xlim(start, max(end, start + 1.0 / 86400))
+        self.plot_recording()
+        # Make the toolbar's home button return to the full recording
+        self.toolbar.update()
+        self.status_label.setText(f"Opened recording: {len(recording):,} measurements")
+        
+    def close_recording(self):
+        """Return the plots and the table to live data"""
+        if self.recording is None:
+            return
+        self.recording = None
+        self.recording_timer.stop()
+        self.data_table.setModel(self.table_model)
+        self.ax1.set_title('QuantumMeter Pro - Real-time Measurements', fontsize=14, fontweight='bold')
+        self.plot_background = None
+        
+    def on_xlim_changed(self, ax):
+        """Schedule a re-read of the recording for the new visible range"""
+        if self.recording is not None:
+            self.recording_timer.start()
+            
+    def plot_recording(self):
+        """Plot the visible range of the recording, decimated to the canvas width"""
+        self.recording_timer.stop()
+        if self.recording is None:
+            return
+        start = time.perf_counter()
+        
+        low, high = (np.datetime64(mdates.num2date(x).replace(tzinfo=None), 'ns') for x in self.ax1.get_xlim())
+        data = self.recording.overview(low, high, points=max(2 * self.canvas.width(), 200),
+                                       channels=[key for ax, key, line in self.plot_lines])
+        x = mdates.date2num(data['timestamp'])
+        for ax, key, line in self.plot_lines:
+            line.set_data(x, data[key])
+        for ax in (self.ax1, self.ax2, self.ax3):
+            self.fit_y_limits(ax, data)
+        self.canvas.draw()
+        
+        self.record_frame_time(time.perf_counter() - start)
         
-        self.data_table.setRowCount(len(recent_data['timestamp']))
+    def record_frame_time(self, seconds):
+        """Track plot render time (last frame and exponential moving average)"""
+        frame_ms = seconds * 1000
+        if self.frame_time_avg is None:
+            self.frame_time_avg = frame_ms
+        else:
+            self.frame_time_avg = 0.9 * self.frame_time_avg + 0.1 * frame_ms
+        self.frame_time_label.setText(f"Render: {frame_ms:.1f} ms (avg {self.frame_time_avg:.1f} ms)")
+        
+    def update_data_table(self):
+        """Update the data table"""
+        scrollbar = self.data_table.verticalScrollBar()
+        follow = scrollbar.value() == scrollbar.maximum()
+        
+        self.table_model.refresh()
         
-        for i, timestamp in enumerate(recent_data['timestamp']):
-            self.data_table.setItem(i, 0, QTableWidgetItem(timestamp.strftime("%H:%M:%S")))
-            self.data_table.setItem(i, 1, QTableWidgetItem(f"{recent_data['current'][i]:.2e}"))
-            self.data_table.setItem(i, 2, QTableWidgetItem(f"{recent_data['voltage'][i]:.6f}"))
-            self.data_table.setItem(i, 3, QTableWidgetItem(f"{recent_data['resistance'][i]:.2e}"))
-            self.data_table.setItem(i, 4, QTableWidgetItem(f"{recent_data['temperature'][i]:.1f}"))
+        # Keep following live data unless the user scrolled back in history
+        if follow:
+            self.data_table.scrollToBottom()
             
     def perform_ai_analysis(self):
         """Perform AI-based analysis on measurement data"""
-        if len(self.measurement_data['current']) < 10:
+        if len(self.measurement_data) < 10:
             return
             
-        # Simple anomaly detection
-        current_values = np.array(self.measurement_data['current'])
-        mean_current = np.mean(current_values)
-        std_current = np.std(current_values)
-        
-        # Check for anomalies (3-sigma rule)
-        anomalies = np.abs(current_values - mean_current) > 3 * std_current
-        
-        if np.any(anomalies):
-            anomaly_count = np.sum(anomalies)
-            self.ai_text.append(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] "
-                              f"⚠️  Detected {anomaly_count} anomalous measurements\n")
+        # Rolling MAD, EWMA and CUSUM detectors flag each new sample once
+        found = self.anomaly_monitor.update()
+        now = datetime.datetime.now().strftime('%H:%M:%S')
+        for channel, counts in found.items():
+            outliers = {kind: count for kind, count in counts.items()
+                        if count and not DETECTORS[kind].change_points}
+            if outliers:
+                details = ', '.join(f"{kind.upper()}: {count}" for kind, count in outliers.items())
+                self.ai_text.append(f"[{now}] ⚠️  Detected anomalous {channel} measurements ({details})\n")
+            if any(count for kind, count in counts.items() if DETECTORS[kind].change_points):
+                self.ai_text.append(f"[{now}] 📈 Level change detected in {channel} (CUSUM)\n")
             
-        # Error correction (simple example)
-        if self.ai_correction.isChecked():
-            # Apply simple moving average filter
-            window_size = 5
-            if len(current_values) >= window_size:
-                corrected_current = np.convolve(current_values, 
-                                              np.ones(window_size)/window_size, 
-                                              mode='valid')
-                # Update the last corrected value
-                if len(corrected_current) > 0:
-                    self.measurement_data['current'][-1] = corrected_current[-1]
+    def reset_correction_filter(self):
+        """Recreate the error correction filter from the selected filter type"""
+        kind = FILTER_NAMES[self.filter_combo.currentText()]
+        params = {'alpha': 0.2} if kind == 'ema' else {'window': 5}
+        self.correction_filter = create_filter(kind, **params)
                     
     def export_data(self):
-        """Export measurement data to various formats"""
-        if not self.measurement_data['timestamp']:
+        """Export the current session in the selected format in a background thread
+
+        The session is the running (or last) measurement, or the samples replayed
+        at startup; older sessions kept by the store's retention are not exported.
+        """
+        if self.session_start is None:
             QMessageBox.warning(self, "No Data", "No measurement data to export.")
             return
             
-        # Create DataFrame
-        df = pd.DataFrame(self.measurement_data)
-        
-        # Export to CSV
-        filename = f"quantum_measurements_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(filename, index=False)
-        
+        # Everything acquired is persisted (reading flushes pending rows), so the
+        # store holds the whole session even when the buffer has rolled over
+        if len(self.measurement_store):
+            chunks = self.measurement_store.chunks(EXPORT_CHUNK_ROWS, start=self.session_start)
+        else:
+            chunks = self.measurement_data.chunks(EXPORT_CHUNK_ROWS)
+        export_format = self.export_format_combo.currentText()
+        filename = (f"quantum_measurements_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    f".{EXPORTERS[export_format].extension}")
+        
+        self.export_thread = ExportThread(chunks, filename, export_format,
+                                          ('timestamp',) + self.measurement_data.channels)
+        self.export_thread.finished_export.connect(self.on_export_finished)
+        self.export_thread.error.connect(self.on_export_error)
+        self.export_btn.setEnabled(False)
+        self.status_label.setText(f"Exporting to {filename}...")
+        self.export_thread.start()
+        
+    def on_export_finished(self, rows, filename):
+        """Report a completed export"""
+        self.export_btn.setEnabled(True)
+        self.status_label.setText(f"Exported {rows} measurements")
         QMessageBox.information(self, "Export Complete", 
                               f"Data exported to {filename}")
+        
+    def on_export_error(self, message):
+        """Report a failed export"""
+        self.export_btn.setEnabled(True)
+        self.status_label.setText("Export failed")
+        QMessageBox.warning(self, "Export Failed", message)
 
 def main():
     """Main application entry point"""
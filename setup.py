@@ -47,6 +47,7 @@ setup(
         "console_scripts": [
             "quantum-meter-pro=main:main",
             "quantum-meter-web=src.web.app:main",
+            "quantum-meter-analyze=src.core.batch:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,15 @@
+"""
+QuantumMeter Pro - Core
+Measurement data structures shared by all frontends
+"""
+
+from .buffer import CHANNELS, DEFAULT_CAPACITY, MeasurementBuffer
+from .filters import (ExponentialMovingAverage, MedianFilter, MovingAverageFilter,
+                      create_filter)
+from .stats import MeasurementStatistics, RunningStats, TrendStats, WindowedStats
+from .storage import SegmentStore
+
+__all__ = ['CHANNELS', 'DEFAULT_CAPACITY', 'MeasurementBuffer',
+           'MeasurementStatistics', 'RunningStats', 'TrendStats', 'WindowedStats',
+           'MovingAverageFilter', 'ExponentialMovingAverage', 'MedianFilter',
+           'create_filter', 'SegmentStore']
@@ -0,0 +1,327 @@
+"""
+QuantumMeter Pro - Acquisition
+Asyncio scheduler sampling several devices concurrently on drift-free deadlines
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Mapping, Optional, cast
+
+import numpy as np
+
+from ..drivers import DRIVERS, MeasurementDriver, SimulationDriver, create_driver
+from .buffer import DEFAULT_CAPACITY, MeasurementBuffer
+from .shared import SharedMeasurementBuffer
+
+# Shortest interval between two reads of the same device (s); faster sampling
+# rates are acquired in blocks
+BLOCK_INTERVAL = 0.1
+
+# Used when a device has neither ``sampling_rate`` nor ``sampling_rates``
+DEFAULT_SAMPLING_RATE = 1.0
+
+# Seconds the acquisition process gets to shut down before it is terminated
+PROCESS_STOP_TIMEOUT = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def sampling_rate(config: Dict[str, Any]) -> float:
+    """Return the configured rate (``sampling_rate``, else the first ``sampling_rates`` entry)"""
+    rate = config.get('sampling_rate') or (config.get('sampling_rates') or [DEFAULT_SAMPLING_RATE])[0]
+    return float(rate)
+
+
+class AcquisitionScheduler:
+    """Acquire N devices concurrently in one asyncio event loop
+
+    Each device runs as a task on a fixed grid of monotonic deadlines
+    ``start + k * interval``; a late wake-up never shifts later deadlines, and
+    every sample whose time has come is read in the next block. Sample
+    timestamps are ``start + index / rate``, so they do not drift either.
+
+    Devices are read through their driver (see ``src.drivers``); blocks from
+    device-clocked drivers keep the device's own timestamps. Blocks are
+    appended to a per-device ``MeasurementBuffer`` and passed to
+    ``on_block(device_id, block)``. ``capacity`` sizes the buffer created for
+    each device missing from ``buffers`` (None to only deliver blocks);
+    ``sources`` overrides the driver of individual devices. Devices whose
+    connection type has no driver are listed in ``skipped``; driver errors
+    are kept in ``errors`` and passed to ``on_error(device_id, exception)``;
+    they are logged once per device until the error changes or the device
+    recovers, not on every retry. ``missed`` counts the deadlines each device skipped because it woke late.
+    """
+
+    def __init__(self, devices: Dict[str, Dict[str, Any]],
+                 rates: Optional[Dict[str, float]] = None,
+                 buffers: Optional[Mapping[str, MeasurementBuffer]] = None,
+                 capacity: Optional[int] = DEFAULT_CAPACITY,
+                 block_interval: float = BLOCK_INTERVAL,
+                 on_block: Optional[Callable[[str, Dict[str, np.ndarray]], None]] = None,
+                 sources: Optional[Mapping[str, MeasurementDriver]] = None,
+                 on_error: Optional[Callable[[str, Exception], None]] = None):
+        self.sources = {}
+        self.skipped = []
+        for device_id, config in devices.items():
+            source = (sources or {}).get(device_id) or create_driver(config)
+            if source is None:
+                self.skipped.append(device_id)
+            else:
+                self.sources[device_id] = source
+
+        self.devices = {device_id: devices[device_id] for device_id in self.sources}
+        self.rates = {device_id: float((rates or {}).get(device_id) or sampling_rate(config))
+                      for device_id, config in self.devices.items()}
+        self.buffers = dict(buffers or {})
+        if capacity:
+            for device_id in self.devices:
+                self.buffers.setdefault(device_id, MeasurementBuffer(capacity))
+        self.block_interval = block_interval
+        self.on_block = on_block
+        self.on_error = on_error
+        self.errors: Dict[str, Exception] = {}
+        self.missed = {device_id: 0 for device_id in self.devices}
+
+        # Last logged (message, error) per failing device
+        self._logged: Dict[str, tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    async def run(self) -> None:
+        """Acquire all devices until ``stop`` is called"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = stop = asyncio.Event()
+        if self._stopping:
+            stop.set()
+        tasks = [asyncio.create_task(self._acquire(device_id)) for device_id in self.devices]
+        try:
+            await stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for source in self.sources.values():
+                await source.close()
+
+    def stop(self) -> None:
+        """Stop acquisition (safe to call from any thread)"""
+        self._stopping = True
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stop.set)
+
+    async def _acquire(self, device_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        source = self.sources[device_id]
+        rate = self.rates[device_id]
+        interval = max(self.block_interval, 1.0 / rate)
+        period_ns = 1e9 / rate
+
+        try:
+            await source.open(rate)
+        except Exception as e:
+            self._report(device_id, e, 'Could not open')
+            return
+
+        start = loop.time()
+        start_timestamp = np.datetime64(datetime.datetime.now(), 'ns')
+        acquired = 0
+        tick = 0
+
+        while True:
+            due = int((loop.time() - start) * rate) + 1
+            if due > acquired:
+                offsets = (np.arange(acquired, due) * period_ns).astype(np.int64)
+                timestamps = start_timestamp + offsets.astype('timedelta64[ns]')
+                acquired = due
+                try:
+                    columns = await source.read(timestamps)
+                except Exception as e:
+                    # Keep the schedule; the samples of a failed read are lost
+                    self._report(device_id, e, 'Acquisition failed for')
+                else:
+                    if self._logged.pop(device_id, None) is not None:
+                        logger.info('Acquisition of %s recovered', device_id)
+                    self._deliver(device_id, columns.pop('timestamp', timestamps), columns)
+
+            # Sleep until the next grid deadline; missed deadlines are skipped
+            # (their samples join the next block) instead of being run back to back
+            now = loop.time()
+            next_tick = max(tick + 1, int((now - start) / interval) + 1)
+            self.missed[device_id] += next_tick - tick - 1
+            tick = next_tick
+            await asyncio.sleep(start + tick * interval - now)
+
+    def _deliver(self, device_id: str, timestamps: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        if not len(timestamps):
+            return
+        buffer = self.buffers.get(device_id)
+        if buffer is not None:
+            buffer.extend(timestamps, **columns)
+        if self.on_block is not None:
+            self.on_block(device_id, dict(columns, timestamp=timestamps))
+
+    def _report(self, device_id: str, error: Exception, message: str) -> None:
+        self.errors[device_id] = error
+        state = (message, type(error).__name__, str(error))
+        if self._logged.get(device_id) != state:
+            self._logged[device_id] = state
+            logger.warning('%s %s: %s', message, device_id, error)
+        if self.on_error is not None:
+            self.on_error(device_id, error)
+
+
+class AcquisitionProcess:
+    """Run an AcquisitionScheduler in a separate Python process
+
+    The child process only acquires, so its deadlines do not depend on the
+    GIL load of this process (UI, HTTP handlers, analysis). It writes every
+    device into a ``SharedMeasurementBuffer``: pass existing shared buffers in
+    ``buffers``, the others are created with ``capacity``. Readers use the
+    buffers directly; ``run`` additionally polls them every ``block_interval``
+    and passes the new rows to ``on_block(device_id, block)`` and errors
+    reported by the child to ``on_error(device_id, exception)``.
+
+    Devices whose connection type has no driver are listed in ``skipped``,
+    or simulated with ``simulate_unsupported``. The child is started with
+    ``subprocess`` rather than ``multiprocessing`` (so it never re-imports the
+    caller's main module) and exits once its stdin closes, which also happens
+    when this process dies.
+    """
+
+    def __init__(self, devices: Dict[str, Dict[str, Any]],
+                 rates: Optional[Dict[str, float]] = None,
+                 buffers: Optional[Dict[str, SharedMeasurementBuffer]] = None,
+                 capacity: int = DEFAULT_CAPACITY,
+                 block_interval: float = BLOCK_INTERVAL,
+                 on_block: Optional[Callable[[str, Dict[str, np.ndarray]], None]] = None,
+                 on_error: Optional[Callable[[str, Exception], None]] = None,
+                 simulate_unsupported: bool = False):
+        self.devices = {}
+        self.skipped = []
+        for device_id, config in devices.items():
+            if simulate_unsupported or config.get('connection', {}).get('type') in DRIVERS:
+                self.devices[device_id] = config
+            else:
+                self.skipped.append(device_id)
+
+        self.rates = {device_id: float((rates or {}).get(device_id) or sampling_rate(config))
+                      for device_id, config in self.devices.items()}
+        self.buffers = dict(buffers or {})
+        self._created = []
+        for device_id in self.devices:
+            if device_id not in self.buffers:
+                self.buffers[device_id] = SharedMeasurementBuffer.create(capacity)
+                self._created.append(self.buffers[device_id])
+        self.block_interval = block_interval
+        self.on_block = on_block
+        self.on_error = on_error
+        self.simulate_unsupported = simulate_unsupported
+        self.errors: Dict[str, Exception] = {}
+
+        self._stop = threading.Event()
+
+    @property
+    def missed(self) -> Dict[str, int]:
+        """Deadlines each device skipped in the acquisition process"""
+        return {device_id: self.buffers[device_id].missed for device_id in self.devices}
+
+    def run(self) -> None:
+        """Start the acquisition process and deliver its blocks until ``stop`` is called"""
+        spec = {'devices': self.devices, 'rates': self.rates, 'block_interval': self.block_interval,
+                'buffers': {device_id: self.buffers[device_id].name for device_id in self.devices},
+                'simulate_unsupported': self.simulate_unsupported}
+        # The import root of this package, so the child finds it from any working directory
+        root = str(Path(__file__).resolve().parents[__name__.count('.')])
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+        cursors = {device_id: self.buffers[device_id].total for device_id in self.devices}
+        reported = {device_id: self.buffers[device_id].last_error()[0] for device_id in self.devices}
+
+        process = subprocess.Popen([sys.executable, '-m', __name__], stdin=subprocess.PIPE, env=env)
+        stdin = cast(IO[bytes], process.stdin)
+        try:
+            stdin.write(json.dumps(spec, default=str).encode() + b'\n')
+            stdin.flush()
+            while not self._stop.wait(self.block_interval):
+                self._poll(cursors, reported)
+                if process.poll() is not None:
+                    for device_id in self.devices:
+                        self._report(device_id, RuntimeError(f'acquisition process exited with code {process.returncode}'))
+                    break
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(PROCESS_STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+                process.wait()
+            self._poll(cursors, reported)
+            for buffer in self._created:
+                buffer.unlink()
+            self._created = []
+
+    def stop(self) -> None:
+        """Stop acquisition (safe to call from any thread)"""
+        self._stop.set()
+
+    def _poll(self, cursors: Dict[str, int], reported: Dict[str, int]) -> None:
+        for device_id in self.devices:
+            buffer = self.buffers[device_id]
+            block, cursors[device_id] = buffer.since(cursors[device_id], copy=True)
+            if len(block['timestamp']) and self.on_block is not None:
+                self.on_block(device_id, block)
+            count, message = buffer.last_error()
+            if count != reported[device_id]:
+                reported[device_id] = count
+                self._report(device_id, RuntimeError(message))
+
+    def _report(self, device_id: str, error: Exception) -> None:
+        self.errors[device_id] = error
+        if self.on_error is not None:
+            self.on_error(device_id, error)
+
+
+def _serve(spec: Dict[str, Any]) -> None:
+    """Acquisition process: run the scheduler on the shared buffers named in ``spec``"""
+    devices = spec['devices']
+    buffers = {device_id: SharedMeasurementBuffer.attach(name, writable=True)
+               for device_id, name in spec['buffers'].items()}
+    sources: Dict[str, MeasurementDriver] = {}
+    if spec['simulate_unsupported']:
+        sources = {device_id: SimulationDriver(config) for device_id, config in devices.items()
+                   if create_driver(config) is None}
+    for buffer in buffers.values():
+        buffer.missed = 0
+
+    def publish(device_id: str, block: Dict[str, np.ndarray]) -> None:
+        buffers[device_id].missed = scheduler.missed[device_id]
+
+    scheduler = AcquisitionScheduler(devices, rates=spec['rates'], buffers=buffers, capacity=None,
+                                     block_interval=spec['block_interval'], on_block=publish, sources=sources,
+                                     on_error=lambda device_id, e: buffers[device_id].report_error(str(e)))
+
+    def wait_for_parent() -> None:
+        sys.stdin.buffer.read()
+        scheduler.stop()
+
+    threading.Thread(target=wait_for_parent, daemon=True).start()
+    try:
+        asyncio.run(scheduler.run())
+    finally:
+        for buffer in buffers.values():
+            buffer.close()
+
+
+if __name__ == '__main__':
+    _serve(json.loads(sys.stdin.buffer.readline()))
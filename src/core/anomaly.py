@@ -0,0 +1,381 @@
+"""
+QuantumMeter Pro - Anomaly Detection
+Robust, causal per-sample detectors with incremental (live) and batch (replay) modes
+"""
+
+import copy
+import math
+import threading
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import ArrayLike
+
+from .buffer import MeasurementBuffer
+from .filters import ExponentialMovingAverage
+from .stats import MIN_SAMPLES, SIGMA_THRESHOLD, RunningStats
+
+# Rolling median/MAD: window (samples), threshold in robust standard deviations
+# and the factor turning a MAD into a standard deviation for normal data
+MAD_WINDOW = 101
+MAD_THRESHOLD = 3.5
+MAD_SCALE = 1.4826
+
+# EWMA control chart: weight of each new sample
+EWMA_ALPHA = 0.05
+
+# CUSUM: alarm level and allowed drift (both in reference standard deviations)
+# and samples used to learn the reference mean and deviation. A level of 10
+# keeps false alarms to about one per 10^5 samples (vs. ~500 for the textbook 5,
+# far too often at kHz rates) and still detects a 2-sigma shift within ~8 samples.
+CUSUM_THRESHOLD = 10.0
+CUSUM_DRIFT = 0.5
+CUSUM_WARMUP = 200
+
+# Rows evaluated at once by the vectorized modes (bounds temporary memory)
+BATCH_ROWS = 65536
+
+# Anomaly events kept by an AnomalyMonitor
+RECENT_ANOMALIES = 100
+
+
+class AnomalyDetector:
+    """Base class for causal per-sample anomaly detectors
+
+    Every sample is tested against the state built from the samples before it
+    and then added to that state. ``update`` handles one sample; ``process``
+    handles the next block of a live stream in one vectorized pass and keeps
+    the state needed to continue seamlessly; ``apply`` runs a whole recording
+    from a fresh state. NaN samples are never flagged and leave the state
+    unchanged. ``change_points`` marks detectors that flag level changes
+    rather than individual outliers.
+    """
+
+    change_points = False
+
+    def reset(self) -> None:
+        """Forget the detector state"""
+        raise NotImplementedError
+
+    def update(self, value: float) -> bool:
+        """Test and add a single sample"""
+        value = float(value)
+        return False if math.isnan(value) else self._update(value)
+
+    def process(self, values: ArrayLike) -> np.ndarray:
+        """Test and add the next block of a stream; returns one flag per sample"""
+        block = np.asarray(values, dtype=np.float64).reshape(-1)
+        flags = np.zeros(len(block), dtype=bool)
+        valid = ~np.isnan(block)
+        if valid.any():
+            flags[valid] = self._process(block[valid])
+        return flags
+
+    def apply(self, values: ArrayLike) -> np.ndarray:
+        """Flag a complete recording in one vectorized pass"""
+        fresh = copy.copy(self)
+        fresh.reset()
+        return fresh.process(values)
+
+    def _update(self, value: float) -> bool:
+        return bool(self._process(np.array([value]))[0])
+
+    def _process(self, values: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class RollingMADDetector(AnomalyDetector):
+    """Flag samples far from the median of the previous ``window`` samples
+
+    A sample is anomalous when ``|x - median| > threshold * 1.4826 * MAD``.
+    Median and MAD ignore up to half of the window, so one outlier can neither
+    mask another nor inflate the threshold. ``update`` keeps the window sorted
+    and finds the MAD by selection over both sides of the median (O(log w)
+    comparisons); ``process`` evaluates sliding windows. Both give identical
+    flags. Nothing is flagged before ``min_samples`` samples were seen.
+    """
+
+    def __init__(self, window: int = MAD_WINDOW, threshold: float = MAD_THRESHOLD,
+                 min_samples: int = MIN_SAMPLES) -> None:
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        self.window = int(window)
+        self.threshold = float(threshold)
+        self.min_samples = max(1, min(int(min_samples), self.window))
+        self.reset()
+
+    def reset(self) -> None:
+        self._recent: Deque[float] = deque()
+        self._sorted: List[float] = []
+
+    def _update(self, value: float) -> bool:
+        ordered = self._sorted
+        flag = False
+        if len(ordered) >= self.min_samples:
+            median, mad = self._median_mad(ordered)
+            flag = abs(value - median) > self.threshold * MAD_SCALE * mad
+        if len(self._recent) == self.window:
+            del ordered[bisect_left(ordered, self._recent.popleft())]
+        self._recent.append(value)
+        insort(ordered, value)
+        return flag
+
+    def _process(self, values: np.ndarray) -> np.ndarray:
+        flags = np.zeros(len(values), dtype=bool)
+        # Until the first window is full, windows grow sample by sample
+        warm = min(len(values), self.window - len(self._recent))
+        for index in range(warm):
+            flags[index] = self._update(float(values[index]))
+        if warm == len(values):
+            return flags
+
+        extended = np.concatenate((np.array(self._recent, dtype=np.float64), values[warm:]))
+        count = len(values) - warm
+        for start in range(0, count, BATCH_ROWS):
+            stop = min(start + BATCH_ROWS, count)
+            windows = sliding_window_view(extended[start:stop + self.window - 1], self.window)
+            median = np.median(windows, axis=1)
+            mad = np.median(np.abs(windows - median[:, None]), axis=1)
+            targets = extended[start + self.window:stop + self.window]
+            flags[warm + start:warm + stop] = np.abs(targets - median) > self.threshold * MAD_SCALE * mad
+
+        tail = extended[-self.window:].tolist()
+        self._recent = deque(tail)
+        self._sorted = sorted(tail)
+        return flags
+
+    @staticmethod
+    def _median_mad(ordered: List[float]) -> Tuple[float, float]:
+        count = len(ordered)
+        middle = count // 2
+        median = ordered[middle] if count % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+        # Deviations below and above the median are each sorted; select among both
+        split = bisect_left(ordered, median)
+        if count % 2:
+            mad = _kth_deviation(ordered, split, median, middle)
+        else:
+            mad = (_kth_deviation(ordered, split, median, middle - 1)
+                   + _kth_deviation(ordered, split, median, middle)) / 2
+        return median, mad
+
+
+def _kth_deviation(ordered: List[float], split: int, median: float, k: int) -> float:
+    """k-th smallest (0-based) ``|x - median|`` of a sorted list, with ``ordered[:split] < median``"""
+    def below(index: int) -> float:
+        return median - ordered[split - 1 - index]
+
+    def above(index: int) -> float:
+        return ordered[split + index] - median
+
+    count_below, count_above = split, len(ordered) - split
+    low, high = max(0, k + 1 - count_above), min(k + 1, count_below)
+    while low < high:
+        taken = (low + high) // 2
+        if below(taken) < above(k - taken):
+            low = taken + 1
+        else:
+            high = taken
+    taken = low
+    candidates = []
+    if taken:
+        candidates.append(below(taken - 1))
+    if k + 1 - taken:
+        candidates.append(above(k - taken))
+    return max(candidates)
+
+
+class EWMADetector(AnomalyDetector):
+    """EWMA control chart: flag samples outside ``mean ± threshold * std``
+
+    Mean and variance are exponentially weighted with ``alpha`` (a memory of
+    about ``1/alpha`` samples), so slow drifts are followed while sudden
+    deviations stand out. O(1) per sample; blocks are evaluated in closed form
+    (see ``ExponentialMovingAverage``). Nothing is flagged before
+    ``min_samples`` samples (default ``1/alpha``) were seen.
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA, threshold: float = SIGMA_THRESHOLD,
+                 min_samples: Optional[int] = None) -> None:
+        if not 0 < alpha < 1:
+            raise ValueError('alpha must be in (0, 1)')
+        self.alpha = float(alpha)
+        self.threshold = float(threshold)
+        self.min_samples = math.ceil(1 / alpha) if min_samples is None else int(min_samples)
+        self.reset()
+
+    def reset(self) -> None:
+        self._mean = ExponentialMovingAverage(self.alpha)
+        self._variance = ExponentialMovingAverage(self.alpha)
+        self._level: Optional[float] = None
+        self._spread = 0.0
+        self._count = 0
+
+    def _process(self, values: np.ndarray) -> np.ndarray:
+        means = self._mean.process(values)
+        previous_mean = np.concatenate(([values[0] if self._level is None else self._level], means[:-1]))
+        deviation = values - previous_mean
+        # var[n] = (1 - alpha) * (var[n-1] + alpha * d[n]**2), an EMA of (1 - alpha) * d**2
+        variances = self._variance.process((1 - self.alpha) * np.square(deviation))
+        previous_variance = np.concatenate(([self._spread], variances[:-1]))
+        seen = self._count + np.arange(len(values))
+        flags: np.ndarray = (seen >= self.min_samples) & (np.abs(deviation) > self.threshold * np.sqrt(previous_variance))
+
+        self._level = float(means[-1])
+        self._spread = float(variances[-1])
+        self._count += len(values)
+        return flags
+
+
+class CusumDetector(AnomalyDetector):
+    """Two-sided CUSUM change-point detector
+
+    The first ``warmup`` samples set a reference mean and standard deviation.
+    After that, ``S+ = max(0, S+ + z - drift)`` and ``S- = max(0, S- - z - drift)``
+    accumulate the standardized deviations ``z``. The sample at which either
+    sum exceeds ``threshold`` is flagged as a change point; the sums then
+    restart and a new reference is learned from the following samples.
+    O(1) per sample; blocks are evaluated with cumulative sums and minima.
+    """
+
+    change_points = True
+
+    def __init__(self, threshold: float = CUSUM_THRESHOLD, drift: float = CUSUM_DRIFT,
+                 warmup: int = CUSUM_WARMUP) -> None:
+        if warmup < 2:
+            raise ValueError('warmup must be at least 2')
+        self.threshold = float(threshold)
+        self.drift = float(drift)
+        self.warmup = int(warmup)
+        self.reset()
+
+    def reset(self) -> None:
+        self._reference = RunningStats()
+        self._high = 0.0
+        self._low = 0.0
+
+    def _process(self, values: np.ndarray) -> np.ndarray:
+        flags = np.zeros(len(values), dtype=bool)
+        position = 0
+        while position < len(values):
+            if self._reference.count < self.warmup:
+                stop = min(len(values), position + self.warmup - self._reference.count)
+                self._reference.update(values[position:stop])
+                position = stop
+                continue
+
+            block = values[position:position + BATCH_ROWS]
+            mean, std = self._reference.mean, self._reference.std
+            scale = std if std > 0 else max(abs(mean), 1.0) * np.finfo(np.float64).eps
+            z = (block - mean) / scale
+            high = self._accumulate(self._high, z - self.drift)
+            low = self._accumulate(self._low, -z - self.drift)
+            alarms = np.flatnonzero((high > self.threshold) | (low > self.threshold))
+            if not len(alarms):
+                self._high, self._low = float(high[-1]), float(low[-1])
+                position += len(block)
+                continue
+            flags[position + alarms[0]] = True
+            position += alarms[0] + 1
+            self.reset()
+        return flags
+
+    @staticmethod
+    def _accumulate(start: float, steps: np.ndarray) -> np.ndarray:
+        """``s[n] = max(0, s[n-1] + steps[n])`` from ``s[-1] = start`` (Lindley recursion)"""
+        sums = np.cumsum(steps)
+        result: np.ndarray = sums - np.minimum(np.minimum.accumulate(sums), -start)
+        return result
+
+
+DETECTORS: Dict[str, Type[AnomalyDetector]] = {
+    'mad': RollingMADDetector,
+    'ewma': EWMADetector,
+    'cusum': CusumDetector,
+}
+
+
+def create_detector(kind: str, **params: Any) -> AnomalyDetector:
+    """Create a detector by name (see ``DETECTORS``)"""
+    cls = DETECTORS.get(kind)
+    if cls is None:
+        raise ValueError(f"Unknown detector '{kind}'. Available: {', '.join(DETECTORS)}")
+    return cls(**params)
+
+
+class AnomalyMonitor:
+    """Run anomaly detectors over the new samples of a MeasurementBuffer
+
+    Each ``update`` reads only the rows appended since the previous one and
+    feeds them to one detector per channel and kind, so live per-sample flags
+    never rescan the history. Counts restart when the buffer is cleared; rows
+    evicted before ``update`` reached them are skipped. The most recent
+    ``recent`` anomalies are kept in ``events``. Safe to use from several
+    threads.
+    """
+
+    def __init__(self, buffer: MeasurementBuffer, channels: Iterable[str] = ('current', 'voltage'),
+                 detectors: Iterable[str] = tuple(DETECTORS), recent: int = RECENT_ANOMALIES) -> None:
+        self.buffer = buffer
+        self.channels = tuple(channels)
+        self.kinds = tuple(detectors)
+        self.recent = recent
+        self._lock = threading.Lock()
+        self.events: Deque[Dict[str, Any]]
+        self._cleared_at: int
+        self._cursor: int
+        self._reset(buffer.cleared_at)
+
+    def update(self) -> Dict[str, Dict[str, int]]:
+        """Evaluate new samples; returns the new anomaly counts per channel and detector"""
+        with self._lock:
+            if self.buffer.cleared_at != self._cleared_at:
+                self._reset(self.buffer.cleared_at)
+            data, self._cursor = self.buffer.since(self._cursor, copy=True)
+            found = {name: {kind: 0 for kind in self.kinds} for name in self.channels}
+            if not len(data['timestamp']):
+                return found
+            for name in self.channels:
+                values = data[name]
+                outliers = np.zeros(len(values), dtype=bool)
+                for kind, detector in self.detectors[name].items():
+                    flags = detector.process(values)
+                    found[name][kind] = int(np.count_nonzero(flags))
+                    self.counts[name][kind] += found[name][kind]
+                    if not detector.change_points:
+                        outliers |= flags
+                    for index in np.flatnonzero(flags)[-self.recent:]:
+                        self.events.append({'timestamp': data['timestamp'][index], 'channel': name,
+                                            'detector': kind, 'value': float(values[index])})
+                self.anomalies[name] += int(np.count_nonzero(outliers))
+            # Events of different channels and detectors arrive per block; keep them in time order
+            self.events = deque(sorted(self.events, key=lambda event: event['timestamp']), maxlen=self.recent)
+            return found
+
+    def summary(self) -> Dict[str, Any]:
+        """Anomaly counts in the shape used by the analysis endpoints
+
+        ``anomalies`` counts samples flagged by any outlier detector (per
+        ``<channel>_anomalies``), ``change_points`` the CUSUM alarms and
+        ``detectors`` every detector separately.
+        """
+        with self._lock:
+            change_kinds = [kind for kind in self.kinds if DETECTORS[kind].change_points]
+            return {
+                'anomalies': {f'{name}_anomalies': self.anomalies[name] for name in self.channels},
+                'change_points': {name: sum(self.counts[name][kind] for kind in change_kinds)
+                                  for name in self.channels},
+                'detectors': {name: dict(self.counts[name]) for name in self.channels},
+                'recent_anomalies': [dict(event, timestamp=str(event['timestamp'].astype('datetime64[ms]')))
+                                     for event in self.events],
+            }
+
+    def _reset(self, cleared_at: int) -> None:
+        self.detectors = {name: {kind: create_detector(kind) for kind in self.kinds} for name in self.channels}
+        self.counts = {name: {kind: 0 for kind in self.kinds} for name in self.channels}
+        self.anomalies = {name: 0 for name in self.channels}
+        self.events = deque(maxlen=self.recent)
+        self._cleared_at = cleared_at
+        self._cursor = cleared_at
@@ -0,0 +1,243 @@
+"""
+QuantumMeter Pro - Batch Analysis
+Statistics, anomaly counts and drift of recorded runs, computed on all cores
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .recording import Recording
+from .stats import MIN_SAMPLES, SIGMA_THRESHOLD, RunningStats, TrendStats
+
+# Time span of one analysis task (s); tasks run in parallel and their results are merged
+CHUNK_SECONDS = 3600
+
+# Rows a task reads at a time, which bounds the memory of each worker
+BLOCK_ROWS = 1_000_000
+
+# Bins of the per-channel value histogram
+HISTOGRAM_BINS = 64
+
+# Recordings opened by this (worker) process, by source path
+_recordings: Dict[str, Recording] = {}
+
+
+def plan_chunks(recording: Recording, start: Any = None, end: Any = None,
+                chunk_seconds: float = CHUNK_SECONDS) -> List[Tuple[int, int]]:
+    """Split the rows of a time range into ``(first, last)`` row ranges of ``chunk_seconds`` each"""
+    first = 0 if start is None else recording.index_of(start, 'left')
+    last = len(recording) if end is None else recording.index_of(end, 'right')
+    if last <= first:
+        return []
+    origin = recording.rows(first, first + 1, ())['timestamp'][0]
+    final = recording.rows(last - 1, last, ())['timestamp'][0]
+    step = np.timedelta64(int(chunk_seconds * 1e9), 'ns')
+    boundaries = [recording.index_of(origin + step * k, 'left')
+                  for k in range(1, int((final - origin) // step) + 1)]
+    edges = [first] + [index for index in boundaries if first < index < last] + [last]
+    return [(low, high) for low, high in zip(edges[:-1], edges[1:]) if high > low]
+
+
+def analyze_recording(source: Union[str, 'os.PathLike[str]'], start: Any = None, end: Any = None,
+                      channels: Optional[Iterable[str]] = None,
+                      chunk_seconds: float = CHUNK_SECONDS, workers: Optional[int] = None,
+                      bins: int = HISTOGRAM_BINS, threshold: float = SIGMA_THRESHOLD,
+                      progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Analyze a recording (any path ``Recording.open`` accepts) across a process pool
+
+    The time range is split into chunks of ``chunk_seconds``. A first pass
+    computes mergeable moments and drift fits per chunk; a second pass counts
+    values per histogram bin (spanning the overall min/max) and samples beyond
+    ``threshold`` standard deviations of the overall mean. Workers memory-map
+    the recording themselves, so no samples are sent between processes.
+    ``progress(done, total)`` is called as chunks finish. Returns a
+    JSON-ready dict.
+    """
+    if chunk_seconds <= 0:
+        raise ValueError('chunk_seconds must be positive')
+    started = time.perf_counter()
+    source = str(source)
+    recording = Recording.open(source)
+    channels = recording.channels if channels is None else tuple(channels)
+    unknown = set(channels) - set(recording.channels)
+    if unknown:
+        raise ValueError(f"Unknown channels: {', '.join(sorted(unknown))}")
+
+    chunks = plan_chunks(recording, start, end, chunk_seconds)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    origin = recording.rows(chunks[0][0], chunks[0][0] + 1, ())['timestamp'][0] if chunks else None
+    total = 2 * len(chunks)
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        moments = _map(pool, _moments_task, [(source, first, last, channels, origin) for first, last in chunks],
+                       progress, 0, total)
+        stats = {name: RunningStats() for name in channels}
+        trends = {name: TrendStats() for name in channels}
+        for chunk in moments:
+            for name in channels:
+                stats[name].merge(chunk['stats'][name])
+                trends[name].merge(chunk['trends'][name])
+
+        edges = {name: _histogram_edges(stats[name], bins) for name in channels}
+        limits = {name: (stats[name].mean - threshold * stats[name].std, stats[name].mean + threshold * stats[name].std)
+                  if stats[name].count >= MIN_SAMPLES else None for name in channels}
+        counts = _map(pool, _histogram_task, [(source, first, last, channels, edges, limits) for first, last in chunks],
+                      progress, len(chunks), total)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    result: Dict[str, Any] = {
+        'source': source,
+        'start': _isoformat(moments[0]['start']) if chunks else None,
+        'end': _isoformat(moments[-1]['end']) if chunks else None,
+        'rows': sum(last - first for first, last in chunks),
+        'chunk_seconds': chunk_seconds,
+        'workers': workers,
+        'channels': {},
+        'chunks': [{'start': _isoformat(chunk['start']), 'end': _isoformat(chunk['end']), 'rows': chunk['rows'],
+                    'mean': {name: _finite(chunk['stats'][name].mean if chunk['stats'][name].count else math.nan)
+                             for name in channels}}
+                   for chunk in moments],
+    }
+    for name in channels:
+        summary: Dict[str, Any] = {key: value if key == 'count' else _finite(value)
+                                   for key, value in stats[name].as_dict().items()}
+        summary['anomalies'] = sum(chunk['anomalies'][name] for chunk in counts)
+        summary['drift_per_hour'] = _finite(trends[name].slope * 3600)
+        bin_edges = edges[name]
+        summary['histogram'] = None if bin_edges is None else {
+            'edges': bin_edges.tolist(),
+            'counts': np.sum([chunk['histogram'][name] for chunk in counts], axis=0).tolist()}
+        result['channels'][name] = summary
+    current = result['channels'].get('current')
+    result['quality_score'] = _finite(1.0 - current['std'] / current['mean']) if current and current['mean'] else None
+    result['elapsed_seconds'] = time.perf_counter() - started
+    return result
+
+
+def _map(pool: Optional[ProcessPoolExecutor], func: Callable[..., Any], tasks: List[Tuple[Any, ...]],
+         progress: Optional[Callable[[int, int], None]], done: int, total: int) -> List[Any]:
+    """Run ``func(*task)`` for every task, in the pool if there is one, keeping task order"""
+    results = []
+    if pool is None:
+        pending = (func(*task) for task in tasks)
+    else:
+        pending = (future.result() for future in [pool.submit(func, *task) for task in tasks])
+    for result in pending:
+        results.append(result)
+        done += 1
+        if progress is not None:
+            progress(done, total)
+    return results
+
+
+def _moments_task(source: str, first: int, last: int, channels: Tuple[str, ...],
+                  origin: np.datetime64) -> Dict[str, Any]:
+    stats = {name: RunningStats() for name in channels}
+    trends = {name: TrendStats() for name in channels}
+    start = end = None
+    for block in _blocks(source, first, last, channels):
+        start = block['timestamp'][0] if start is None else start
+        end = block['timestamp'][-1]
+        seconds = (block['timestamp'] - origin) / np.timedelta64(1, 's')
+        for name in channels:
+            stats[name].update(block[name])
+            trends[name].update(seconds, block[name])
+    return {'start': start, 'end': end, 'rows': last - first, 'stats': stats, 'trends': trends}
+
+
+def _histogram_task(source: str, first: int, last: int, channels: Tuple[str, ...],
+                    edges: Dict[str, Optional[np.ndarray]],
+                    limits: Dict[str, Optional[Tuple[float, float]]]) -> Dict[str, Any]:
+    bins = {name: values for name, values in edges.items() if name in channels and values is not None}
+    histogram = {name: np.zeros(len(values) - 1, dtype=np.int64) for name, values in bins.items()}
+    anomalies = {name: 0 for name in channels}
+    for block in _blocks(source, first, last, channels):
+        for name in channels:
+            values = block[name][~np.isnan(block[name])]
+            if name in bins:
+                histogram[name] += np.histogram(values, bins[name])[0]
+            limit = limits[name]
+            if limit is not None:
+                low, high = limit
+                anomalies[name] += int(np.count_nonzero((values < low) | (values > high)))
+    return {'histogram': histogram, 'anomalies': anomalies}
+
+
+def _blocks(source: str, first: int, last: int, channels: Tuple[str, ...]) -> Iterator[Dict[str, np.ndarray]]:
+    recording = _recordings.get(source)
+    if recording is None:
+        recording = _recordings[source] = Recording.open(source)
+    for low in range(first, last, BLOCK_ROWS):
+        high = min(low + BLOCK_ROWS, last)
+        # Recordings are mapped for sparse access; a scan reads each block ahead in bulk
+        recording.prefetch(low, high, channels)
+        yield recording.rows(low, high, channels)
+
+
+def _histogram_edges(stats: RunningStats, bins: int) -> Optional[np.ndarray]:
+    if not stats.count:
+        return None
+    return np.histogram_bin_edges(np.array([stats.min, stats.max]), bins)
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    return float(value) if value is not None and math.isfinite(value) else None
+
+
+def _isoformat(timestamp: Any) -> Optional[str]:
+    return None if timestamp is None else str(np.datetime64(timestamp, 'us'))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point (``python -m src.core.batch <recording>``)"""
+    parser = argparse.ArgumentParser(prog='python -m src.core.batch',
+                                     description='Analyze a recorded run on all CPU cores')
+    parser.add_argument('recording', help="store directory or index.json, column directory or structured .npy")
+    parser.add_argument('--start', help='first timestamp (ISO 8601)')
+    parser.add_argument('--end', help='last timestamp (ISO 8601)')
+    parser.add_argument('--channels', help='comma-separated channels (default: all)')
+    parser.add_argument('--chunk-seconds', type=float, default=CHUNK_SECONDS, help='time span per task')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--bins', type=int, default=HISTOGRAM_BINS, help='histogram bins per channel')
+    parser.add_argument('--output', help='write the full result as JSON to this file')
+    parser.add_argument('--progress', action='store_true', help="print 'progress <done> <total>' lines to stderr")
+    args = parser.parse_args(argv)
+
+    def report(done: int, total: int) -> None:
+        print(f'progress {done} {total}', file=sys.stderr, flush=True)
+
+    try:
+        result = analyze_recording(args.recording, args.start, args.end,
+                                   args.channels.split(',') if args.channels else None,
+                                   chunk_seconds=args.chunk_seconds, workers=args.workers, bins=args.bins,
+                                   progress=report if args.progress else None)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(result, fh)
+    print(f"📊 Analyzed {result['rows']:,} rows ({result['start']} to {result['end']}) in "
+          f"{len(result['chunks'])} chunks on {result['workers']} workers: {result['elapsed_seconds']:.1f} s")
+    for name, summary in result['channels'].items():
+        if not summary['count']:
+            print(f"  {name}: no data")
+            continue
+        print(f"  {name}: mean {summary['mean']:.6g} ± {summary['std']:.3g}, range {summary['min']:.6g} to "
+              f"{summary['max']:.6g}, {summary['anomalies']} anomalies, drift {summary['drift_per_hour']:.3g} /h")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
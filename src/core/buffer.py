@@ -0,0 +1,281 @@
+"""
+QuantumMeter Pro - Measurement Buffer
+Fixed-capacity columnar ring buffer shared by the desktop, web and Streamlit frontends
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple, TypeVar
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .stats import MeasurementStatistics
+
+# Measurement channels stored next to the timestamp column
+CHANNELS = ('current', 'voltage', 'resistance', 'temperature')
+
+# Default number of retained samples (matches global_settings.max_data_points)
+DEFAULT_CAPACITY = 10000
+
+TIMESTAMP_DTYPE = 'datetime64[ns]'
+
+T = TypeVar('T')
+
+
+def to_datetime64(values: ArrayLike) -> np.ndarray:
+    """Convert datetimes, ISO strings or datetime64 values to a datetime64[ns] array"""
+    timestamps: np.ndarray = np.asarray(values, dtype=TIMESTAMP_DTYPE).reshape(-1)
+    return timestamps
+
+
+class MeasurementBuffer:
+    """Preallocated ring buffer holding timestamps plus float64 measurement channels
+
+    Every row is written twice, at ``slot`` and ``slot + capacity``, so the most
+    recent ``n <= capacity`` rows always form one contiguous slice. Appends are
+    O(1) and window reads return read-only views without copying. ``total``
+    never decreases, so it can serve as a cursor for incremental readers.
+    ``stats`` holds streaming statistics over every sample appended since the
+    last clear.
+
+    Concurrency: writers serialize on a lock, readers never take it. Rows are
+    written before the ``(total, cleared_at)`` header is published as one tuple,
+    so every read works on a consistent version and never sees a partly written
+    row. A zero-copy view of ``n`` rows stays intact until ``capacity - n``
+    further rows have been appended; pass ``copy=True`` for a copy that is
+    validated against concurrent overwrites (and retried if needed). Reads of
+    ``stats`` from other threads go through ``read_consistent``.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, channels: Iterable[str] = CHANNELS):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = int(capacity)
+        self.channels = tuple(channels)
+        self._timestamps = np.zeros(2 * self.capacity, dtype=TIMESTAMP_DTYPE)
+        self._columns = {name: np.zeros(2 * self.capacity, dtype=np.float64)
+                         for name in self.channels}
+        self.stats = MeasurementStatistics(self.channels)
+
+        self._write_lock = threading.Lock()
+        # Published (total, cleared_at), replaced as a whole at the end of each write
+        self._header = (0, 0)
+        # Absolute index one past the last row a writer may be touching
+        self._reserved = 0
+        # Sequence counter, odd while a write is in progress
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._size(*self._header)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        """Return a read-only view of one column over all retained samples"""
+        total, cleared_at = self._header
+        return self._window(key, total, self._size(total, cleared_at))
+
+    @property
+    def total(self) -> int:
+        """Number of samples ever appended (including evicted and cleared ones)"""
+        return self._header[0]
+
+    @property
+    def cleared_at(self) -> int:
+        """Value of ``total`` at the last clear (0 if never cleared)"""
+        return self._header[1]
+
+    def append(self, timestamp: Any, **values: float) -> None:
+        """Append a single sample"""
+        ts = np.datetime64(timestamp, 'ns')
+        with self._write_lock:
+            total, cleared_at = self._begin_write(1)
+            slot = total % self.capacity
+            self._timestamps[slot] = ts
+            self._timestamps[slot + self.capacity] = ts
+            for name in self.channels:
+                value = values.get(name, np.nan)
+                column = self._columns[name]
+                column[slot] = value
+                column[slot + self.capacity] = value
+            self._update_stats({name: (value,) for name, value in values.items()})
+            self._end_write(total + 1, cleared_at)
+
+    def extend(self, timestamps: ArrayLike, **columns: Optional[ArrayLike]) -> None:
+        """Append a block of samples in one vectorized write"""
+        timestamps = to_datetime64(timestamps)
+        count = len(timestamps)
+        if count == 0:
+            return
+        block = {}
+        for name in self.channels:
+            values = columns.get(name)
+            if values is None:
+                values = np.full(count, np.nan)
+            values = np.asarray(values, dtype=np.float64).reshape(-1)
+            if len(values) != count:
+                raise ValueError(f"column '{name}' has {len(values)} values, expected {count}")
+            block[name] = values
+
+        # Only the newest ``capacity`` rows of an oversized block survive
+        skip = max(0, count - self.capacity)
+        with self._write_lock:
+            total, cleared_at = self._begin_write(count)
+            slots = (total + skip + np.arange(count - skip)) % self.capacity
+            mirror = slots + self.capacity
+
+            self._timestamps[slots] = timestamps[skip:]
+            self._timestamps[mirror] = timestamps[skip:]
+            for name, values in block.items():
+                column = self._columns[name]
+                column[slots] = values[skip:]
+                column[mirror] = values[skip:]
+            self._update_stats(columns)
+            self._end_write(total + count, cleared_at)
+
+    def view(self, n: Optional[int] = None, copy: bool = False) -> Dict[str, np.ndarray]:
+        """Return read-only views of the most recent ``n`` samples (all retained if None)"""
+        def read(total: int, size: int) -> Tuple[Dict[str, np.ndarray], int]:
+            if n is not None:
+                size = max(0, min(int(n), size))
+            return self._rows(total, size, self.channels), total - size
+        return self._read(read, copy)
+
+    def since(self, cursor: int, limit: Optional[int] = None,
+              copy: bool = False) -> Tuple[Dict[str, np.ndarray], int]:
+        """Return views of the samples appended after ``cursor`` and the new cursor
+
+        ``cursor`` is a previous value of ``total``. Samples that were evicted or
+        cleared in the meantime are skipped, so fewer than ``total - cursor`` rows
+        come back when a reader fell behind. ``limit`` keeps the most recent rows.
+        """
+        def read(total: int, size: int) -> Tuple[Tuple[Dict[str, np.ndarray], int], int]:
+            count = min(max(0, total - int(cursor)), size)
+            if limit is not None:
+                count = min(count, int(limit))
+            return (self._rows(total, count, self.channels), total), total - count
+        return self._read(read, copy)
+
+    def between(self, start: Any = None, end: Any = None, channels: Optional[Iterable[str]] = None,
+                limit: Optional[int] = None, copy: bool = False) -> Dict[str, np.ndarray]:
+        """Return views of the samples with ``start <= timestamp <= end``
+
+        The range is resolved by binary search over the (time-ordered) timestamp
+        column. ``limit`` keeps the most recent rows of the range.
+        """
+        channels = self.channels if channels is None else tuple(channels)
+
+        def read(total: int, size: int) -> Tuple[Dict[str, np.ndarray], int]:
+            timestamps = self._window('timestamp', total, size)
+            first = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(start, 'ns'), 'left'))
+            last = size if end is None else int(np.searchsorted(timestamps, np.datetime64(end, 'ns'), 'right'))
+            if limit is not None:
+                first = max(first, last - int(limit))
+            first = min(first, last)
+            oldest = total - size
+            return self._rows(oldest + last, last - first, channels), oldest + first
+        return self._read(read, copy)
+
+    def chunks(self, size: int, channels: Optional[Iterable[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield validated copies of the retained samples, oldest first, ``size`` rows at a time
+
+        Only the samples held when iteration starts are yielded; rows evicted
+        or cleared before their chunk is copied are skipped.
+        """
+        channels = self.channels if channels is None else tuple(channels)
+        total, cleared_at = self._header
+        cursor = total - self._size(total, cleared_at)
+        while cursor < total:
+            stop = min(cursor + int(size), total)
+
+            def read(current: int, held: int, first: int = cursor,
+                     stop: int = stop) -> Tuple[Dict[str, np.ndarray], int]:
+                count = max(0, stop - max(first, current - held))
+                return self._rows(stop, count, channels), stop - count
+            data = self._read(read, copy=True)
+            if len(data['timestamp']):
+                yield data
+            cursor = stop
+
+    def latest(self) -> Optional[Dict[str, object]]:
+        """Return the most recent sample as a dict of scalars"""
+        data = self.view(1, copy=True)
+        if not len(data['timestamp']):
+            return None
+        return {key: values[-1] for key, values in data.items()}
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        with self._write_lock:
+            total, cleared_at = self._begin_write(0)
+            self._reset_stats()
+            self._end_write(total, total)
+
+    def read_consistent(self, func: Callable[[], T]) -> T:
+        """Call ``func`` until it runs without a concurrent write (seqlock read)
+
+        ``func`` must only read, e.g. ``lambda: buffer.stats.summary()``.
+        """
+        while True:
+            seq = self._seq
+            if not seq & 1:
+                result = func()
+                if self._seq == seq:
+                    return result
+            time.sleep(0)
+
+    def _update_stats(self, columns: Mapping[str, Optional[ArrayLike]]) -> None:
+        self.stats.update(columns)
+
+    def _reset_stats(self) -> None:
+        self.stats.reset()
+
+    def _begin_write(self, count: int) -> Tuple[int, int]:
+        total, cleared_at = self._header
+        self._seq += 1
+        self._reserved = total + count
+        return total, cleared_at
+
+    def _end_write(self, total: int, cleared_at: int) -> None:
+        self._header = (total, cleared_at)
+        self._seq += 1
+
+    def _size(self, total: int, cleared_at: int) -> int:
+        return min(total - cleared_at, self.capacity)
+
+    def _read(self, read: Callable[[int, int], Tuple[T, int]], copy: bool) -> T:
+        """Run ``read(total, size)`` against one header version
+
+        ``read`` returns its result and the absolute index of the oldest row it
+        references; that row is overwritten once a writer reserves index
+        ``oldest + capacity``, which invalidates a copy taken meanwhile.
+        """
+        while True:
+            total, cleared_at = self._header
+            result, oldest = read(total, self._size(total, cleared_at))
+            if not copy:
+                return result
+            result = self._copy(result)
+            if self._reserved <= oldest + self.capacity:
+                return result
+
+    @classmethod
+    def _copy(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: np.array(values) for key, values in value.items()}
+        if isinstance(value, tuple):
+            return tuple(cls._copy(item) for item in value)
+        return value
+
+    def _rows(self, end: int, count: int, channels: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Views of the ``count`` rows before absolute index ``end``"""
+        data = {'timestamp': self._window('timestamp', end, count)}
+        for name in channels:
+            data[name] = self._window(name, end, count)
+        return data
+
+    def _window(self, key: str, end: int, size: int) -> np.ndarray:
+        source = self._timestamps if key == 'timestamp' else self._columns[key]
+        stop = end % self.capacity + self.capacity
+        window = source[stop - size:stop]
+        window.flags.writeable = False
+        return window
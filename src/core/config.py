@@ -0,0 +1,30 @@
+"""
+QuantumMeter Pro - Configuration
+Access to the device and global settings in config/devices.yaml
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Default configuration file, relative to the project root
+CONFIG_FILE = Path(__file__).resolve().parents[2] / 'config' / 'devices.yaml'
+
+
+def load_config(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Load the YAML configuration (empty sections if the file is missing)"""
+    import yaml
+
+    path = Path(path) if path else CONFIG_FILE
+    if not path.exists():
+        return {'devices': {}, 'global_settings': {}}
+    with open(path, 'r', encoding='utf-8') as fh:
+        config = yaml.safe_load(fh) or {}
+    config.setdefault('devices', {})
+    config.setdefault('global_settings', {})
+    return config
+
+
+def global_settings(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Return the ``global_settings`` section of the configuration"""
+    settings: Dict[str, Any] = load_config(path)['global_settings']
+    return settings
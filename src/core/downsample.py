@@ -0,0 +1,120 @@
+"""
+QuantumMeter Pro - Downsampling
+Visually faithful decimation of long series for charts (min/max buckets and LTTB)
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Default number of points sent to a chart
+DEFAULT_POINTS = 1000
+
+
+def _as_float(values: ArrayLike) -> np.ndarray:
+    array = np.asarray(values)
+    if np.issubdtype(array.dtype, np.datetime64):
+        ticks = array.astype('datetime64[ns]').view(np.int64)
+        return (ticks - ticks[0]).astype(np.float64) if len(ticks) else ticks.astype(np.float64)
+    return array.astype(np.float64, copy=False)
+
+
+def minmax_indices(y: ArrayLike, points: int) -> np.ndarray:
+    """Indices of the minimum and maximum of ``points // 2`` equal buckets
+
+    Keeps every peak and trough, which is what a line chart needs to look
+    identical to the raw data at pixel resolution.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    count = len(y)
+    buckets = max(1, points // 2)
+    if count <= points or count <= 2:
+        return np.arange(count)
+
+    size = -(-count // buckets)
+    buckets = -(-count // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:count] = y
+    rows = padded.reshape(buckets, size)
+    nan = np.isnan(rows)
+    low = np.where(nan, np.inf, rows).argmin(axis=1)
+    high = np.where(nan, -np.inf, rows).argmax(axis=1)
+
+    offsets = np.arange(buckets) * size
+    indices = np.unique(np.concatenate((offsets + low, offsets + high)))
+    return indices[indices < count]
+
+
+def lttb_indices(x: ArrayLike, y: ArrayLike, points: int) -> np.ndarray:
+    """Indices selected by Largest-Triangle-Three-Buckets
+
+    The first and last samples are kept; every bucket in between contributes the
+    point forming the largest triangle with the previously selected point and
+    the average of the next bucket. Work inside each bucket is vectorized.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    count = len(y)
+    if points >= count or points < 3:
+        return np.arange(count)
+
+    x = _as_float(x)
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+    next_edges = np.append(edges[2:], count)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+
+    anchor = 0
+    for bucket in range(points - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        next_low, next_high = high, next_edges[bucket]
+        avg_x = x[next_low:next_high].mean()
+        avg_y = np.nanmean(y[next_low:next_high]) if not np.isnan(y[next_low:next_high]).all() else y[anchor]
+
+        area = np.abs((x[anchor] - avg_x) * (y[low:high] - y[anchor])
+                      - (x[anchor] - x[low:high]) * (avg_y - y[anchor]))
+        anchor = low + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def minmax(x: ArrayLike, y: ArrayLike, points: int = DEFAULT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample one series with min/max buckets"""
+    indices = minmax_indices(y, points)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+def lttb(x: ArrayLike, y: ArrayLike, points: int = DEFAULT_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample one series with LTTB"""
+    indices = lttb_indices(x, y, points)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+METHODS = ('minmax', 'lttb')
+
+
+def downsample_columns(data: Dict[str, np.ndarray], points: int = DEFAULT_POINTS,
+                       method: str = 'minmax') -> Dict[str, np.ndarray]:
+    """Downsample a column dict (``timestamp`` plus channels) to shared rows
+
+    Each channel selects up to ``points`` rows; the union of the selections is
+    returned so all channels keep their extremes on a common time axis.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Available: {', '.join(METHODS)}")
+    timestamps = data['timestamp']
+    if len(timestamps) <= points:
+        return data
+
+    selections = []
+    for key, values in data.items():
+        if key == 'timestamp':
+            continue
+        if method == 'lttb':
+            selections.append(lttb_indices(timestamps, values, points))
+        else:
+            selections.append(minmax_indices(values, points))
+    if not selections:
+        selections.append(np.linspace(0, len(timestamps) - 1, points).astype(np.int64))
+    rows = np.unique(np.concatenate(selections))
+    return {key: values[rows] for key, values in data.items()}
@@ -0,0 +1,388 @@
+"""
+QuantumMeter Pro - Data Export
+Chunked exporters (CSV, JSON, Excel, Parquet, HDF5, Arrow IPC) for buffered or stored measurements
+"""
+
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union
+
+import numpy as np
+
+# Rows formatted per chunk; bounds export memory independently of the data size
+EXPORT_CHUNK_ROWS = 50000
+
+# Block size when streaming an exporter that needs a seekable file
+STREAM_BLOCK_BYTES = 1 << 20
+
+# Compression used by the binary formats
+COMPRESSION = 'zstd'
+HDF5_COMPRESSION = 'gzip'
+
+# Data rows per Excel sheet (the format's limit is 1,048,576 rows, header included)
+EXCEL_SHEET_ROWS = 1_048_575
+
+# Binary file objects an exporter writes to: real files or the streaming sink
+FileObject = Union[IO[bytes], io.RawIOBase]
+
+
+def format_csv(data: Dict[str, np.ndarray], columns: Sequence[str]) -> str:
+    """Format a block of columns as CSV rows (without header)
+
+    Each column is converted to text in one vectorized call: ISO-8601
+    timestamps (microseconds) and shortest round-trip floats, NaN as empty.
+    """
+    fields = []
+    for key in columns:
+        values = data[key]
+        if key == 'timestamp':
+            text = np.datetime_as_string(values, unit='us')
+        else:
+            text = values.astype(str)
+            text[np.isnan(values)] = ''
+        fields.append(text.tolist())
+    if not fields or not fields[0]:
+        return ''
+    return '\n'.join(map(','.join, zip(*fields))) + '\n'
+
+
+class Exporter:
+    """Write measurement chunks to a binary file object in one format
+
+    Timestamps are datetime64[ns], every other column float64. Subclasses
+    implement ``_write`` and ``close``; ``seekable`` ones (HDF5) need a real
+    file and cannot be streamed while they are written.
+    """
+    extension = ''
+    mimetype = 'application/octet-stream'
+    requires: Sequence[str] = ()
+    seekable = False
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        self.fh = fh
+        self.columns = tuple(columns)
+        self.rows = 0
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the optional dependencies of the format are installed"""
+        return all(importlib.util.find_spec(name) is not None for name in cls.requires)
+
+    def write(self, chunk: Dict[str, np.ndarray]) -> None:
+        """Append one chunk of columns"""
+        if len(chunk['timestamp']):
+            self._write(chunk)
+            self.rows += len(chunk['timestamp'])
+
+    def close(self) -> None:
+        """Finish the file (footers, indexes); does not close ``fh``"""
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        raise NotImplementedError
+
+
+class CsvExporter(Exporter):
+    """Comma-separated text with a header row"""
+    extension = 'csv'
+    mimetype = 'text/csv'
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        fh.write((','.join(self.columns) + '\n').encode())
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        self.fh.write(format_csv(chunk, self.columns).encode())
+
+
+class JsonExporter(Exporter):
+    """JSON array with one object per row; ISO-8601 timestamps, NaN as null"""
+    extension = 'json'
+    mimetype = 'application/json'
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        self._template = '{' + ', '.join(f'{json.dumps(name)}: %s' for name in self.columns) + '}'
+        fh.write(b'[')
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        fields = []
+        for key in self.columns:
+            values = chunk[key]
+            if key == 'timestamp':
+                text = np.char.add(np.char.add('"', np.datetime_as_string(values, unit='us')), '"')
+            else:
+                text = values.astype(str)
+                text[~np.isfinite(values)] = 'null'
+            fields.append(text.tolist())
+        rows = ',\n'.join(self._template % row for row in zip(*fields))
+        self.fh.write(((',\n' if self.rows else '\n') + rows).encode())
+
+    def close(self) -> None:
+        self.fh.write(b'\n]\n')
+
+
+class ExcelExporter(Exporter):
+    """Excel workbook, continued on a new sheet every ``EXCEL_SHEET_ROWS`` rows"""
+    extension = 'xlsx'
+    mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    requires = ('openpyxl',)
+    seekable = True
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        import openpyxl
+
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheet: Any = None
+        self._sheet_rows = 0
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        fields = []
+        for key in self.columns:
+            values = chunk[key]
+            if key == 'timestamp':
+                fields.append(values.astype('datetime64[us]').tolist())
+            else:
+                cells = values.astype(object)
+                cells[~np.isfinite(values)] = None
+                fields.append(cells.tolist())
+        for row in zip(*fields):
+            if self._sheet is None or self._sheet_rows == EXCEL_SHEET_ROWS:
+                self._add_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+
+    def close(self) -> None:
+        if self._sheet is None:
+            self._add_sheet()
+        self._workbook.save(self.fh)
+
+    def _add_sheet(self) -> None:
+        count = len(self._workbook.sheetnames)
+        self._sheet = self._workbook.create_sheet('Measurements' + (f' {count + 1}' if count else ''))
+        self._sheet.append(list(self.columns))
+        self._sheet_rows = 0
+
+
+class _ArrowExporter(Exporter):
+    """Shared schema handling of the pyarrow based formats"""
+    requires = ('pyarrow',)
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        import pyarrow as pa
+
+        self._pa = pa
+        self.schema = pa.schema([(name, pa.timestamp('ns') if name == 'timestamp' else pa.float64())
+                                 for name in self.columns])
+
+    def _table(self, chunk: Dict[str, np.ndarray]) -> Any:
+        return self._pa.Table.from_arrays([self._pa.array(chunk[name]) for name in self.columns],
+                                          schema=self.schema)
+
+
+class ParquetExporter(_ArrowExporter):
+    """Apache Parquet, zstd-compressed; one row group per chunk"""
+    extension = 'parquet'
+    mimetype = 'application/vnd.apache.parquet'
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(fh, self.schema, compression=COMPRESSION)
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        self._writer.write_table(self._table(chunk))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ArrowExporter(_ArrowExporter):
+    """Arrow IPC file (Feather v2), zstd-compressed record batches"""
+    extension = 'arrow'
+    mimetype = 'application/vnd.apache.arrow.file'
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        options = self._pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        self._writer = self._pa.ipc.new_file(fh, self.schema, options=options)
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        self._writer.write_table(self._table(chunk))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class Hdf5Exporter(Exporter):
+    """HDF5 with one chunked, compressed, resizable dataset per column
+
+    ``timestamp`` is stored as int64 nanoseconds since the epoch.
+    """
+    extension = 'h5'
+    mimetype = 'application/x-hdf5'
+    requires = ('h5py',)
+    seekable = True
+
+    def __init__(self, fh: FileObject, columns: Sequence[str]) -> None:
+        super().__init__(fh, columns)
+        import h5py
+
+        self._file = h5py.File(fh, 'w')
+        self._datasets: Dict[str, Any] = {}
+        for name in self.columns:
+            dtype = np.int64 if name == 'timestamp' else np.float64
+            self._datasets[name] = self._file.create_dataset(
+                name, shape=(0,), maxshape=(None,), dtype=dtype, chunks=(EXPORT_CHUNK_ROWS,),
+                compression=HDF5_COMPRESSION, shuffle=True)
+        self._datasets['timestamp'].attrs['unit'] = 'ns since 1970-01-01T00:00:00'
+
+    def _write(self, chunk: Dict[str, np.ndarray]) -> None:
+        count = len(chunk['timestamp'])
+        for name, dataset in self._datasets.items():
+            values = chunk[name].view(np.int64) if name == 'timestamp' else chunk[name]
+            dataset.resize((self.rows + count,))
+            dataset[self.rows:] = values
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Exporters by format name, as listed in ``global_settings.export_formats``
+EXPORTERS: Dict[str, Type[Exporter]] = {
+    'csv': CsvExporter,
+    'json': JsonExporter,
+    'excel': ExcelExporter,
+    'parquet': ParquetExporter,
+    'hdf5': Hdf5Exporter,
+    'arrow': ArrowExporter,
+}
+
+
+def available_formats(formats: Optional[Iterable[str]] = None) -> List[str]:
+    """Return the given (default: all) formats that are implemented and installed"""
+    names = EXPORTERS if formats is None else formats
+    return [name for name in names if name in EXPORTERS and EXPORTERS[name].available()]
+
+
+def get_exporter(name: str) -> Type[Exporter]:
+    """Return the exporter class for a format name"""
+    if name not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{name}'. Available: {', '.join(EXPORTERS)}")
+    exporter = EXPORTERS[name]
+    if not exporter.available():
+        raise ImportError(f"Export format '{name}' requires {', '.join(exporter.requires)}")
+    return exporter
+
+
+def export_chunks(chunks: Iterable[Dict[str, np.ndarray]], path: Union[str, Path], name: str,
+                  columns: Sequence[str]) -> int:
+    """Write chunks to a file in the given format and return the number of rows"""
+    exporter_class = get_exporter(name)
+    with open(Path(path), 'wb') as fh:
+        exporter = exporter_class(fh, columns)
+        for chunk in chunks:
+            exporter.write(chunk)
+        exporter.close()
+    return exporter.rows
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every chunk"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        block = bytes(data)
+        self._parts.append(block)
+        self._position += len(block)
+        return len(block)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def stream_export(chunks: Iterable[Dict[str, np.ndarray]], name: str,
+                  columns: Sequence[str]) -> Iterator[bytes]:
+    """Yield the file contents in the given format while the chunks are written
+
+    Streamable formats hold at most one encoded chunk in memory; seekable ones
+    are written to a temporary file first and then streamed from it.
+    """
+    exporter_class = get_exporter(name)
+    if exporter_class.seekable:
+        with tempfile.TemporaryFile() as fh:
+            exporter = exporter_class(fh, columns)
+            for chunk in chunks:
+                exporter.write(chunk)
+            exporter.close()
+            fh.seek(0)
+            yield from iter(lambda: fh.read(STREAM_BLOCK_BYTES), b'')
+        return
+
+    sink = _StreamSink()
+    exporter = exporter_class(sink, columns)
+    for chunk in chunks:
+        exporter.write(chunk)
+        data = sink.drain()
+        if data:
+            yield data
+    exporter.close()
+    yield sink.drain()
+
+
+def benchmark_exports(rows: int = 1_000_000, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Compare file size and write throughput of every installed format
+
+    ``pandas`` is the previous export path (one DataFrame written with
+    ``to_csv``). Returns bytes, seconds and rows per second per format.
+    """
+    import pandas as pd
+
+    from .buffer import CHANNELS
+    from .simulator import MeasurementSimulator
+
+    data = MeasurementSimulator(seed=seed).block(rows, 1000.0, start='2026-01-01')
+    columns = ('timestamp',) + CHANNELS
+    chunks = [{key: values[i:i + EXPORT_CHUNK_ROWS] for key, values in data.items()}
+              for i in range(0, rows, EXPORT_CHUNK_ROWS)]
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        path = Path(directory) / 'pandas.csv'
+        pd.DataFrame({key: data[key] for key in columns}).to_csv(path, index=False)
+        results['pandas'] = {'bytes': path.stat().st_size, 'seconds': time.perf_counter() - started}
+        for name in available_formats():
+            path = Path(directory) / f'export.{EXPORTERS[name].extension}'
+            started = time.perf_counter()
+            export_chunks(chunks, path, name, columns)
+            results[name] = {'bytes': path.stat().st_size, 'seconds': time.perf_counter() - started}
+    for result in results.values():
+        result['rows_per_second'] = rows / result['seconds']
+    return results
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for name, result in benchmark_exports(count).items():
+        print(f"{name:>8}: {result['bytes'] / 1e6:8.1f} MB  {result['seconds']:6.2f} s  "
+              f"{result['rows_per_second']:12,.0f} rows/s")
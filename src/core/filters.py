@@ -0,0 +1,151 @@
+"""
+QuantumMeter Pro - Error Correction Filters
+Causal smoothing filters with streaming (block) and batch modes
+"""
+
+import copy
+import math
+from typing import Any, Dict, Optional, Type
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import ArrayLike
+
+
+class StreamingFilter:
+    """Base class for causal filters
+
+    ``process`` consumes consecutive blocks of a live stream and keeps the state
+    needed to continue seamlessly; ``apply`` runs the same filter over a whole
+    recorded array from a fresh state and returns identical results.
+    """
+
+    def reset(self) -> None:
+        """Forget the filter state"""
+        raise NotImplementedError
+
+    def process(self, values: ArrayLike) -> np.ndarray:
+        """Filter the next block of a stream"""
+        raise NotImplementedError
+
+    def apply(self, values: ArrayLike) -> np.ndarray:
+        """Filter a complete recording in one vectorized pass"""
+        fresh = copy.copy(self)
+        fresh.reset()
+        return fresh.process(values)
+
+
+class MovingAverageFilter(StreamingFilter):
+    """Causal moving average over the last ``window`` samples
+
+    Each output costs O(1): block sums come from a prefix sum over the carried
+    history plus the block (shifted by a reference value to preserve precision).
+    During warm-up the average covers the samples seen so far.
+    """
+
+    def __init__(self, window: int = 5) -> None:
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        self.window = int(window)
+        self.reset()
+
+    def reset(self) -> None:
+        self._history = np.empty(0, dtype=np.float64)
+
+    def process(self, values: ArrayLike) -> np.ndarray:
+        block: np.ndarray = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(block):
+            return np.array(block)
+
+        extended = np.concatenate((self._history, block))
+        reference = extended[0]
+        sums = np.concatenate(([0.0], np.cumsum(extended - reference)))
+
+        end = np.arange(len(self._history), len(extended)) + 1
+        start = np.maximum(end - self.window, 0)
+        counts = end - start
+        result: np.ndarray = (sums[end] - sums[start]) / counts + reference
+
+        self._history = extended[-(self.window - 1):] if self.window > 1 else extended[:0]
+        return result
+
+
+class ExponentialMovingAverage(StreamingFilter):
+    """Exponential moving average ``y[n] = y[n-1] + alpha * (x[n] - y[n-1])``
+
+    Blocks are evaluated in closed form (geometric weights and a cumulative sum)
+    in chunks short enough to keep the weights finite.
+    """
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+        self.alpha = float(alpha)
+        decay = -math.log1p(-alpha) if alpha < 1 else math.inf
+        self._chunk = max(1, int(200 / decay)) if decay != math.inf else 1 << 30
+        self.reset()
+
+    def reset(self) -> None:
+        self._state: Optional[float] = None
+
+    def process(self, values: ArrayLike) -> np.ndarray:
+        block: np.ndarray = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(block):
+            return np.array(block)
+        if self.alpha == 1:
+            self._state = float(block[-1])
+            return np.array(block)
+
+        result = np.empty_like(block)
+        state = float(block[0]) if self._state is None else self._state
+        for start in range(0, len(block), self._chunk):
+            chunk = block[start:start + self._chunk]
+            weights = (1 - self.alpha) ** np.arange(1, len(chunk) + 1)
+            filtered = weights * (state + self.alpha * np.cumsum(chunk / weights))
+            result[start:start + len(chunk)] = filtered
+            state = float(filtered[-1])
+        self._state = state
+        return result
+
+
+class MedianFilter(StreamingFilter):
+    """Causal running median over the last ``window`` samples (robust to spikes)"""
+
+    def __init__(self, window: int = 5) -> None:
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        self.window = int(window)
+        self.reset()
+
+    def reset(self) -> None:
+        # NaN padding makes warm-up outputs the median of the samples seen so far
+        self._history = np.full(self.window - 1, np.nan)
+
+    def process(self, values: ArrayLike) -> np.ndarray:
+        block: np.ndarray = np.asarray(values, dtype=np.float64).reshape(-1)
+        if not len(block):
+            return np.array(block)
+        extended = np.concatenate((self._history, block))
+        windows = sliding_window_view(extended, self.window)
+        result: np.ndarray
+        if np.isnan(self._history).any():
+            result = np.nanmedian(windows, axis=1)
+        else:
+            result = np.median(windows, axis=1)
+        self._history = extended[len(extended) - (self.window - 1):]
+        return result
+
+
+FILTERS: Dict[str, Type[StreamingFilter]] = {
+    'moving_average': MovingAverageFilter,
+    'ema': ExponentialMovingAverage,
+    'median': MedianFilter,
+}
+
+
+def create_filter(kind: str, **params: Any) -> StreamingFilter:
+    """Create a filter by name (see ``FILTERS``)"""
+    cls = FILTERS.get(kind)
+    if cls is None:
+        raise ValueError(f"Unknown filter '{kind}'. Available: {', '.join(FILTERS)}")
+    return cls(**params)
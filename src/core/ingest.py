@@ -0,0 +1,115 @@
+"""
+QuantumMeter Pro - Data Ingestion
+Chunked, vectorized CSV import into measurement buffers
+"""
+
+import importlib.util
+import io
+import os
+from typing import IO, Any, Dict, Iterable, Iterator, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .buffer import CHANNELS, MeasurementBuffer, to_datetime64
+
+# Rows (pandas) or bytes (pyarrow) parsed per chunk; bounds import memory
+# independently of the file size
+INGEST_CHUNK_ROWS = 100000
+INGEST_BLOCK_BYTES = 8 << 20
+
+# A CSV path or an open (binary or text) file object
+Source = Union[str, 'os.PathLike[str]', IO[Any]]
+
+
+def parse_timestamps(values: ArrayLike) -> np.ndarray:
+    """Parse an array of timestamp strings to datetime64[ns] in one vectorized call
+
+    ISO-8601 (``T`` or space separated) is parsed by NumPy; anything else is
+    handed to pandas.
+    """
+    try:
+        return to_datetime64(values)
+    except ValueError:
+        import pandas as pd
+
+        timestamps: np.ndarray = pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+        return timestamps
+
+
+def read_csv_chunks(source: Source, channels: Iterable[str] = CHANNELS,
+                    chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    """Parse a measurement CSV into column chunks
+
+    ``source`` is a path or an open file object such as an upload stream; it is
+    read incrementally, so memory stays bounded however large the file is. The
+    multithreaded pyarrow reader is used when installed (blocks of
+    ``INGEST_BLOCK_BYTES``), else pandas (``chunk_rows`` rows per chunk).
+    Channels missing from the file come back as NaN.
+    """
+    channels = tuple(channels)
+    if isinstance(source, io.TextIOBase) or importlib.util.find_spec('pyarrow') is None:
+        chunks = _pandas_chunks(source, channels, chunk_rows)
+    else:
+        chunks = _arrow_chunks(source, channels)
+    for chunk in chunks:
+        if chunk['timestamp'] is None:
+            raise ValueError("CSV file has no 'timestamp' column")
+        chunk['timestamp'] = parse_timestamps(chunk['timestamp'])
+        yield chunk
+
+
+def _arrow_chunks(source: Source, channels: Tuple[str, ...]) -> Iterator[Dict[str, Any]]:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    convert = pa_csv.ConvertOptions(
+        column_types={'timestamp': pa.string(), **{name: pa.float64() for name in channels}},
+        include_columns=['timestamp', *channels], include_missing_columns=True)
+    reader = pa_csv.open_csv(source, read_options=pa_csv.ReadOptions(block_size=INGEST_BLOCK_BYTES),
+                             convert_options=convert)
+    for batch in reader:
+        timestamps = batch.column(0)
+        chunk = {'timestamp': None if timestamps.null_count == len(batch)
+                 else timestamps.to_numpy(zero_copy_only=False)}
+        for index, name in enumerate(channels, 1):
+            chunk[name] = batch.column(index).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+        yield chunk
+
+
+def _pandas_chunks(source: Source, channels: Tuple[str, ...],
+                   chunk_rows: int) -> Iterator[Dict[str, Any]]:
+    import pandas as pd
+
+    wanted = {'timestamp', *channels}
+    # The default fast float parser may be off in the last digit; round_trip
+    # reads back exactly what export wrote, as the pyarrow reader does
+    reader = pd.read_csv(source, chunksize=chunk_rows, usecols=lambda name: name in wanted,
+                         dtype={name: np.float64 for name in channels}, float_precision='round_trip')
+    with reader:
+        for frame in reader:
+            chunk = {'timestamp': frame['timestamp'].to_numpy() if 'timestamp' in frame else None}
+            for name in channels:
+                chunk[name] = frame[name].to_numpy(dtype=np.float64) if name in frame else np.full(len(frame), np.nan)
+            yield chunk
+
+
+def load_csv(buffer: MeasurementBuffer, source: Source, clear: bool = True,
+             chunk_rows: int = INGEST_CHUNK_ROWS) -> Dict[str, object]:
+    """Stream a measurement CSV into ``buffer`` and summarize what was read
+
+    Returns the number of rows read and the first/last timestamp. A buffer
+    keeps only the newest ``capacity`` rows of files larger than that.
+    """
+    if clear:
+        buffer.clear()
+    rows, first, last = 0, None, None
+    for chunk in read_csv_chunks(source, buffer.channels, chunk_rows):
+        timestamps = chunk.pop('timestamp')
+        if not len(timestamps):
+            continue
+        buffer.extend(timestamps, **chunk)
+        rows += len(timestamps)
+        first = timestamps[0] if first is None else first
+        last = timestamps[-1]
+    return {'rows': rows, 'first': first, 'last': last}
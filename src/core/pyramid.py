@@ -0,0 +1,399 @@
+"""
+QuantumMeter Pro - Aggregate Pyramid
+Incrementally maintained min/max/mean/count buckets at several resolutions
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .buffer import CHANNELS, TIMESTAMP_DTYPE, to_datetime64
+from .downsample import DEFAULT_POINTS
+
+# Bucket widths (name, seconds), finest first; every width divides the next one
+LEVELS = (('1s', 1), ('10s', 10), ('1min', 60), ('10min', 600), ('1h', 3600))
+
+# Statistics returned per channel by ``query``
+STATISTICS = ('min', 'max', 'mean', 'count')
+
+# How the statistics of two buckets combine
+STAT_REDUCERS = {'count': np.add, 'sum': np.add, 'min': np.fmin, 'max': np.fmax}
+
+PYRAMID_FILE = 'pyramid.json'
+
+logger = logging.getLogger(__name__)
+
+
+def level_file(name: str) -> str:
+    """Return the file name of one level's bucket records"""
+    return f'{name}.bin'
+
+
+def bucket_dtype(channels: Iterable[str]) -> np.dtype:
+    """Record of one bucket: start (epoch ns) and count/sum/min/max per channel"""
+    fields = [('start', '<i8')]
+    for channel in channels:
+        fields += [(f'{channel}_count', '<i8'), (f'{channel}_sum', '<f8'),
+                   (f'{channel}_min', '<f8'), (f'{channel}_max', '<f8')]
+    return np.dtype(fields)
+
+
+class AggregatePyramid:
+    """Min/max/sum/count of every channel per time bucket at several widths
+
+    Samples are folded into the finest level as they arrive, and the new
+    buckets of each level are folded into the next coarser one, so an update
+    costs O(block) and never rescans history. A plot of any time range reads
+    the coarsest level that still gives about one bucket per pixel: zooming out
+    over months touches a few thousand records instead of the raw data.
+
+    With a ``root`` every level is a file of fixed-size records that is
+    memory-mapped for queries; only the newest (open) bucket of each level is
+    rewritten by ``flush``. Without one the levels are kept in memory.
+    ``readonly`` opens stored levels for queries only (e.g. while another
+    process writes them). Samples must arrive in time order: each block is
+    sorted, and samples older than the open (newest) bucket of the finest
+    level can no longer be placed, so they are dropped and counted in
+    ``rejected``.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None, channels: Iterable[str] = CHANNELS,
+                 levels: Sequence[Tuple[str, int]] = LEVELS, readonly: bool = False):
+        self.root = None if root is None else Path(root)
+        self.readonly = readonly
+        self.channels = tuple(channels)
+        self.levels = tuple((name, int(seconds)) for name, seconds in levels)
+        self.widths = [seconds * 10**9 for name, seconds in self.levels]
+        self.dtype = bucket_dtype(self.channels)
+
+        self._lock = threading.RLock()
+        # Per level: buckets not yet written, starting with the open (newest) bucket.
+        # Buckets are kept as a start array plus one (channel, bucket) array per statistic.
+        self._pending = [self._empty() for _ in self.levels]
+        # Per level: number of final buckets before the pending ones
+        self._closed = [0 for _ in self.levels]
+        self._memory: List[List[Dict[str, np.ndarray]]] = [[] for _ in self.levels]
+        self.rejected = 0
+        if self.root is not None:
+            self._open(self.root)
+
+    def __len__(self) -> int:
+        """Number of buckets in the finest level"""
+        return self._closed[0] + len(self._pending[0]['start'])
+
+    def update(self, timestamps: ArrayLike, **columns: Optional[ArrayLike]) -> None:
+        """Fold a block of samples into every level (samples before the open bucket are rejected)"""
+        ticks = to_datetime64(timestamps).view(np.int64)
+        if not len(ticks):
+            return
+        values = np.full((len(self.channels), len(ticks)), np.nan)
+        for row, name in enumerate(self.channels):
+            column = columns.get(name)
+            if column is not None:
+                values[row] = column
+        if (np.diff(ticks) < 0).any():
+            order = np.argsort(ticks, kind='stable')
+            ticks, values = ticks[order], values[:, order]
+
+        with self._lock:
+            newest = self._newest(0)
+            late = 0 if newest is None else int(np.searchsorted(ticks, newest, 'left'))
+            if late:
+                logger.warning('Dropping %d samples older than the newest %s bucket', late, self.levels[0][0])
+                self.rejected += late
+                ticks, values = ticks[late:], values[:, late:]
+                if not len(ticks):
+                    return
+            self._fold(ticks, values)
+
+    def build(self, chunks: Iterable[Dict[str, np.ndarray]]) -> int:
+        """Fold chunks of columns (oldest first) into the pyramid; returns the row count"""
+        rows = 0
+        for chunk in chunks:
+            self.update(chunk['timestamp'], **chunk)
+            rows += len(chunk['timestamp'])
+        self.flush()
+        return rows
+
+    def flush(self) -> None:
+        """Write the pending buckets; the open bucket of each level stays pending"""
+        with self._lock:
+            for level, (name, seconds) in enumerate(self.levels):
+                pending = self._pending[level]
+                count = len(pending['start'])
+                if not count:
+                    continue
+                if self.root is None:
+                    if count > 1:
+                        self._memory[level].append(self._slice(pending, slice(0, -1)))
+                else:
+                    with open(self.root / level_file(name), 'r+b') as fh:
+                        fh.seek(self._closed[level] * self.dtype.itemsize)
+                        fh.write(self._to_records(pending).tobytes())
+                self._closed[level] += count - 1
+                self._pending[level] = self._slice(pending, slice(-1, None))
+
+    def select_level(self, start: Any = None, end: Any = None, points: int = DEFAULT_POINTS) -> int:
+        """Index of the finest level with at most ``points`` buckets in the range"""
+        low, high = self._bounds(start, end)
+        for level, width in enumerate(self.widths):
+            if (high - low) // width < points:
+                return level
+        return len(self.levels) - 1
+
+    def query(self, start: Any = None, end: Any = None, points: int = DEFAULT_POINTS,
+              channels: Optional[Iterable[str]] = None, level: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return the buckets covering ``start <= timestamp <= end``
+
+        Columns are ``timestamp`` (bucket start) and ``<channel>_<statistic>``
+        for every statistic in ``STATISTICS``. The level defaults to
+        ``select_level``; if even the coarsest level has more than ``points``
+        buckets, adjacent buckets are merged.
+        """
+        channels = self.channels if channels is None else tuple(channels)
+        with self._lock:
+            if level is None:
+                level = self.select_level(start, end, points)
+            buckets = self._read(level, start, end)
+        count = len(buckets['start'])
+        if count > points:
+            group = -(-count // points)
+            buckets = self._aggregate(buckets['start'][np.arange(count) // group * group], buckets, 1, None)
+
+        data = {'timestamp': buckets['start'].view(TIMESTAMP_DTYPE)}
+        for name in channels:
+            row = self.channels.index(name)
+            count = buckets['count'][row]
+            data[f'{name}_min'] = buckets['min'][row]
+            data[f'{name}_max'] = buckets['max'][row]
+            data[f'{name}_mean'] = np.divide(buckets['sum'][row], count,
+                                             out=np.full(len(count), np.nan), where=count > 0)
+            data[f'{name}_count'] = count
+        return data
+
+    def clear(self) -> None:
+        """Drop every bucket"""
+        with self._lock:
+            self._pending = [self._empty() for _ in self.levels]
+            self._closed = [0 for _ in self.levels]
+            self._memory = [[] for _ in self.levels]
+            if self.root is not None:
+                for name, seconds in self.levels:
+                    os.truncate(self.root / level_file(name), 0)
+
+    def _fold(self, ticks: np.ndarray, values: np.ndarray) -> None:
+        finite = np.isfinite(values)
+        stats = {'count': finite.astype(np.int64), 'sum': np.where(finite, values, 0.0),
+                 'min': values, 'max': values}
+        for level, width in enumerate(self.widths):
+            buckets = self._aggregate(ticks, stats, width, self._newest(level))
+            self._merge(level, buckets)
+            ticks, stats = buckets['start'], buckets
+
+    def _open(self, root: Path) -> None:
+        """Load the open bucket of every level, repairing torn writes"""
+        meta = {'channels': list(self.channels), 'levels': [list(level) for level in self.levels]}
+        meta_path = root / PYRAMID_FILE
+        try:
+            current = json.loads(meta_path.read_text()) == meta
+        except (OSError, ValueError):
+            current = False
+        if self.readonly and not current:
+            raise ValueError(f'No aggregates for these channels and levels in {root}')
+        root.mkdir(parents=True, exist_ok=True)
+        for level, (name, seconds) in enumerate(self.levels):
+            path = root / level_file(name)
+            if self.readonly and not path.exists():
+                raise ValueError(f'Missing aggregate level {path}')
+            if not current or not path.exists():
+                # Aggregates are derived data: a layout change starts them over
+                path.write_bytes(b'')
+            rows = path.stat().st_size // self.dtype.itemsize
+            if not self.readonly:
+                os.truncate(path, rows * self.dtype.itemsize)
+            if rows:
+                newest = np.fromfile(path, dtype=self.dtype, count=1, offset=(rows - 1) * self.dtype.itemsize)
+                self._pending[level] = self._from_records(newest)
+                self._closed[level] = rows - 1
+        if not current:
+            meta_path.write_text(json.dumps(meta, indent=2))
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        buckets = {'start': np.empty(0, dtype=np.int64)}
+        for stat in STAT_REDUCERS:
+            buckets[stat] = np.empty((len(self.channels), 0), dtype=np.int64 if stat == 'count' else np.float64)
+        return buckets
+
+    def _newest(self, level: int) -> Optional[int]:
+        starts = self._pending[level]['start']
+        return int(starts[-1]) if len(starts) else None
+
+    def _merge(self, level: int, buckets: Dict[str, np.ndarray]) -> None:
+        pending = self._pending[level]
+        if len(pending['start']) and pending['start'][-1] == buckets['start'][0]:
+            # The block continues the open bucket
+            merged = {'start': buckets['start'][:1]}
+            for stat, reduce in STAT_REDUCERS.items():
+                merged[stat] = reduce(pending[stat][:, -1:], buckets[stat][:, :1])
+            parts = [self._slice(pending, slice(0, -1)), merged, self._slice(buckets, slice(1, None))]
+        else:
+            parts = [pending, buckets]
+        self._pending[level] = self._concat(parts)
+
+    @staticmethod
+    def _aggregate(ticks: np.ndarray, stats: Dict[str, np.ndarray], width: int,
+                   newest: Optional[int]) -> Dict[str, np.ndarray]:
+        """Reduce time-ordered columns of count/sum/min/max into buckets of ``width`` ns"""
+        starts = ticks - ticks % width
+        if newest is not None:
+            starts = np.maximum(starts, newest)
+        first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+        buckets = {'start': starts[first]}
+        for stat, reduce in STAT_REDUCERS.items():
+            buckets[stat] = reduce.reduceat(stats[stat], first, axis=1)
+        return buckets
+
+    @staticmethod
+    def _slice(buckets: Dict[str, np.ndarray], rows: slice) -> Dict[str, np.ndarray]:
+        return {stat: values[..., rows] for stat, values in buckets.items()}
+
+    def _concat(self, parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        parts = [part for part in parts if len(part['start'])]
+        if not parts:
+            return self._empty()
+        if len(parts) == 1:
+            return parts[0]
+        return {stat: np.concatenate([part[stat] for part in parts], axis=-1) for stat in parts[0]}
+
+    def _to_records(self, buckets: Dict[str, np.ndarray]) -> np.ndarray:
+        records = np.empty(len(buckets['start']), dtype=self.dtype)
+        records['start'] = buckets['start']
+        for row, name in enumerate(self.channels):
+            for stat in STAT_REDUCERS:
+                records[f'{name}_{stat}'] = buckets[stat][row]
+        return records
+
+    def _from_records(self, records: np.ndarray) -> Dict[str, np.ndarray]:
+        buckets = {'start': np.array(records['start'], dtype=np.int64)}
+        for stat in STAT_REDUCERS:
+            buckets[stat] = np.array([records[f'{name}_{stat}'] for name in self.channels]).reshape(
+                len(self.channels), len(records))
+        return buckets
+
+    def _bounds(self, start: Any, end: Any) -> Tuple[int, int]:
+        low = self._tick(start)
+        high = self._tick(end)
+        if low is None or high is None:
+            first, last = self._span()
+            low = first if low is None else low
+            high = last if high is None else high
+        return low, max(low, high)
+
+    def _span(self) -> Tuple[int, int]:
+        """First bucket start and the end of the newest bucket of the finest level"""
+        if not len(self):
+            return 0, 0
+        if self._closed[0]:
+            first = int(self._closed_starts(0)[0])
+        else:
+            first = int(self._pending[0]['start'][0])
+        # The open bucket of the finest level is always pending
+        return first, int(self._pending[0]['start'][-1]) + self.widths[0]
+
+    def _closed_starts(self, level: int) -> np.ndarray:
+        if self.root is None:
+            return self._closed_buckets(level)['start']
+        return self._records(level)['start']
+
+    def _closed_buckets(self, level: int) -> Dict[str, np.ndarray]:
+        """The final buckets of an in-memory level"""
+        if len(self._memory[level]) > 1:
+            self._memory[level] = [self._concat(self._memory[level])]
+        return self._memory[level][0] if self._memory[level] else self._empty()
+
+    def _records(self, level: int) -> np.ndarray:
+        """The final buckets of a stored level, memory-mapped"""
+        if not self._closed[level] or self.root is None:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.root / level_file(self.levels[level][0]), dtype=self.dtype, mode='r',
+                         shape=(self._closed[level],))
+
+    def _read(self, level: int, start: Any, end: Any) -> Dict[str, np.ndarray]:
+        low, high = self._tick(start), self._tick(end)
+        width = self.widths[level]
+
+        def rows(starts: np.ndarray) -> slice:
+            first = 0 if low is None else int(np.searchsorted(starts, low - low % width, 'left'))
+            last = len(starts) if high is None else int(np.searchsorted(starts, high, 'right'))
+            return slice(first, max(first, last))
+
+        if self.root is None:
+            closed = self._closed_buckets(level)
+            closed = self._slice(closed, rows(closed['start']))
+        else:
+            records = self._records(level)
+            closed = self._from_records(records[rows(records['start'])])
+        pending = self._pending[level]
+        return self._concat([closed, self._slice(pending, rows(pending['start']))])
+
+    @staticmethod
+    def _tick(value: Any) -> Optional[int]:
+        return None if value is None else int(np.datetime64(value, 'ns').astype(np.int64))
+
+
+def envelope(data: Dict[str, np.ndarray], channels: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Turn ``query`` buckets into plottable rows: each bucket's min, then its max
+
+    Both rows carry the bucket start, so a line through them draws the same
+    vertical strokes as min/max decimation of the raw data.
+    """
+    rows = {'timestamp': data['timestamp'].repeat(2)}
+    for name in channels:
+        rows[name] = np.stack((data[f'{name}_min'], data[f'{name}_max']), axis=1).reshape(-1)
+    return rows
+
+
+def benchmark_pyramid(sampling_rate: float = 1000.0, hours: float = 24.0,
+                      block_interval: float = 1.0, seed: int = 0) -> Dict[str, float]:
+    """Time maintaining an in-memory pyramid and querying it over the whole range
+
+    Returns samples per second of ``update`` (plus ``flush``) and the time of a
+    repeated full-range query in seconds.
+    """
+    from .simulator import MeasurementSimulator
+
+    simulator = MeasurementSimulator(seed=seed)
+    pyramid = AggregatePyramid()
+    block = int(sampling_rate * block_interval)
+    blocks = int(hours * 3600 / block_interval)
+    start = np.datetime64('2026-01-01', 'ns')
+
+    elapsed = 0.0
+    for index in range(blocks):
+        data = simulator.block(block, sampling_rate, start=start + np.timedelta64(int(index * block_interval * 1e9), 'ns'))
+        started = time.perf_counter()
+        pyramid.update(data.pop('timestamp'), **data)
+        pyramid.flush()
+        elapsed += time.perf_counter() - started
+
+    pyramid.query(points=DEFAULT_POINTS)
+    started = time.perf_counter()
+    pyramid.query(points=DEFAULT_POINTS)
+    query_seconds = time.perf_counter() - started
+    return {'samples_per_second': block * blocks / elapsed, 'query_seconds': query_seconds}
+
+
+if __name__ == '__main__':
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 1000.0
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24.0
+    result = benchmark_pyramid(rate, hours, block_interval=0.1)
+    print(f"update: {result['samples_per_second']:,.0f} samples/s  "
+          f"query: {result['query_seconds'] * 1000:.2f} ms")
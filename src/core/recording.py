@@ -0,0 +1,292 @@
+"""
+QuantumMeter Pro - Recordings
+Read-only, memory-mapped access to recorded runs of any size
+"""
+
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .buffer import CHANNELS, TIMESTAMP_DTYPE
+from .downsample import DEFAULT_POINTS, downsample_columns
+from .pyramid import PYRAMID_FILE, AggregatePyramid, envelope
+from .storage import INDEX_FILE, PYRAMID_DIRECTORY, TIMESTAMP_FILE, column_file
+
+NPY_TIMESTAMP_FILE = 'timestamp.npy'
+
+# Rows sampled per output point when a plotted range is too long to read fully
+OVERVIEW_OVERSAMPLING = 4
+
+
+class Recording:
+    """Memory-mapped, time-ordered measurement columns on disk
+
+    A recording is a sequence of parts (e.g. the segments of a store), each a
+    dict of equally long columns with a ``timestamp`` column. Nothing is read
+    when it is opened: rows are paged in by the OS only when ``rows``,
+    ``between`` or ``overview`` touch them, so runs far larger than RAM open
+    instantly. Parts must be sorted and must not overlap in time.
+
+    Supported layouts (see ``open``): a segment store directory, a directory
+    of raw ``timestamp.i8``/``<channel>.f8`` column files, a directory of
+    ``.npy`` column files, or one structured ``.npy`` file. A store's
+    aggregate pyramid, if present, serves overviews of long ranges.
+    """
+
+    def __init__(self, parts: List[Dict[str, np.ndarray]], channels: Iterable[str],
+                 source: Optional[Path] = None, bounds: Optional[List[Tuple[Any, Any]]] = None,
+                 pyramid: Optional[AggregatePyramid] = None) -> None:
+        if bounds is None:
+            bounds = [(part['timestamp'][0], part['timestamp'][-1]) if len(part['timestamp']) else (None, None)
+                      for part in parts]
+        kept = [index for index, part in enumerate(parts) if len(part['timestamp'])]
+        self.parts = [parts[index] for index in kept]
+        self.channels = tuple(channels)
+        self.source = source
+        self.pyramid = pyramid
+        self.offsets = np.cumsum([0] + [len(part['timestamp']) for part in self.parts])
+        # First and last timestamp of every part, for locating times without touching the data
+        self._starts = np.array([bounds[index][0] for index in kept], dtype=TIMESTAMP_DTYPE)
+        self._ends = np.array([bounds[index][1] for index in kept], dtype=TIMESTAMP_DTYPE)
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> 'Recording':
+        """Open a recording from a directory or file
+
+        Selecting a store's ``index.json`` or a ``timestamp.i8``/``timestamp.npy``
+        file opens the directory containing it.
+        """
+        path = Path(path)
+        if path.is_file() and path.name in (INDEX_FILE, TIMESTAMP_FILE, NPY_TIMESTAMP_FILE):
+            path = path.parent
+        if path.is_dir():
+            if (path / INDEX_FILE).exists():
+                return cls._open_store(path)
+            if (path / NPY_TIMESTAMP_FILE).exists():
+                return cls._open_npy_columns(path)
+            if (path / TIMESTAMP_FILE).exists():
+                return cls._open_raw_columns(path)
+            raise ValueError(f'No recording found in {path}')
+        if path.suffix == '.npy':
+            return cls._open_npy_records(path)
+        raise ValueError(f'Unsupported recording: {path}')
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def start(self) -> Optional[np.datetime64]:
+        return self._starts[0] if len(self.parts) else None
+
+    @property
+    def end(self) -> Optional[np.datetime64]:
+        return self._ends[-1] if len(self.parts) else None
+
+    def rows(self, first: int, last: int, channels: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Return copies of the rows with ``first <= index < last``"""
+        channels = self.channels if channels is None else tuple(channels)
+        first, last = max(0, int(first)), min(len(self), int(last))
+        pieces = []
+        if last > first:
+            for part_index in range(self._part_of(first), self._part_of(last - 1) + 1):
+                offset = self.offsets[part_index]
+                low, high = max(first - offset, 0), min(last - offset, len(self.parts[part_index]['timestamp']))
+                pieces.append(self._slice(self.parts[part_index], slice(low, high), channels))
+        return self._concat(pieces, channels)
+
+    def take(self, indices: ArrayLike, channels: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Return the rows at sorted absolute ``indices``, reading only those rows"""
+        channels = self.channels if channels is None else tuple(channels)
+        positions = np.asarray(indices, dtype=np.int64)
+        parts = np.searchsorted(self.offsets, positions, 'right') - 1
+        pieces = []
+        for part_index in np.unique(parts):
+            local = positions[parts == part_index] - self.offsets[part_index]
+            pieces.append(self._slice(self.parts[part_index], local, channels))
+        return self._concat(pieces, channels)
+
+    def index_of(self, timestamp: Any, side: Literal['left', 'right'] = 'left') -> int:
+        """Absolute row index where ``timestamp`` would be inserted (like ``np.searchsorted``)"""
+        if not len(self.parts):
+            return 0
+        when = np.datetime64(timestamp, 'ns')
+        if side == 'left':
+            part_index = int(np.searchsorted(self._ends, when, 'left'))
+        else:
+            part_index = int(np.searchsorted(self._starts, when, 'right')) - 1
+        if part_index >= len(self.parts):
+            return len(self)
+        if part_index < 0:
+            return 0
+        timestamps = self.parts[part_index]['timestamp']
+        return int(self.offsets[part_index] + np.searchsorted(timestamps, when.astype(timestamps.dtype), side))
+
+    def between(self, start: Any = None, end: Any = None, channels: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Return copies of the rows with ``start <= timestamp <= end``"""
+        return self.rows(*self._range(start, end), channels)
+
+    def overview(self, start: Any = None, end: Any = None, points: int = DEFAULT_POINTS,
+                 channels: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Return about ``points`` min/max-decimated rows of a time range for plotting
+
+        Ranges of up to ``OVERVIEW_OVERSAMPLING * points`` rows are read in
+        full. Longer ones come from the aggregate pyramid when it has buckets
+        finer than a point, else they are sampled at evenly spaced rows first;
+        either way the cost depends on ``points`` and not on the length of the
+        range.
+        """
+        first, last = self._range(start, end)
+        budget = OVERVIEW_OVERSAMPLING * points
+        pyramid = self.pyramid
+        if last - first > budget and pyramid is not None and self._use_pyramid(pyramid, channels):
+            low = self._starts[0] if start is None else np.datetime64(start, 'ns')
+            high = self._ends[-1] if end is None else np.datetime64(end, 'ns')
+            level = pyramid.select_level(low, high, budget)
+            # Only when its buckets are at least as fine as the requested points
+            if np.timedelta64(high - low, 'ns') // np.timedelta64(pyramid.widths[level], 'ns') >= points // 2:
+                channels = self.channels if channels is None else tuple(channels)
+                stored = [name for name in channels if name in pyramid.channels]
+                data = envelope(pyramid.query(low, high, points // 2, stored, level), stored)
+                return {key: data.get(key, np.full(len(data['timestamp']), np.nan))
+                        for key in ('timestamp',) + channels}
+        if 0 < last - first and (last - first) * 8 <= budget * mmap.PAGESIZE:
+            # Dense enough that every page is touched anyway: read it ahead in bulk
+            self.prefetch(first, last, channels)
+        if last - first <= budget:
+            data = self.rows(first, last, channels)
+        else:
+            data = self.take(np.linspace(first, last - 1, budget).astype(np.int64), channels)
+        return downsample_columns(data, points)
+
+    def _range(self, start: Any, end: Any) -> Tuple[int, int]:
+        first = 0 if start is None else self.index_of(start, 'left')
+        last = len(self) if end is None else self.index_of(end, 'right')
+        return first, max(first, last)
+
+    def prefetch(self, first: int, last: int, channels: Optional[Iterable[str]] = None) -> None:
+        """Ask the kernel to read rows ``first:last`` ahead, for sequential scans"""
+        keys = ('timestamp',) + (self.channels if channels is None else tuple(channels))
+        for part_index in range(self._part_of(first), self._part_of(max(first, last - 1)) + 1):
+            part = self.parts[part_index]
+            offset = self.offsets[part_index]
+            low, high = max(first - offset, 0), min(last - offset, len(part['timestamp']))
+            for key in keys:
+                if key in part and high > low:
+                    prefetch(part[key], low, high)
+
+    def _use_pyramid(self, pyramid: AggregatePyramid, channels: Optional[Iterable[str]]) -> bool:
+        # Channels the recording lacks are NaN either way; the others must be aggregated
+        wanted = set(self.channels if channels is None else channels) & set(self.channels)
+        return wanted <= set(pyramid.channels)
+
+    def _part_of(self, index: int) -> int:
+        return int(np.searchsorted(self.offsets, index, 'right')) - 1
+
+    @staticmethod
+    def _slice(part: Dict[str, np.ndarray], rows: Union[slice, np.ndarray],
+               channels: Iterable[str]) -> Dict[str, np.ndarray]:
+        data = {'timestamp': np.asarray(part['timestamp'][rows]).astype(TIMESTAMP_DTYPE)}
+        count = len(data['timestamp'])
+        for name in channels:
+            values = part.get(name)
+            data[name] = np.full(count, np.nan) if values is None else np.array(values[rows], dtype=np.float64)
+        return data
+
+    @staticmethod
+    def _concat(pieces: List[Dict[str, np.ndarray]], channels: Iterable[str]) -> Dict[str, np.ndarray]:
+        keys = ('timestamp',) + tuple(channels)
+        if not pieces:
+            return {key: np.empty(0, dtype=TIMESTAMP_DTYPE if key == 'timestamp' else np.float64)
+                    for key in keys}
+        if len(pieces) == 1:
+            return pieces[0]
+        return {key: np.concatenate([piece[key] for piece in pieces]) for key in keys}
+
+    @classmethod
+    def _open_store(cls, root: Path) -> 'Recording':
+        index = json.loads((root / INDEX_FILE).read_text())
+        channels = tuple(index.get('channels', CHANNELS))
+        entries = sorted(index['segments'], key=lambda entry: entry['start'])
+        parts = [cls._map_raw_columns(root / entry['name'], channels, entry['rows']) for entry in entries]
+        bounds = [(np.datetime64(entry['start'], 'ns'), np.datetime64(entry['end'], 'ns')) for entry in entries]
+        pyramid = None
+        if (root / PYRAMID_DIRECTORY / PYRAMID_FILE).exists():
+            try:
+                pyramid = AggregatePyramid(root / PYRAMID_DIRECTORY, channels, readonly=True)
+            except ValueError:
+                pyramid = None
+        return cls(parts, channels, root, bounds, pyramid)
+
+    @classmethod
+    def _open_raw_columns(cls, directory: Path) -> 'Recording':
+        names = {path.stem for path in directory.glob('*.f8')}
+        channels = tuple(name for name in CHANNELS if name in names) + tuple(sorted(names - set(CHANNELS)))
+        return cls([cls._map_raw_columns(directory, channels)], channels, directory)
+
+    @classmethod
+    def _open_npy_columns(cls, directory: Path) -> 'Recording':
+        columns = {path.stem: np.load(path, mmap_mode='r') for path in directory.glob('*.npy')}
+        timestamps = columns.pop('timestamp')
+        if not np.issubdtype(timestamps.dtype, np.datetime64):
+            # Integer timestamps are nanoseconds since the epoch
+            timestamps = timestamps.view(TIMESTAMP_DTYPE)
+        channels = tuple(name for name in CHANNELS if name in columns) + tuple(sorted(set(columns) - set(CHANNELS)))
+        rows = min(len(values) for values in [timestamps, *columns.values()])
+        part = {'timestamp': timestamps[:rows], **{name: columns[name][:rows] for name in channels}}
+        return cls([part], channels, directory)
+
+    @classmethod
+    def _open_npy_records(cls, path: Path) -> 'Recording':
+        records = np.load(path, mmap_mode='r')
+        if records.dtype.names is None or 'timestamp' not in records.dtype.names:
+            raise ValueError(f"{path} is not a structured array with a 'timestamp' field")
+        timestamps = records['timestamp']
+        if not np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.view(TIMESTAMP_DTYPE)
+        channels = tuple(name for name in records.dtype.names
+                         if name != 'timestamp' and np.issubdtype(records.dtype[name], np.floating))
+        return cls([{'timestamp': timestamps, **{name: records[name] for name in channels}}], channels, path)
+
+    @staticmethod
+    def _map_raw_columns(directory: Path, channels: Iterable[str], rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+        files = {'timestamp': directory / TIMESTAMP_FILE}
+        files.update((name, directory / column_file(name)) for name in channels)
+        available = min(path.stat().st_size // 8 for path in files.values() if path.exists())
+        rows = available if rows is None else min(rows, available)
+        part: Dict[str, np.ndarray] = {}
+        for name, path in files.items():
+            if path.exists() and rows:
+                part[name] = map_column(path, '<i8' if name == 'timestamp' else '<f8', rows)
+        part['timestamp'] = part['timestamp'].view(TIMESTAMP_DTYPE) if rows else np.empty(0, TIMESTAMP_DTYPE)
+        return part
+
+
+def map_column(path: Path, dtype: str, rows: int) -> np.ndarray:
+    """Memory-map the first ``rows`` values of a raw column file read-only
+
+    Reads of a recording are sparse (sampled overviews, table pages), so the
+    kernel is told not to read ahead around every touched page.
+    """
+    with open(path, 'rb') as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_RANDOM'):
+        mapped.madvise(mmap.MADV_RANDOM)
+    return np.frombuffer(mapped, dtype=dtype, count=rows)
+
+
+def prefetch(values: np.ndarray, low: int, high: int) -> None:
+    """Ask the kernel to read rows ``low:high`` of a memory-mapped column ahead"""
+    mapped: Any = values
+    while mapped is not None and not isinstance(mapped, mmap.mmap):
+        mapped = mapped.obj if isinstance(mapped, memoryview) else getattr(mapped, 'base', None)
+    if mapped is None or not hasattr(mmap, 'MADV_WILLNEED'):
+        return
+    origin = np.frombuffer(mapped, dtype=np.uint8, count=1).__array_interface__['data'][0]
+    start = values[low:high].__array_interface__['data'][0] - origin
+    aligned = start // mmap.PAGESIZE * mmap.PAGESIZE
+    length = min(start - aligned + (high - low) * values.strides[0], len(mapped) - aligned)
+    mapped.madvise(mmap.MADV_WILLNEED, aligned, length)
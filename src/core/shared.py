@@ -0,0 +1,278 @@
+"""
+QuantumMeter Pro - Shared Measurement Buffer
+Ring buffer in ``multiprocessing.shared_memory`` for the process-split acquisition mode
+"""
+
+import asyncio
+import gc
+import json
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .buffer import CHANNELS, DEFAULT_CAPACITY, TIMESTAMP_DTYPE, MeasurementBuffer
+from .stats import MeasurementStatistics
+
+# Control block, metadata and last error message precede the statistics and columns
+HEADER_BYTES = 4096
+META_OFFSET = 256
+ERROR_OFFSET = 2048
+
+# int64 control cells: header version, two (total, cleared_at) header slots,
+# reserved index, write sequence, error count/length, missed deadlines, meta length
+VERSION, HEADER_SLOTS, RESERVED, SEQ, ERRORS, ERROR_LENGTH, MISSED, META_LENGTH = 0, 1, 5, 6, 7, 8, 9, 10
+CONTROL_CELLS = 16
+
+# Per-channel statistics: count, mean, m2, min, max, outliers
+STAT_FIELDS = 6
+
+# Segments created by this process, whose tracker registration belongs to the creator
+_created: Set[str] = set()
+
+
+def _mapping(memory: shared_memory.SharedMemory) -> memoryview:
+    """The bytes of a mapped segment"""
+    if memory.buf is None:
+        raise ValueError(f"shared buffer '{memory.name}' is closed")
+    return memory.buf
+
+
+class SharedMeasurementBuffer(MeasurementBuffer):
+    """MeasurementBuffer whose header, statistics and columns live in shared memory
+
+    One process creates the segment (``create``), others map it by name
+    (``attach``) and read the columns through the usual zero-copy views. The
+    ``(total, cleared_at)`` header is double-buffered: a writer fills the
+    inactive slot and then bumps a version cell, so readers in any process see
+    one consistent version; the reserved index and write sequence are shared
+    too, which keeps ``copy=True`` reads and ``read_consistent`` valid across
+    processes. ``stats`` is rebuilt from the shared statistics on each access.
+
+    Only one process may write at a time (the write lock is per process).
+    Handles attached with ``writable=False`` raise on writes. The acquisition
+    process also publishes its missed deadlines and last error here. The
+    creator calls ``unlink`` once no other process needs to attach; every
+    handle calls ``close`` when done.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool, writable: bool) -> None:
+        self._memory = memory
+        self._owner = owner
+        self._writable = writable
+        self._closed = False
+        buf = _mapping(memory)
+        self._control = np.ndarray(CONTROL_CELLS, dtype=np.int64, buffer=buf)
+        meta = json.loads(bytes(buf[META_OFFSET:META_OFFSET + int(self._control[META_LENGTH])]))
+        self.capacity = int(meta['capacity'])
+        self.channels = tuple(meta['channels'])
+
+        offset = HEADER_BYTES
+        self._stats = np.ndarray((len(self.channels), STAT_FIELDS), dtype=np.float64,
+                                 buffer=buf, offset=offset)
+        offset += self._stats.nbytes
+        self._timestamps = np.ndarray(2 * self.capacity, dtype=TIMESTAMP_DTYPE, buffer=buf, offset=offset)
+        offset += self._timestamps.nbytes
+        self._columns = {}
+        for name in self.channels:
+            self._columns[name] = np.ndarray(2 * self.capacity, dtype=np.float64, buffer=buf, offset=offset)
+            offset += self._columns[name].nbytes
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, capacity: int = DEFAULT_CAPACITY, channels: Iterable[str] = CHANNELS,
+               name: Optional[str] = None) -> 'SharedMeasurementBuffer':
+        """Allocate a new shared buffer (the creator unlinks it with ``unlink``)"""
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        channels = tuple(channels)
+        meta = json.dumps({'capacity': int(capacity), 'channels': channels}).encode()
+        if len(meta) > ERROR_OFFSET - META_OFFSET:
+            raise ValueError('too many channels for a shared buffer')
+        size = HEADER_BYTES + 8 * (len(channels) * STAT_FIELDS + 2 * int(capacity) * (len(channels) + 1))
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        control = np.ndarray(CONTROL_CELLS, dtype=np.int64, buffer=_mapping(memory))
+        control[:] = 0
+        _mapping(memory)[META_OFFSET:META_OFFSET + len(meta)] = meta
+        control[META_LENGTH] = len(meta)
+        del control
+        buffer = cls(memory, owner=True, writable=True)
+        buffer._reset_stats()
+        _created.add(memory.name)
+        return buffer
+
+    @classmethod
+    def attach(cls, name: str, writable: bool = False) -> 'SharedMeasurementBuffer':
+        """Map an existing shared buffer by name"""
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name=name)
+            # Keep the resource tracker from unlinking a segment we do not own
+            if memory.name not in _created:
+                resource_tracker.unregister(getattr(memory, '_name'), 'shared_memory')
+        return cls(memory, owner=False, writable=writable)
+
+    @property
+    def name(self) -> str:
+        """Name passed to ``attach`` by other processes"""
+        return self._memory.name
+
+    @property
+    def stats(self) -> MeasurementStatistics:
+        """Statistics since the last clear (a snapshot; read via ``read_consistent``)"""
+        stats = MeasurementStatistics(self.channels)
+        for row, name in zip(self._stats, self.channels):
+            count, mean, m2, low, high, outliers = row.tolist()
+            channel = stats.channel_stats[name]
+            channel.count, channel.mean, channel.m2, channel.min, channel.max = int(count), mean, m2, low, high
+            stats.outliers[name] = int(outliers)
+        return stats
+
+    @stats.setter
+    def stats(self, stats: MeasurementStatistics) -> None:
+        for row, name in zip(self._stats, self.channels):
+            channel = stats.channel_stats[name]
+            row[:] = (channel.count, channel.mean, channel.m2, channel.min, channel.max, stats.outliers[name])
+
+    @property
+    def missed(self) -> int:
+        """Acquisition deadlines skipped by the writing process"""
+        return int(self._control[MISSED])
+
+    @missed.setter
+    def missed(self, value: int) -> None:
+        self._control[MISSED] = value
+
+    def report_error(self, message: str) -> None:
+        """Publish an error message to readers (see ``last_error``)"""
+        data = message.encode('utf-8', 'replace')[:HEADER_BYTES - ERROR_OFFSET]
+        _mapping(self._memory)[ERROR_OFFSET:ERROR_OFFSET + len(data)] = data
+        self._control[ERROR_LENGTH] = len(data)
+        self._control[ERRORS] += 1
+
+    def last_error(self) -> Tuple[int, str]:
+        """Return the number of reported errors and the most recent message"""
+        count = int(self._control[ERRORS])
+        length = int(self._control[ERROR_LENGTH])
+        return count, bytes(_mapping(self._memory)[ERROR_OFFSET:ERROR_OFFSET + length]).decode('utf-8', 'replace')
+
+    def close(self) -> None:
+        """Unmap the segment (views returned earlier must no longer be used)"""
+        if self._closed:
+            return
+        self._closed = True
+        del self._control, self._stats, self._timestamps
+        self._columns = {}
+        try:
+            self._memory.close()
+        except BufferError:
+            # Views handed out earlier still reference the mapping; it is released with them
+            pass
+
+    def unlink(self) -> None:
+        """Remove the segment's name (creator only); mapped handles keep working until closed"""
+        if self._owner:
+            self._owner = False
+            self._memory.unlink()
+            _created.discard(self._memory.name)
+
+    @property
+    def _header(self) -> Tuple[int, int]:
+        control = self._control
+        while True:
+            version = int(control[VERSION])
+            slot = HEADER_SLOTS + 2 * (version & 1)
+            header = (int(control[slot]), int(control[slot + 1]))
+            if int(control[VERSION]) == version:
+                return header
+
+    @_header.setter
+    def _header(self, header: Tuple[int, int]) -> None:
+        version = int(self._control[VERSION]) + 1
+        slot = HEADER_SLOTS + 2 * (version & 1)
+        self._control[slot:slot + 2] = header
+        self._control[VERSION] = version
+
+    @property
+    def _reserved(self) -> int:
+        return int(self._control[RESERVED])
+
+    @_reserved.setter
+    def _reserved(self, value: int) -> None:
+        self._control[RESERVED] = value
+
+    @property
+    def _seq(self) -> int:
+        return int(self._control[SEQ])
+
+    @_seq.setter
+    def _seq(self, value: int) -> None:
+        self._control[SEQ] = value
+
+    def _begin_write(self, count: int) -> Tuple[int, int]:
+        if not self._writable:
+            raise ValueError(f"shared buffer '{self.name}' is attached read-only")
+        return super()._begin_write(count)
+
+    def _update_stats(self, columns: Mapping[str, Optional[ArrayLike]]) -> None:
+        stats = self.stats
+        stats.update(columns)
+        self.stats = stats
+
+    def _reset_stats(self) -> None:
+        self._stats[:] = (0, 0.0, 0.0, np.inf, -np.inf, 0)
+
+
+def benchmark_acquisition(sampling_rate: float = 10000.0, seconds: float = 5.0,
+                          block_interval: float = 0.01, objects: int = 2000000) -> Dict[str, Dict[str, int]]:
+    """Compare thread and process acquisition while this process runs full garbage collections
+
+    A background thread keeps ``objects`` tuples alive and calls
+    ``gc.collect()`` in a loop, holding the GIL for long stretches the way
+    heavy analysis or request handling does. Returns, per mode, the samples
+    acquired and the deadlines missed.
+    """
+    from .acquisition import AcquisitionProcess, AcquisitionScheduler
+
+    device = {'simulation_device': {'connection': {'type': 'simulation'}, 'sampling_rate': sampling_rate}}
+    heap = [(index, str(index)) for index in range(objects)]
+    results: Dict[str, Dict[str, int]] = {}
+    for mode in ('thread', 'process'):
+        done = threading.Event()
+
+        def collect() -> None:
+            while not done.is_set():
+                gc.collect()
+
+        acquisition: Union[AcquisitionScheduler, AcquisitionProcess]
+        if mode == 'thread':
+            acquisition = AcquisitionScheduler(device, block_interval=block_interval)
+            worker = threading.Thread(target=asyncio.run, args=(acquisition.run(),))
+        else:
+            acquisition = AcquisitionProcess(device, block_interval=block_interval)
+            worker = threading.Thread(target=acquisition.run)
+        worker.start()
+        time.sleep(1.0)  # let the process start before loading it
+        collector = threading.Thread(target=collect)
+        collector.start()
+        time.sleep(seconds)
+        done.set()
+        collector.join()
+        acquisition.stop()
+        worker.join()
+        buffer = acquisition.buffers['simulation_device']
+        results[mode] = {'samples': buffer.total, 'missed': acquisition.missed['simulation_device']}
+    del heap
+    return results
+
+
+if __name__ == '__main__':
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 10000.0
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    for mode, result in benchmark_acquisition(rate, seconds).items():
+        print(f"{mode}: {result['samples']:,} samples  {result['missed']:,} missed deadlines")
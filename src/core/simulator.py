@@ -0,0 +1,180 @@
+"""
+QuantumMeter Pro - Measurement Simulator
+Seedable, vectorized generator of quantum measurement blocks
+"""
+
+import datetime
+import sys
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Parameter sets; ``steady`` matches live acquisition, ``demo`` the start-up sample data
+PROFILES: Dict[str, Dict[str, float]] = {
+    'steady': {},
+    'demo': {
+        'current_noise': 0.02,
+        'current_trend': 0.1,
+        'trend_period': 10 * np.pi,
+        'voltage_coupling': 1e6,
+        'temperature_noise': 0.05,
+        'temperature_swing': 0.1,
+        'temperature_period': 20 * np.pi,
+    },
+}
+
+DEFAULTS: Dict[str, float] = {
+    'current': 1e-9,            # base current (A)
+    'current_noise': 0.01,      # relative standard deviation
+    'current_trend': 0.0,       # relative amplitude of a sinusoidal trend
+    'trend_period': 60.0,       # (s)
+    'current_drift': 0.0,       # relative change per hour
+    'voltage': 1.0,             # (V)
+    'voltage_noise': 0.001,     # standard deviation (V)
+    'voltage_coupling': 0.0,    # volts per ampere of current deviation
+    'temperature': 23.0,        # (°C)
+    'temperature_noise': 0.1,   # standard deviation (°C)
+    'temperature_swing': 0.0,   # amplitude of a sinusoidal swing (°C)
+    'temperature_period': 600.0,  # (s)
+    'temperature_drift': 0.0,   # °C per hour
+    'anomaly_rate': 0.0,        # probability of a current spike per sample
+    'anomaly_scale': 10.0,      # spike height in current noise standard deviations
+}
+
+
+class MeasurementSimulator:
+    """Generate whole blocks of simulated measurements with one random draw
+
+    Current = base * (1 + trend + drift) plus gaussian noise and optional
+    spikes; voltage follows the current through ``voltage_coupling``;
+    temperature has its own swing, drift and noise; resistance is V / I.
+    Trend and drift are evaluated at the sample times relative to ``origin``
+    (the first timestamp seen unless given).
+
+    Each sample consumes four standard normals drawn row by row from one
+    ``np.random.Generator``, so a seeded simulator yields the same data no
+    matter how the samples are split into blocks.
+    """
+
+    def __init__(self, seed: Optional[int] = None, profile: str = 'steady',
+                 origin: Any = None, **params: float):
+        unknown = set(params) - set(DEFAULTS)
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Available: {', '.join(PROFILES)}")
+        if unknown:
+            raise ValueError(f"Unknown simulator parameters: {', '.join(sorted(unknown))}")
+        self.params = dict(DEFAULTS, **PROFILES[profile], **params)
+        self.rng = np.random.default_rng(seed)
+        self.origin = None if origin is None else np.datetime64(origin, 'ns')
+        self.samples = 0
+        self._block_start: Optional[np.datetime64] = None
+        self._next_index = 0
+
+        rate = self.params['anomaly_rate']
+        self._anomaly_threshold = NormalDist().inv_cdf(1 - rate) if 0 < rate < 1 else None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'MeasurementSimulator':
+        """Create a simulator from a device's ``simulation`` section"""
+        options = dict(config or {})
+        return cls(seed=options.pop('seed', None), profile=options.pop('profile', 'steady'), **options)
+
+    def generate(self, timestamps: ArrayLike) -> Dict[str, np.ndarray]:
+        """Return current, voltage, resistance and temperature for each timestamp"""
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]').reshape(-1)
+        count = len(timestamps)
+        if self.origin is None and count:
+            self.origin = timestamps[0]
+        p = self.params
+
+        hours: Union[float, np.ndarray] = 0.0
+        seconds = np.zeros(count)
+        if count:
+            seconds = (timestamps - self.origin).astype(np.int64) / 1e9
+            hours = seconds / 3600
+
+        # One draw per block: noise for current, voltage, temperature and the anomaly trigger
+        z_current, z_voltage, z_temperature, z_anomaly = self.rng.standard_normal((count, 4)).T
+        self.samples += count
+
+        base = p['current'] * (1 + p['current_drift'] * hours)
+        if p['current_trend']:
+            base = base * (1 + p['current_trend'] * np.sin(2 * np.pi * seconds / p['trend_period']))
+        noise_std = p['current'] * p['current_noise']
+        current = base + noise_std * z_current
+        if self._anomaly_threshold is not None:
+            spikes = z_anomaly > self._anomaly_threshold
+            current[spikes] += np.copysign(p['anomaly_scale'] * noise_std, z_current[spikes])
+
+        voltage = (p['voltage'] + p['voltage_noise'] * z_voltage
+                   + p['voltage_coupling'] * (current - p['current']))
+        temperature = p['temperature'] + p['temperature_drift'] * hours + p['temperature_noise'] * z_temperature
+        if p['temperature_swing']:
+            temperature = temperature + p['temperature_swing'] * np.sin(2 * np.pi * seconds / p['temperature_period'])
+
+        resistance = np.divide(voltage, current, out=np.full(count, 1e12), where=current != 0)
+        return {
+            'current': current,
+            'voltage': voltage,
+            'resistance': resistance,
+            'temperature': temperature,
+        }
+
+    def block(self, count: int, sampling_rate: float, start: Any = None) -> Dict[str, np.ndarray]:
+        """Return the next ``count`` samples at ``sampling_rate`` Hz, timestamps included
+
+        Consecutive blocks continue where the previous one ended; ``start`` sets
+        the first timestamp (default: ``origin``, else now).
+        """
+        if start is None and self._block_start is not None:
+            block_start = self._block_start
+        else:
+            if start is None:
+                start = self.origin if self.origin is not None else datetime.datetime.now()
+            block_start = self._block_start = np.datetime64(start, 'ns')
+            self._next_index = 0
+        indices = np.arange(self._next_index, self._next_index + count)
+        self._next_index += count
+        timestamps = block_start + (indices * (1e9 / sampling_rate)).astype('timedelta64[ns]')
+        return dict(self.generate(timestamps), timestamp=timestamps)
+
+
+def benchmark_ingest(sampling_rate: float = 1e6, seconds: float = 10.0,
+                     block_interval: float = 0.1, seed: int = 0) -> Dict[str, float]:
+    """Generate ``seconds`` of data at ``sampling_rate`` and ingest it into a buffer
+
+    Returns generation and ingest throughput in samples per second, to
+    load-test the pipeline far beyond real acquisition rates.
+    """
+    from .buffer import MeasurementBuffer
+
+    simulator = MeasurementSimulator(seed=seed, anomaly_rate=1e-4)
+    size = max(1, int(sampling_rate * block_interval))
+    blocks = max(1, int(seconds / block_interval))
+    buffer = MeasurementBuffer(capacity=max(size, int(sampling_rate * 60)))
+    generate = ingest = 0.0
+    for _ in range(blocks):
+        started = time.perf_counter()
+        block = simulator.block(size, sampling_rate)
+        generated = time.perf_counter()
+        buffer.extend(block.pop('timestamp'), **block)
+        generate += generated - started
+        ingest += time.perf_counter() - generated
+    total = size * blocks
+    return {
+        'samples': total,
+        'generate_rate': total / generate,
+        'ingest_rate': total / ingest,
+        'realtime_factor': seconds / (generate + ingest),
+    }
+
+
+if __name__ == '__main__':
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 1e6
+    result = benchmark_ingest(rate)
+    print(f"{result['samples']:,} samples at {rate:,.0f} Hz: "
+          f"generate {result['generate_rate']:,.0f}/s, ingest {result['ingest_rate']:,.0f}/s, "
+          f"{result['realtime_factor']:.1f}x real time")
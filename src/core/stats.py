@@ -0,0 +1,282 @@
+"""
+QuantumMeter Pro - Streaming Statistics
+Constant-time running statistics for the AI analysis paths
+"""
+
+import math
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Samples required before a channel's statistics are considered meaningful
+MIN_SAMPLES = 10
+
+# Deviation (in standard deviations) flagged by the sigma outlier count
+SIGMA_THRESHOLD = 3.0
+
+
+def _as_values(values: ArrayLike) -> np.ndarray:
+    array = np.asarray(values, dtype=np.float64).reshape(-1)
+    finite: np.ndarray = array[~np.isnan(array)]
+    return finite
+
+
+class RunningStats:
+    """Mergeable count, mean, variance, min and max (Welford/Chan)"""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all samples"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: ArrayLike) -> None:
+        """Add a block of samples (NaNs are ignored)"""
+        values = _as_values(values)
+        if not len(values):
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(len(values), mean, m2, float(values.min()), float(values.max()))
+
+    def merge(self, other: 'RunningStats') -> None:
+        """Fold another accumulator into this one"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, like ``np.var``)"""
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation"""
+        return math.sqrt(self.variance) if self.count else math.nan
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the statistics in the shape used by the analysis endpoints"""
+        return {
+            'mean': self.mean if self.count else math.nan,
+            'std': self.std,
+            'min': self.min if self.count else math.nan,
+            'max': self.max if self.count else math.nan,
+            'count': self.count
+        }
+
+    def _combine(self, count: int, mean: float, m2: float, low: float, high: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+
+class TrendStats:
+    """Mergeable least-squares line through (time, value) pairs, for drift estimation
+
+    Keeps the means and centered co-moments of time and value, combined like
+    ``RunningStats``, so partial fits over separate chunks merge exactly.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all samples"""
+        self.count = 0
+        self.mean_time = 0.0
+        self.mean_value = 0.0
+        self.m2_time = 0.0
+        self.comoment = 0.0
+
+    def update(self, times: ArrayLike, values: ArrayLike) -> None:
+        """Add samples given as times (e.g. seconds) and values (NaN values are ignored)"""
+        x = np.asarray(times, dtype=np.float64).reshape(-1)
+        y = np.asarray(values, dtype=np.float64).reshape(-1)
+        finite = ~np.isnan(y)
+        x, y = x[finite], y[finite]
+        if not len(y):
+            return
+        mean_time = float(x.mean())
+        mean_value = float(y.mean())
+        centered = x - mean_time
+        self._combine(len(y), mean_time, mean_value, float(np.square(centered).sum()),
+                      float((centered * (y - mean_value)).sum()))
+
+    def merge(self, other: 'TrendStats') -> None:
+        """Fold another fit into this one"""
+        if other.count:
+            self._combine(other.count, other.mean_time, other.mean_value, other.m2_time, other.comoment)
+
+    @property
+    def slope(self) -> float:
+        """Fitted change of the value per time unit (NaN without a time spread)"""
+        return self.comoment / self.m2_time if self.m2_time > 0 else math.nan
+
+    def _combine(self, count: int, mean_time: float, mean_value: float, m2_time: float, comoment: float) -> None:
+        total = self.count + count
+        delta_time = mean_time - self.mean_time
+        delta_value = mean_value - self.mean_value
+        weight = self.count * count / total
+        self.m2_time += m2_time + delta_time * delta_time * weight
+        self.comoment += comoment + delta_time * delta_value * weight
+        self.mean_time += delta_time * count / total
+        self.mean_value += delta_value * count / total
+        self.count = total
+
+
+class WindowedStats:
+    """Mean, variance, min and max over the most recent ``window`` samples
+
+    Sums are maintained incrementally around a fixed shift (the first value seen)
+    to limit cancellation, and recomputed exactly once per window of updates so
+    rounding errors cannot accumulate. Min/max are evaluated on demand.
+    """
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        self.window = int(window)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all samples"""
+        self._values = np.zeros(self.window, dtype=np.float64)
+        self._total = 0
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_resync = 0
+
+    @property
+    def count(self) -> int:
+        return min(self._total, self.window)
+
+    def update(self, values: ArrayLike) -> None:
+        """Add a block of samples (NaNs are ignored)"""
+        values = _as_values(values)
+        if not len(values):
+            return
+        if self._total == 0:
+            self._shift = float(values[0])
+        if len(values) >= self.window:
+            # Keep the ring layout: position p lives in slot p % window
+            positions = self._total + len(values) - self.window + np.arange(self.window)
+            self._values[positions % self.window] = values[-self.window:]
+            self._total += len(values)
+            self._resync()
+            return
+
+        positions = self._total + np.arange(len(values))
+        slots = positions % self.window
+        shifted = values - self._shift
+        evicted = np.where(positions >= self.window, self._values[slots] - self._shift, 0.0)
+        self._sum += float(shifted.sum() - evicted.sum())
+        self._sum_sq += float(np.square(shifted).sum() - np.square(evicted).sum())
+        self._values[slots] = values
+        self._total += len(values)
+
+        self._since_resync += len(values)
+        if self._since_resync >= self.window:
+            self._resync()
+
+    @property
+    def mean(self) -> float:
+        return self._shift + self._sum / self.count if self.count else math.nan
+
+    @property
+    def variance(self) -> float:
+        if not self.count:
+            return math.nan
+        mean = self._sum / self.count
+        return max(self._sum_sq / self.count - mean * mean, 0.0)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def min(self) -> float:
+        return float(self._window_values().min()) if self.count else math.nan
+
+    @property
+    def max(self) -> float:
+        return float(self._window_values().max()) if self.count else math.nan
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the statistics in the shape used by the analysis endpoints"""
+        return {'mean': self.mean, 'std': self.std, 'min': self.min,
+                'max': self.max, 'count': self.count}
+
+    def _window_values(self) -> np.ndarray:
+        return self._values[:self.count]
+
+    def _resync(self) -> None:
+        shifted = self._window_values() - self._shift
+        self._sum = float(shifted.sum())
+        self._sum_sq = float(np.square(shifted).sum())
+        self._since_resync = 0
+
+
+class MeasurementStatistics:
+    """Per-channel session statistics plus an incremental sigma outlier count
+
+    Each incoming block is tested against the statistics accumulated before it
+    (or, while fewer than ``MIN_SAMPLES`` samples exist, against the statistics
+    including it), so the outlier count never requires a rescan of the history.
+    """
+
+    def __init__(self, channels: Iterable[str], threshold: float = SIGMA_THRESHOLD):
+        self.channels = tuple(channels)
+        self.threshold = threshold
+        self.channel_stats = {name: RunningStats() for name in self.channels}
+        self.outliers = {name: 0 for name in self.channels}
+
+    def __getitem__(self, channel: str) -> RunningStats:
+        return self.channel_stats[channel]
+
+    @property
+    def count(self) -> int:
+        return max((stats.count for stats in self.channel_stats.values()), default=0)
+
+    def reset(self) -> None:
+        """Forget all samples"""
+        for name in self.channels:
+            self.channel_stats[name].reset()
+            self.outliers[name] = 0
+
+    def update(self, columns: Mapping[str, Optional[ArrayLike]]) -> None:
+        """Add a block of samples given as channel -> values"""
+        for name in self.channels:
+            column = columns.get(name)
+            if column is None:
+                continue
+            values = _as_values(column)
+            stats = self.channel_stats[name]
+            if stats.count >= MIN_SAMPLES:
+                self.outliers[name] += self._count_outliers(values, stats)
+                stats.update(values)
+            else:
+                stats.update(values)
+                self.outliers[name] += self._count_outliers(values, stats)
+
+    def summary(self, channels: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Return per-channel statistics and anomaly counts in O(1)"""
+        channels = self.channels if channels is None else tuple(channels)
+        result: Dict[str, Dict[str, Any]] = {name: self.channel_stats[name].as_dict() for name in channels}
+        result['anomalies'] = {f'{name}_anomalies': self.outliers[name] for name in channels}
+        return result
+
+    def _count_outliers(self, values: np.ndarray, stats: RunningStats) -> int:
+        if stats.count < MIN_SAMPLES or not len(values):
+            return 0
+        return int(np.count_nonzero(np.abs(values - stats.mean) > self.threshold * stats.std))
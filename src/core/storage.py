@@ -0,0 +1,357 @@
+"""
+QuantumMeter Pro - Measurement Storage
+Append-only, time-partitioned columnar segments on disk
+"""
+
+import datetime
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .buffer import CHANNELS, to_datetime64
+from .pyramid import AggregatePyramid
+
+# Length of one time partition (one segment directory per hour)
+SEGMENT_SECONDS = 3600
+
+# Pending samples are written out after this many seconds or rows
+FLUSH_INTERVAL = 1.0
+FLUSH_ROWS = 10000
+
+INDEX_FILE = 'index.json'
+TIMESTAMP_FILE = 'timestamp.i8'
+PYRAMID_DIRECTORY = 'pyramid'
+
+logger = logging.getLogger(__name__)
+
+
+def column_file(channel: str) -> str:
+    """Return the file name of a float64 channel column inside a segment"""
+    return f'{channel}.f8'
+
+
+class SegmentStore:
+    """Persist measurement samples into time-partitioned columnar segments
+
+    Layout::
+
+        <root>/index.json                  time range and row count per segment
+        <root>/<partition>/timestamp.i8    little-endian int64 epoch nanoseconds
+        <root>/<partition>/<channel>.f8    little-endian float64 values
+        <root>/pyramid/                    aggregates per time bucket (AggregatePyramid)
+
+    Columns are raw arrays appended in place, so a segment can be memory-mapped
+    directly. Rows that were only partly written before a crash are trimmed
+    when the store is opened. Retention drops whole segments; the aggregate
+    pyramid, updated on every flush, keeps the whole history.
+
+    Time must not go back: segments are searched by binary search and the
+    pyramid only extends its newest buckets. ``append`` sorts each block and
+    drops (and counts in ``rejected``) the rows older than the newest sample
+    already accepted, e.g. after the clock was set back.
+    """
+
+    def __init__(self, root: Union[str, Path], channels: Iterable[str] = CHANNELS,
+                 segment_seconds: int = SEGMENT_SECONDS,
+                 retention_days: Optional[float] = None,
+                 flush_interval: float = FLUSH_INTERVAL, flush_rows: int = FLUSH_ROWS,
+                 aggregates: bool = True) -> None:
+        self.root = Path(root)
+        self.channels = tuple(channels)
+        self.segment_ns = int(segment_seconds * 1e9)
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+
+        self._lock = threading.RLock()
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self.rejected = 0
+        self._rejecting = False
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index = self._scan()
+        # Newest accepted sample (epoch ns); older rows are rejected
+        self._newest = max((entry['end'] for entry in self._index.values()), default=None)
+        self._write_index()
+        self.enforce_retention()
+
+        self.pyramid: Optional[AggregatePyramid] = None
+        if aggregates:
+            self.pyramid = AggregatePyramid(self.root / PYRAMID_DIRECTORY, self.channels)
+            if not len(self.pyramid) and len(self):
+                # Stores written without aggregates are folded in once
+                self.pyramid.build(self.chunks(FLUSH_ROWS * 10))
+
+    def __len__(self) -> int:
+        return sum(entry['rows'] for entry in self._index.values())
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Return the index entries (name, start, end, rows) sorted by start time"""
+        with self._lock:
+            return sorted((dict(entry) for entry in self._index.values()),
+                          key=lambda entry: entry['start'])
+
+    def append(self, timestamps: ArrayLike, **columns: Optional[ArrayLike]) -> None:
+        """Queue a block of samples; flushes when the interval or row limit is reached
+
+        Rows older than the newest accepted sample are dropped (see ``rejected``).
+        """
+        ticks = to_datetime64(timestamps)
+        if not len(ticks):
+            return
+        block = {'timestamp': ticks}
+        for name in self.channels:
+            values = columns.get(name)
+            if values is None:
+                values = np.full(len(ticks), np.nan)
+            block[name] = np.array(values, dtype=np.float64).reshape(-1)
+
+        with self._lock:
+            block = self._in_order(block)
+            if not len(block['timestamp']):
+                return
+            self._pending.append(block)
+            self._pending_rows += len(block['timestamp'])
+            if (self._pending_rows >= self.flush_rows
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def flush(self) -> None:
+        """Write all pending samples to their segments"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            block = {key: np.concatenate([part[key] for part in self._pending])
+                     for key in self._pending[0]}
+            self._pending = []
+            self._pending_rows = 0
+
+            ticks = block['timestamp'].view(np.int64)
+            partitions = ticks // self.segment_ns
+            new_segment = False
+            for partition in np.unique(partitions):
+                rows = partitions == partition
+                new_segment |= self._write_rows(int(partition), {key: values[rows] for key, values in block.items()})
+            self._write_index()
+            if self.pyramid is not None:
+                self.pyramid.update(block.pop('timestamp'), **block)
+                self.pyramid.flush()
+            if new_segment:
+                self.enforce_retention()
+
+    def enforce_retention(self, now: Any = None) -> None:
+        """Delete segments whose newest sample is older than the retention period"""
+        if not self.retention_days:
+            return
+        now = np.datetime64(now or datetime.datetime.now(), 'ns')
+        cutoff = int((now - np.timedelta64(int(self.retention_days * 86400), 's')).astype(np.int64))
+        with self._lock:
+            expired = [name for name, entry in self._index.items() if entry['end'] < cutoff]
+            for name in expired:
+                shutil.rmtree(self.root / name, ignore_errors=True)
+                del self._index[name]
+            if expired:
+                self._write_index()
+
+    def read_segment(self, name: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+        """Return the columns of one segment (memory-mapped read-only by default)"""
+        with self._lock:
+            rows = self._index[name]['rows']
+        directory = self.root / name
+        data = {'timestamp': self._load(directory / TIMESTAMP_FILE, '<i8', rows, mmap).view('datetime64[ns]')}
+        for channel in self.channels:
+            data[channel] = self._load(directory / column_file(channel), '<f8', rows, mmap)
+        return data
+
+    def query(self, start: Any = None, end: Any = None, channels: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return the stored samples with ``start <= timestamp <= end``
+
+        Segments are selected from the index and each one is cut by binary search
+        over its memory-mapped timestamps, so only the requested rows are read.
+        ``limit`` keeps the most recent rows of the range.
+        """
+        self.flush()
+        channels = self.channels if channels is None else tuple(channels)
+        low, high = self._tick(start), self._tick(end)
+
+        parts = []
+        remaining = limit
+        for entry in reversed(self.segments()):
+            if remaining is not None and remaining <= 0:
+                break
+            if (low is not None and entry['end'] < low) or (high is not None and entry['start'] > high):
+                continue
+            data = self.read_segment(entry['name'])
+            ticks = data['timestamp'].view(np.int64)
+            first = 0 if low is None else int(np.searchsorted(ticks, low, 'left'))
+            last = len(ticks) if high is None else int(np.searchsorted(ticks, high, 'right'))
+            if remaining is not None:
+                first = max(first, last - remaining)
+                remaining -= max(0, last - first)
+            if last > first:
+                parts.append({key: np.array(data[key][first:last]) for key in ('timestamp',) + channels})
+        parts.reverse()
+        return self._concat(parts, channels)
+
+    def chunks(self, size: int, start: Any = None, end: Any = None,
+               channels: Optional[Iterable[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield the stored samples with ``start <= timestamp <= end``, oldest first
+
+        Rows are copied out of the memory-mapped segments ``size`` at a time,
+        so memory use stays constant however much is stored.
+        """
+        self.flush()
+        channels = self.channels if channels is None else tuple(channels)
+        low, high = self._tick(start), self._tick(end)
+        for entry in self.segments():
+            if (low is not None and entry['end'] < low) or (high is not None and entry['start'] > high):
+                continue
+            try:
+                data = self.read_segment(entry['name'])
+            except KeyError:
+                # Dropped by retention meanwhile
+                continue
+            ticks = data['timestamp'].view(np.int64)
+            first = 0 if low is None else int(np.searchsorted(ticks, low, 'left'))
+            last = len(ticks) if high is None else int(np.searchsorted(ticks, high, 'right'))
+            for row in range(first, last, int(size)):
+                stop = min(row + int(size), last)
+                yield {key: np.array(data[key][row:stop]) for key in ('timestamp',) + channels}
+
+    def tail(self, n: int) -> Dict[str, np.ndarray]:
+        """Return (copies of) the newest ``n`` stored samples, e.g. to replay at startup"""
+        self.flush()
+        parts = []
+        remaining = n
+        for entry in reversed(self.segments()):
+            if remaining <= 0:
+                break
+            data = self.read_segment(entry['name'])
+            take = min(remaining, entry['rows'])
+            parts.append({key: values[len(values) - take:] for key, values in data.items()})
+            remaining -= take
+        parts.reverse()
+        return self._concat(parts, self.channels)
+
+    def close(self) -> None:
+        """Flush pending samples"""
+        self.flush()
+
+    @staticmethod
+    def _tick(value: Any) -> Optional[int]:
+        return None if value is None else int(np.datetime64(value, 'ns').astype(np.int64))
+
+    @staticmethod
+    def _concat(parts: List[Dict[str, np.ndarray]], channels: Iterable[str]) -> Dict[str, np.ndarray]:
+        keys = ('timestamp',) + tuple(channels)
+        if not parts:
+            return {key: np.empty(0, dtype='datetime64[ns]' if key == 'timestamp' else np.float64)
+                    for key in keys}
+        return {key: np.concatenate([part[key] for part in parts]) for key in keys}
+
+    def _in_order(self, block: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Sort a block by time and drop the rows older than the newest accepted sample"""
+        ticks = block['timestamp'].view(np.int64)
+        if (np.diff(ticks) < 0).any():
+            order = np.argsort(ticks, kind='stable')
+            block = {key: values[order] for key, values in block.items()}
+            ticks = ticks[order]
+        late = 0 if self._newest is None else int(np.searchsorted(ticks, self._newest, 'left'))
+        if late:
+            self.rejected += late
+            if not self._rejecting:
+                logger.warning('Dropping samples older than the newest stored one (%s) in %s; '
+                               'the clock went back', np.datetime64(self._newest, 'ns'), self.root)
+            self._rejecting = True
+            block = {key: values[late:] for key, values in block.items()}
+            ticks = ticks[late:]
+        elif self._rejecting:
+            logger.info('Storing samples again in %s after dropping %d', self.root, self.rejected)
+            self._rejecting = False
+        if len(ticks):
+            self._newest = int(ticks[-1])
+        return block
+
+    def _write_rows(self, partition: int, block: Dict[str, np.ndarray]) -> bool:
+        start = np.datetime64(partition * self.segment_ns, 'ns')
+        name = np.datetime_as_string(start, unit='s').replace(':', '')
+        directory = self.root / name
+        created = name not in self._index
+        directory.mkdir(exist_ok=True)
+
+        with open(directory / TIMESTAMP_FILE, 'ab') as fh:
+            fh.write(block['timestamp'].view(np.int64).astype('<i8', copy=False).tobytes())
+        for channel in self.channels:
+            with open(directory / column_file(channel), 'ab') as fh:
+                fh.write(block[channel].astype('<f8', copy=False).tobytes())
+
+        ticks = block['timestamp'].view(np.int64)
+        entry = self._index.setdefault(name, {'name': name, 'start': int(ticks.min()),
+                                              'end': int(ticks.max()), 'rows': 0})
+        entry['start'] = min(entry['start'], int(ticks.min()))
+        entry['end'] = max(entry['end'], int(ticks.max()))
+        entry['rows'] += len(ticks)
+        return created
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        """Rebuild the index from the segment directories, repairing torn writes"""
+        known: Dict[str, Dict[str, Any]] = {}
+        index_path = self.root / INDEX_FILE
+        if index_path.exists():
+            try:
+                known = {entry['name']: entry for entry in json.loads(index_path.read_text())['segments']}
+            except (ValueError, KeyError):
+                known = {}
+
+        index: Dict[str, Dict[str, Any]] = {}
+        for directory in sorted(path for path in self.root.iterdir() if path.is_dir()):
+            files = [directory / TIMESTAMP_FILE] + [directory / column_file(c) for c in self.channels]
+            if not (directory / TIMESTAMP_FILE).exists():
+                continue
+            # A missing column (e.g. a channel added since) is restored as NaN, not a reason to drop rows
+            rows = min(path.stat().st_size // 8 for path in files if path.exists())
+            for path in files:
+                if not path.exists():
+                    with open(path, 'wb') as fh:
+                        fh.write(np.full(rows, np.nan, dtype='<f8').tobytes())
+                elif path.stat().st_size != rows * 8:
+                    os.truncate(path, rows * 8)
+            if not rows:
+                continue
+            entry = known.get(directory.name)
+            if entry is None or entry.get('rows') != rows:
+                # Only segments the index does not describe need a full scan
+                ticks = np.memmap(directory / TIMESTAMP_FILE, dtype='<i8', mode='r', shape=(rows,))
+                entry = {'name': directory.name, 'start': int(ticks.min()),
+                         'end': int(ticks.max()), 'rows': rows}
+            index[directory.name] = entry
+        return index
+
+    def _write_index(self) -> None:
+        path = self.root / INDEX_FILE
+        temp = path.with_suffix('.tmp')
+        temp.write_text(json.dumps({'channels': list(self.channels),
+                                    'segment_seconds': self.segment_ns / 1e9,
+                                    'segments': sorted(self._index.values(), key=lambda e: e['start'])},
+                                   indent=2))
+        os.replace(temp, path)
+
+    @staticmethod
+    def _load(path: Path, dtype: str, rows: int, mmap: bool) -> np.ndarray:
+        if not rows:
+            return np.empty(0, dtype=dtype)
+        if mmap:
+            return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+        return np.fromfile(path, dtype=dtype, count=rows)
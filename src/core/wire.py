@@ -0,0 +1,152 @@
+"""
+QuantumMeter Pro - Binary Wire Format
+Compact column encoding for the measurement API, decodable with JavaScript typed arrays
+"""
+
+import gzip
+import importlib.util
+import json
+import struct
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Media type of the binary format (clients ask for it in the Accept header)
+MIMETYPE = 'application/vnd.quantummeter.columns'
+
+MAGIC = b'QMC1'
+
+# Columns start at multiples of this, so clients can map them without copying
+ALIGNMENT = 8
+
+# Cheap compression levels; the payload is mostly noise-like floats
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 1
+
+# Column dtypes as named in the header
+DTYPES = {'float64': np.dtype('<f8'), 'int64': np.dtype('<i8'), 'datetime64[ns]': np.dtype('<i8')}
+
+
+def encode_columns(data: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None,
+                   delta: bool = False) -> bytes:
+    """Encode equal-length columns (and JSON-ready ``meta`` values) as one binary frame
+
+    Layout: ``MAGIC``, the header length as little-endian uint32 and a JSON
+    header (``rows``, ``columns`` with ``name``/``dtype``/``encoding``,
+    ``meta``) padded with spaces to ``ALIGNMENT``, followed by each column as
+    little-endian float64 or int64. Timestamps are int64 nanoseconds since
+    1970-01-01 of the stored (local, naive) wall-clock time, the same values
+    the JSON endpoints format as ISO-8601. With ``delta`` they are sent as the
+    first value followed by differences, which compress far better.
+    """
+    rows = len(next(iter(data.values()))) if data else 0
+    columns, bodies = [], []
+    for name, values in data.items():
+        values = np.asarray(values)
+        if len(values) != rows:
+            raise ValueError(f"column '{name}' has {len(values)} values, expected {rows}")
+        if values.dtype.kind == 'M':
+            dtype = 'datetime64[ns]'
+            values = values.astype('datetime64[ns]').view(np.int64)
+        elif values.dtype.kind in 'iub':
+            dtype = 'int64'
+        else:
+            dtype = 'float64'
+        encoding = 'plain'
+        if delta and dtype == 'datetime64[ns]':
+            encoding = 'delta'
+            values = np.diff(values, prepend=np.int64(0))
+        columns.append({'name': name, 'dtype': dtype, 'encoding': encoding})
+        bodies.append(np.ascontiguousarray(values, dtype=DTYPES[dtype]).tobytes())
+
+    header = json.dumps({'rows': rows, 'columns': columns, 'meta': meta or {}}).encode()
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % ALIGNMENT)
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header, *bodies])
+
+
+def decode_columns(payload: bytes) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Decode a frame written by ``encode_columns`` into columns and ``meta``"""
+    if payload[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a QuantumMeter column frame')
+    length, = struct.unpack_from('<I', payload, len(MAGIC))
+    offset = len(MAGIC) + 4
+    header = json.loads(payload[offset:offset + length])
+    offset += length
+    rows = header['rows']
+    data = {}
+    for column in header['columns']:
+        values = np.frombuffer(payload, dtype=DTYPES[column['dtype']], count=rows, offset=offset)
+        offset += values.nbytes
+        if column['encoding'] == 'delta':
+            values = np.cumsum(values)
+        if column['dtype'] == 'datetime64[ns]':
+            values = values.view('datetime64[ns]')
+        data[column['name']] = values
+    return data, header['meta']
+
+
+def available_encodings() -> List[str]:
+    """HTTP content encodings ``compress`` supports here, preferred first"""
+    encodings = ['gzip']
+    if importlib.util.find_spec('pyarrow') is not None:
+        import pyarrow as pa
+
+        if pa.Codec.is_available('zstd'):
+            encodings.insert(0, 'zstd')
+    return encodings
+
+
+def compress(payload: bytes, encoding: str) -> bytes:
+    """Compress a payload for the ``Content-Encoding`` ``encoding``"""
+    if encoding == 'gzip':
+        return gzip.compress(payload, GZIP_LEVEL, mtime=0)
+    if encoding == 'zstd':
+        import pyarrow as pa
+
+        compressed: bytes = pa.Codec('zstd', ZSTD_LEVEL).compress(payload, asbytes=True)
+        return compressed
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def benchmark_wire(rows: int = 100000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Compare response size and encoding time of JSON and the binary format
+
+    Encodes ``rows`` simulated samples of all channels the way the measurement
+    endpoints do. Returns, per variant, the payload bytes and the best
+    encoding time in milliseconds.
+    """
+    from .buffer import CHANNELS
+    from .simulator import MeasurementSimulator
+
+    block = MeasurementSimulator(seed=0).block(rows, 1000.0, start='2024-08-20T22:00:00')
+    data = {key: block[key] for key in ('timestamp', *CHANNELS)}
+
+    def to_json() -> bytes:
+        columns = {key: values.tolist() for key, values in data.items() if key != 'timestamp'}
+        columns['timestamp'] = np.datetime_as_string(data['timestamp'], unit='us').tolist()
+        return json.dumps(columns).encode()
+
+    def compressed(encoding: str) -> Callable[[], bytes]:
+        return lambda: compress(encode_columns(data, delta=True), encoding)
+
+    variants: Dict[str, Callable[[], bytes]] = {'json': to_json, 'binary': lambda: encode_columns(data)}
+    for encoding in available_encodings():
+        variants[f'binary+{encoding}'] = compressed(encoding)
+
+    results = {}
+    for name, encode in variants.items():
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = encode()
+            best = min(best, time.perf_counter() - started)
+        results[name] = {'bytes': len(payload), 'ms': best * 1e3}
+    return results
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for variant, result in benchmark_wire(count).items():
+        print(f"{variant:>12}: {result['bytes']:>12,} bytes  {result['ms']:8.1f} ms")
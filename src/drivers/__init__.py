@@ -0,0 +1,30 @@
+"""
+QuantumMeter Pro - Device Drivers
+Drivers by connection type, used by the acquisition scheduler
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from .base import MeasurementDriver
+from .frames import FRAME_DTYPE, FRAME_SIZE, SYNC_WORD, encode_frames, parse_frames
+from .modbus import ModbusConnectionPool, ModbusDriver, ModbusError
+from .serial_driver import SerialDriver
+from .simulation import SimulationDriver
+
+# Driver classes by ``connection.type`` in config/devices.yaml
+DRIVERS: Dict[str, Callable[[Dict[str, Any]], MeasurementDriver]] = {
+    'serial': SerialDriver,
+    'ethernet': ModbusDriver,
+    'simulation': SimulationDriver,
+}
+
+
+def create_driver(config: Dict[str, Any]) -> Optional[MeasurementDriver]:
+    """Create the driver for a device config, or None if its connection type is unsupported"""
+    factory = DRIVERS.get(config.get('connection', {}).get('type'))
+    return factory(config) if factory else None
+
+
+__all__ = ['MeasurementDriver', 'SerialDriver', 'ModbusDriver', 'SimulationDriver', 'DRIVERS', 'create_driver',
+           'ModbusConnectionPool', 'ModbusError',
+           'FRAME_DTYPE', 'FRAME_SIZE', 'SYNC_WORD', 'encode_frames', 'parse_frames']
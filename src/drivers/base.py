@@ -0,0 +1,33 @@
+"""
+QuantumMeter Pro - Driver Interface
+Base class for measurement device drivers
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class MeasurementDriver:
+    """Asynchronous measurement device driver
+
+    The acquisition scheduler calls ``open`` once, then ``read`` on every
+    deadline with the timestamps of the samples that became due. Host-clocked
+    drivers return one value per channel for each timestamp; device-clocked
+    drivers return whatever the device produced since the last read,
+    including their own ``timestamp`` column.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        self.config = config or {}
+        self.connection = self.config.get('connection', {})
+
+    async def open(self, sampling_rate: float) -> None:
+        """Connect to the device and start sampling at ``sampling_rate`` Hz"""
+
+    async def read(self, timestamps: np.ndarray) -> Dict[str, np.ndarray]:
+        """Return the next block of samples as NumPy columns"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Stop sampling and release the connection"""
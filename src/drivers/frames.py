@@ -0,0 +1,123 @@
+"""
+QuantumMeter Pro - Binary Sample Frames
+Fixed-size little-endian frames streamed by the meters, parsed in batches
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Every frame starts with this marker (bytes 5A A5 on the wire)
+SYNC_WORD = 0xA55A
+
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'),
+    ('sequence', '<u4'),      # frame counter, wraps at 2**32
+    ('timestamp', '<i8'),     # device clock: local wall-clock time as ns since 1970-01-01 (no UTC offset)
+    ('current', '<f8'),
+    ('voltage', '<f8'),
+    ('temperature', '<f8'),
+    ('checksum', '<u2'),      # sum of all preceding bytes, modulo 2**16
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+
+_SYNC_BYTES = np.frombuffer(np.array(SYNC_WORD, dtype='<u2').tobytes(), dtype=np.uint8)
+_BODY = FRAME_SIZE - 2
+
+
+def frame_checksums(raw: np.ndarray) -> np.ndarray:
+    """Checksums of the frames in an (n, FRAME_SIZE) uint8 array"""
+    checksums: np.ndarray = (raw[:, :_BODY].sum(axis=1, dtype=np.uint32) & 0xFFFF).astype(np.uint16)
+    return checksums
+
+
+def encode_frames(sequence: ArrayLike, timestamps: ArrayLike, current: ArrayLike, voltage: ArrayLike,
+                  temperature: ArrayLike) -> bytes:
+    """Build the wire bytes for a block of samples (naive local ``datetime64`` timestamps)"""
+    ticks = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+    frames = np.zeros(len(ticks), dtype=FRAME_DTYPE)
+    frames['sync'] = SYNC_WORD
+    frames['sequence'] = np.asarray(sequence, dtype=np.int64) & 0xFFFFFFFF
+    frames['timestamp'] = ticks
+    frames['current'] = current
+    frames['voltage'] = voltage
+    frames['temperature'] = temperature
+    raw = frames.view(np.uint8).reshape(-1, FRAME_SIZE)
+    frames['checksum'] = frame_checksums(raw)
+    return frames.tobytes()
+
+
+def parse_frames(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """Parse every complete, valid frame in ``data``
+
+    Returns ``(frames, consumed, skipped)``: a FRAME_DTYPE record array, the
+    number of leading bytes that can be discarded, and how many of them were
+    noise or corrupt frames. Aligned input (the normal case) is validated in
+    one vectorized pass; after corruption the parser resynchronizes on the
+    next sync word with a valid checksum.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    length = len(buffer)
+    if length < FRAME_SIZE:
+        return np.empty(0, dtype=FRAME_DTYPE), 0, 0
+
+    count = length // FRAME_SIZE
+    aligned = buffer[:count * FRAME_SIZE].reshape(count, FRAME_SIZE)
+    if (aligned[:, 0] == _SYNC_BYTES[0]).all() and (aligned[:, 1] == _SYNC_BYTES[1]).all():
+        checksums = aligned[:, _BODY:].copy().view('<u2').reshape(-1)
+        if (checksums == frame_checksums(aligned)).all():
+            return aligned.copy().view(FRAME_DTYPE).reshape(-1), count * FRAME_SIZE, 0
+
+    # Slow path: candidate frames at every sync word, validated by checksum
+    starts = np.flatnonzero((buffer[:-1] == _SYNC_BYTES[0]) & (buffer[1:] == _SYNC_BYTES[1]))
+    complete = starts[starts + FRAME_SIZE <= length]
+    valid = np.empty(0, dtype=np.int64)
+    if len(complete):
+        raw = buffer[complete[:, None] + np.arange(FRAME_SIZE)]
+        ok = raw[:, _BODY:].copy().view('<u2').reshape(-1) == frame_checksums(raw)
+        valid = complete[ok]
+
+    # Drop candidates overlapping an earlier accepted frame (rare: a sync word
+    # and valid checksum inside a frame's payload)
+    accepted = valid
+    if (np.diff(valid) < FRAME_SIZE).any():
+        kept, next_free = [], 0
+        for start in valid:
+            if start >= next_free:
+                kept.append(start)
+                next_free = int(start) + FRAME_SIZE
+        accepted = np.asarray(kept, dtype=np.int64)
+
+    if len(accepted):
+        frames = buffer[accepted[:, None] + np.arange(FRAME_SIZE)].copy().view(FRAME_DTYPE).reshape(-1)
+        consumed = int(accepted[-1]) + FRAME_SIZE
+    else:
+        frames = np.empty(0, dtype=FRAME_DTYPE)
+        consumed = 0
+
+    # Keep a trailing partial frame; a lone last byte may be half a sync word
+    pending = starts[(starts >= consumed) & (starts + FRAME_SIZE > length)]
+    tail = int(pending[0]) if len(pending) else length - 1
+    consumed = max(consumed, tail)
+    skipped = consumed - len(frames) * FRAME_SIZE
+    return frames, consumed, skipped
+
+
+def frames_to_columns(frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """Convert parsed frames to measurement columns (resistance is derived)
+
+    Frame timestamps are taken as-is as naive local ``datetime64[ns]``, the
+    time base of the buffer and store; devices must send local wall-clock
+    time, not UTC epoch time, or samples are shifted by the UTC offset.
+    """
+    current = frames['current'].astype(np.float64)
+    voltage = frames['voltage'].astype(np.float64)
+    count = len(frames)
+    return {
+        'timestamp': frames['timestamp'].astype(np.int64).view('datetime64[ns]'),
+        'current': current,
+        'voltage': voltage,
+        'resistance': np.divide(voltage, current, out=np.full(count, 1e12), where=current != 0),
+        'temperature': frames['temperature'].astype(np.float64),
+    }
@@ -0,0 +1,154 @@
+"""
+QuantumMeter Pro - Loopback Meter
+Simulated serial meter behind a pseudo-terminal, for testing the serial driver locally
+
+Run ``python -m src.drivers.loopback`` and point a serial device's ``port`` at
+the printed path.
+"""
+
+import datetime
+import os
+import select
+import threading
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+
+from ..core.simulator import MeasurementSimulator
+from .frames import FRAME_SIZE, encode_frames
+
+# Interval between two writes of frames to the pseudo-terminal (s)
+WRITE_INTERVAL = 0.01
+
+
+class LoopbackDevice:
+    """Pseudo-terminal (POSIX) meter speaking the SerialDriver protocol
+
+    A background thread answers ``RATE``/``START``/``STOP`` commands and, while
+    started, writes simulated frames in blocks on a monotonic schedule.
+    ``noise`` is the probability of inserting random bytes before a block and
+    ``corrupt`` that of damaging one frame of a block after its sync word, to
+    exercise the driver's resynchronization and checksum test; the inserted
+    bytes and damaged sequence numbers are counted in ``noise_bytes`` and
+    ``corrupted``. Frame ``k`` is stamped ``started_at + k / sampling_rate``.
+    ``seed`` makes the samples and the noise reproducible.
+    """
+
+    def __init__(self, noise: float = 0.0, write_interval: float = WRITE_INTERVAL,
+                 seed: Optional[int] = None, corrupt: float = 0.0) -> None:
+        self.noise = noise
+        self.corrupt = corrupt
+        self.noise_bytes = 0
+        self.corrupted: List[int] = []
+        self.simulator = MeasurementSimulator(seed)
+        self.rng = np.random.default_rng(seed)
+        self.write_interval = write_interval
+        self.port: Optional[str] = None
+        self.sampling_rate = 10.0
+        self.streaming = False
+        self.started_at: Optional[np.datetime64] = None
+        self._master: Optional[int] = None
+        self._slave: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def __enter__(self) -> 'LoopbackDevice':
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> str:
+        """Open the pseudo-terminal and return the port path for the driver"""
+        import pty
+        import tty
+
+        master, slave = pty.openpty()
+        self._master, self._slave = master, slave
+        # Raw mode: no echo of frames and no newline translation
+        tty.setraw(slave)
+        port = self.port = os.ttyname(slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(master,), daemon=True)
+        self._thread.start()
+        return port
+
+    def stop(self) -> None:
+        """Stop the device and close the pseudo-terminal"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def _run(self, master: int) -> None:
+        commands = b''
+        sent = 0
+        start = 0.0
+        while self._running:
+            readable, _, _ = select.select([master], [], [], self.write_interval)
+            if readable:
+                commands += os.read(master, 1024)
+                *lines, commands = commands.split(b'\n')
+                for line in lines:
+                    name, _, argument = line.strip().decode('ascii', 'replace').partition(' ')
+                    if name == 'RATE':
+                        self.sampling_rate = float(argument)
+                    elif name == 'START':
+                        self.streaming, sent = True, 0
+                        start = time.monotonic()
+                        self.started_at = np.datetime64(datetime.datetime.now(), 'ns')
+                    elif name == 'STOP':
+                        self.streaming = False
+
+            if not self.streaming:
+                continue
+            due = int((time.monotonic() - start) * self.sampling_rate) + 1
+            if due <= sent:
+                continue
+            sequence = np.arange(sent, due)
+            timestamps = self.started_at + (sequence * (1e9 / self.sampling_rate)).astype('timedelta64[ns]')
+            values = self.simulator.generate(timestamps)
+            data = encode_frames(sequence, timestamps, values['current'],
+                                 values['voltage'], values['temperature'])
+            if self.corrupt and self.rng.random() < self.corrupt:
+                index = int(self.rng.integers(len(sequence)))
+                damaged = bytearray(data)
+                damaged[index * FRAME_SIZE + int(self.rng.integers(2, FRAME_SIZE))] ^= 0xFF
+                data = bytes(damaged)
+                self.corrupted.append(int(sequence[index]))
+            if self.noise and self.rng.random() < self.noise:
+                noise = self.rng.bytes(int(self.rng.integers(1, 64)))
+                data = noise + data
+                self.noise_bytes += len(noise)
+            self._write(master, data)
+            sent = due
+
+    def _write(self, master: int, data: bytes) -> None:
+        view = memoryview(data)
+        while view and self._running:
+            _, writable, _ = select.select([], [master], [], self.write_interval)
+            if not writable:
+                # Nobody is reading: the rest is lost, as on a UART overrun
+                break
+            view = view[os.write(master, view):]
+
+
+def main() -> None:
+    """Run a loopback meter until interrupted"""
+    with LoopbackDevice() as device:
+        print(f"🔌 Loopback meter on {device.port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
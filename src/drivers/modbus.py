@@ -0,0 +1,226 @@
+"""
+QuantumMeter Pro - Modbus/TCP Driver
+Ethernet meters read over a pool of persistent, pipelined Modbus/TCP connections
+"""
+
+import asyncio
+import struct
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .base import MeasurementDriver
+
+MODBUS_PORT = 502
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+
+# Input registers holding one sample: big-endian IEEE 754 doubles, 4 registers each
+REGISTER_MAP = {'current': 0, 'voltage': 4, 'temperature': 8}
+REGISTER_COUNT = 4 * len(REGISTER_MAP)
+
+# Connections per device, outstanding requests per connection, timeouts (s)
+POOL_SIZE = 4
+PIPELINE_DEPTH = 32
+TIMEOUT = 1.0
+RECONNECT_DELAY = 0.5
+
+# Transaction id, protocol id (0), length of the rest, unit id
+MBAP = struct.Struct('>HHHB')
+
+
+class ModbusError(Exception):
+    """Exception response or protocol error from a Modbus server"""
+
+
+def encode_request(transaction_id: int, unit_id: int, function: int, address: int, count: int) -> bytes:
+    """Build a read-registers request (MBAP header + PDU)"""
+    return MBAP.pack(transaction_id, 0, 6, unit_id) + struct.pack('>BHH', function, address, count)
+
+
+class ModbusConnection:
+    """Persistent TCP connection with pipelined requests
+
+    Requests are written as soon as they are issued, without waiting for the
+    previous reply; a receive task matches replies to requests by transaction
+    id. When the connection breaks, every outstanding request fails with
+    ConnectionError and ``connected`` turns False.
+    """
+
+    def __init__(self, host: str, port: int = MODBUS_PORT, unit_id: int = 1,
+                 depth: int = PIPELINE_DEPTH, timeout: float = TIMEOUT) -> None:
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(depth)
+        self._pending: Dict[int, 'asyncio.Future[bytes]'] = {}
+        self._transaction = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional['asyncio.Task[None]'] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def connect(self) -> None:
+        """Open the TCP connection"""
+        reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        self._receiver = asyncio.create_task(self._receive(reader))
+
+    async def read_registers(self, address: int, count: int,
+                             function: int = READ_INPUT_REGISTERS) -> bytes:
+        """Read ``count`` registers and return their raw big-endian bytes"""
+        async with self._slots:
+            writer = self._writer
+            if writer is None:
+                raise ConnectionError(f'not connected to {self.host}:{self.port}')
+            transaction_id = self._next_transaction()
+            future: 'asyncio.Future[bytes]' = asyncio.get_running_loop().create_future()
+            self._pending[transaction_id] = future
+            writer.write(encode_request(transaction_id, self.unit_id, function, address, count))
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._pending.pop(transaction_id, None)
+
+    async def close(self) -> None:
+        """Close the connection and fail outstanding requests"""
+        self._disconnect(ConnectionError('connection closed'))
+        if self._receiver is not None:
+            self._receiver.cancel()
+            await asyncio.gather(self._receiver, return_exceptions=True)
+            self._receiver = None
+
+    def _next_transaction(self) -> int:
+        while True:
+            self._transaction = (self._transaction + 1) & 0xFFFF
+            if self._transaction not in self._pending:
+                return self._transaction
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                transaction_id, protocol, length, unit_id = MBAP.unpack(
+                    await reader.readexactly(MBAP.size))
+                pdu = await reader.readexactly(length - 1)
+                future = self._pending.get(transaction_id)
+                if future is None or future.done():
+                    # Reply to a request that already timed out
+                    continue
+                if pdu[0] & 0x80:
+                    future.set_exception(ModbusError(f'function {pdu[0] & 0x7F:#04x} failed '
+                                                     f'with exception code {pdu[1]}'))
+                else:
+                    future.set_result(pdu[2:2 + pdu[1]])
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            self._disconnect(ConnectionError(f'connection to {self.host}:{self.port} lost: {e}'))
+
+    def _disconnect(self, error: Exception) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+
+class ModbusConnectionPool:
+    """Fixed set of persistent connections to one server
+
+    Requests are spread round-robin over the connections. A broken connection
+    is reopened on its next use, at most once per ``RECONNECT_DELAY``.
+    """
+
+    def __init__(self, host: str, port: int = MODBUS_PORT, unit_id: int = 1,
+                 size: int = POOL_SIZE, depth: int = PIPELINE_DEPTH, timeout: float = TIMEOUT) -> None:
+        self.connections = [ModbusConnection(host, port, unit_id, depth, timeout) for _ in range(size)]
+        self.reconnects = 0
+        self._locks = [asyncio.Lock() for _ in range(size)]
+        self._attempts = [0.0] * size
+        self._next = 0
+
+    async def open(self) -> None:
+        """Connect every connection of the pool"""
+        await asyncio.gather(*(connection.connect() for connection in self.connections))
+
+    async def read_many(self, requests: int, address: int, count: int,
+                        function: int = READ_INPUT_REGISTERS) -> List[Union[bytes, BaseException]]:
+        """Issue ``requests`` identical register reads concurrently over the pool
+
+        Returns the raw register bytes, or the exception, of each read in order.
+        """
+        size = len(self.connections)
+        first, self._next = self._next, (self._next + requests) % size
+        reads = [self._read((first + i) % size, address, count, function) for i in range(requests)]
+        return await asyncio.gather(*reads, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Close every connection"""
+        await asyncio.gather(*(connection.close() for connection in self.connections))
+
+    async def _read(self, index: int, address: int, count: int, function: int) -> bytes:
+        connection = self.connections[index]
+        if not connection.connected:
+            async with self._locks[index]:
+                if not connection.connected:
+                    if time.monotonic() - self._attempts[index] < RECONNECT_DELAY:
+                        raise ConnectionError(f'reconnecting to {connection.host}:{connection.port}')
+                    self._attempts[index] = time.monotonic()
+                    await connection.connect()
+                    self.reconnects += 1
+        return await connection.read_registers(address, count, function)
+
+
+class ModbusDriver(MeasurementDriver):
+    """Host-clocked driver for ``connection.type: ethernet`` (Modbus/TCP)
+
+    Each due sample is one read of the measurement registers (``REGISTER_MAP``).
+    The reads of a block are pipelined over the connection pool, so throughput
+    is bound by the server rather than by round trips. Samples whose read
+    failed are NaN; a block fails only if every read did.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(config)
+        self.pool: Optional[ModbusConnectionPool] = None
+
+    async def open(self, sampling_rate: float) -> None:
+        connection = self.connection
+        self.pool = ModbusConnectionPool(connection['host'], connection.get('port', MODBUS_PORT),
+                                         unit_id=connection.get('unit_id', 1),
+                                         size=connection.get('pool_size', POOL_SIZE),
+                                         depth=connection.get('pipeline_depth', PIPELINE_DEPTH),
+                                         timeout=connection.get('timeout', TIMEOUT))
+        try:
+            await self.pool.open()
+        except Exception:
+            await self.pool.close()
+            raise
+
+    async def read(self, timestamps: np.ndarray) -> Dict[str, np.ndarray]:
+        if self.pool is None:
+            raise ConnectionError('Modbus driver is not open')
+        results = await self.pool.read_many(len(timestamps), 0, REGISTER_COUNT)
+        replies = [result if isinstance(result, bytes) and len(result) == 2 * REGISTER_COUNT else None
+                   for result in results]
+        ok = np.array([reply is not None for reply in replies], dtype=bool)
+        if len(results) and not ok.any():
+            errors = [result for result in results if isinstance(result, Exception)]
+            raise errors[0] if errors else ModbusError('malformed register data')
+
+        values = np.full((len(results), REGISTER_COUNT // 4), np.nan)
+        values[ok] = np.frombuffer(b''.join(reply for reply in replies if reply is not None), dtype='>f8').reshape(-1, REGISTER_COUNT // 4)
+        columns = {name: values[:, address // 4].copy() for name, address in REGISTER_MAP.items()}
+        current, voltage = columns['current'], columns['voltage']
+        columns['resistance'] = np.divide(voltage, current, out=np.full(len(current), 1e12),
+                                          where=current != 0)
+        return columns
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
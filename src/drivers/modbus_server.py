@@ -0,0 +1,148 @@
+"""
+QuantumMeter Pro - Modbus/TCP Stand-in Server
+In-process server standing in for an ethernet meter, for testing the Modbus driver locally
+
+Run ``python -m src.drivers.modbus_server [port]`` and point an ethernet device's
+``host``/``port`` at it.
+"""
+
+import asyncio
+import datetime
+import struct
+import sys
+from typing import Any, Optional
+
+import numpy as np
+
+from ..core.simulator import MeasurementSimulator
+from .modbus import (MBAP, READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS, REGISTER_COUNT,
+                     REGISTER_MAP)
+
+# Port used when started from the command line (502 needs privileges)
+STAND_IN_PORT = 1502
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+
+
+class ModbusStandInServer:
+    """Asyncio Modbus/TCP server serving simulated measurement registers
+
+    Every read returns a fresh simulated sample laid out as in ``REGISTER_MAP``.
+    Requests on a connection are answered in order as they arrive, so
+    pipelined clients work. ``drop_every`` closes a connection after that many
+    requests, to exercise the driver's reconnects; ``latency`` (s) delays every
+    reply like a network round trip would, without blocking the requests
+    behind it; ``seed`` makes the samples reproducible.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, unit_id: int = 1,
+                 drop_every: Optional[int] = None, latency: float = 0.0, seed: Optional[int] = None) -> None:
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.drop_every = drop_every
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.simulator = MeasurementSimulator(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def __aenter__(self) -> 'ModbusStandInServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def start(self) -> int:
+        """Start listening and return the port (useful with ``port=0``)"""
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self._server = server
+        self.port = server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self) -> None:
+        """Stop listening"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        loop = asyncio.get_running_loop()
+        replies: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.create_task(self._send(replies, writer))
+        served = 0
+        try:
+            while True:
+                transaction_id, protocol, length, unit_id = MBAP.unpack(await reader.readexactly(MBAP.size))
+                pdu = self._respond(await reader.readexactly(length - 1))
+                replies.put_nowait((loop.time() + self.latency,
+                                    MBAP.pack(transaction_id, protocol, len(pdu) + 1, unit_id) + pdu))
+                self.requests += 1
+                served += 1
+                if self.drop_every and served >= self.drop_every:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            replies.put_nowait(None)
+            await sender
+
+    async def _send(self, replies: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        """Write replies in order once they are due, then close the connection"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                reply = await replies.get()
+                if reply is None:
+                    break
+                due, frame = reply
+                if due > loop.time():
+                    await asyncio.sleep(due - loop.time())
+                writer.write(frame)
+                # Only waits when the client stops reading
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, pdu: bytes) -> bytes:
+        function = pdu[0]
+        if function not in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS) or len(pdu) != 5:
+            return bytes((function | 0x80, ILLEGAL_FUNCTION))
+        address, count = struct.unpack('>HH', pdu[1:5])
+        if count < 1 or address + count > REGISTER_COUNT:
+            return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+        registers = self._registers()
+        return bytes((function, 2 * count)) + registers[2 * address:2 * (address + count)]
+
+    def _registers(self) -> bytes:
+        sample = self.simulator.generate([np.datetime64(datetime.datetime.now(), 'ns')])
+        values = np.zeros(REGISTER_COUNT // 4)
+        for name, address in REGISTER_MAP.items():
+            values[address // 4] = sample[name][0]
+        return values.astype('>f8').tobytes()
+
+
+async def serve(port: int = STAND_IN_PORT) -> None:
+    """Serve until cancelled"""
+    async with ModbusStandInServer('0.0.0.0', port) as server:
+        print(f"🔌 Modbus/TCP stand-in meter on port {server.port} (Ctrl+C to stop)")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    """Run the stand-in server from the command line"""
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else STAND_IN_PORT
+    try:
+        asyncio.run(serve(port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
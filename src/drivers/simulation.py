@@ -0,0 +1,26 @@
+"""
+QuantumMeter Pro - Simulation Driver
+Host-clocked simulated quantum measurements
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..core.simulator import MeasurementSimulator
+from .base import MeasurementDriver
+
+
+class SimulationDriver(MeasurementDriver):
+    """Driver for devices with ``connection.type: simulation``
+
+    The device's optional ``simulation`` section configures the simulator
+    (``seed``, ``profile`` and model parameters).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(config)
+        self.simulator = MeasurementSimulator.from_config(self.config.get('simulation'))
+
+    async def read(self, timestamps: np.ndarray) -> Dict[str, np.ndarray]:
+        return self.simulator.generate(timestamps)
@@ -4,36 +4,246 @@ QuantumMeter Pro - Web Dashboard
 Flask-based web interface for remote monitoring and control
 """
 
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
+from flask.typing import ResponseReturnValue
 from flask_cors import CORS
 import json
 import datetime
 import numpy as np
-import pandas as pd
 from pathlib import Path
+import asyncio
+import atexit
+import subprocess
+import sys
+import tempfile
 import threading
 import time
+import uuid
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union, cast
+
+# Allow running as ``python src/web/app.py`` from the project root
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core import DEFAULT_CAPACITY, MeasurementBuffer
+from src.core.acquisition import AcquisitionProcess, AcquisitionScheduler
+from src.core.anomaly import AnomalyMonitor
+from src.core.batch import CHUNK_SECONDS
+from src.core.config import global_settings, load_config
+from src.core.downsample import DEFAULT_POINTS, METHODS, downsample_columns
+from src.core.export import EXPORT_CHUNK_ROWS, EXPORTERS, available_formats, stream_export
+from src.core.ingest import Source, load_csv
+from src.core.pyramid import LEVELS, AggregatePyramid
+from src.core.shared import SharedMeasurementBuffer
+from src.core.simulator import MeasurementSimulator
+from src.core.storage import SegmentStore
+from src.core.wire import MIMETYPE as WIRE_MIMETYPE, available_encodings, compress, encode_columns
 
 app = Flask(__name__)
 CORS(app)
 
-# Global data storage (in production, use a proper database)
-measurement_data = {
-    'timestamp': [],
-    'current': [],
-    'voltage': [],
-    'resistance': [],
-    'temperature': []
-}
+settings = global_settings()
+
+# Global data storage: recent samples in memory, every acquired sample on disk.
+# The simulator thread writes; request handlers read lock-free and copy what they
+# serialize (see MeasurementBuffer). With ``acquisition_process`` the buffer lives
+# in shared memory and a separate acquisition process writes it.
+ACQUISITION_PROCESS = bool(settings.get('acquisition_process', False))
+measurement_data: MeasurementBuffer
+if ACQUISITION_PROCESS:
+    measurement_data = SharedMeasurementBuffer.create(capacity=settings.get('max_data_points', DEFAULT_CAPACITY))
+    atexit.register(measurement_data.close)
+    atexit.register(measurement_data.unlink)
+else:
+    measurement_data = MeasurementBuffer(capacity=settings.get('max_data_points', DEFAULT_CAPACITY))
+measurement_store = SegmentStore(Path(settings.get('storage_directory', 'data/measurements')) / 'web',
+                                 segment_seconds=int(settings.get('segment_hours', 1) * 3600),
+                                 retention_days=settings.get('data_retention_days'))
+atexit.register(measurement_store.close)
+
+# Robust anomaly detectors, fed with the samples appended since the last analysis
+anomaly_monitor = AnomalyMonitor(measurement_data)
+
+# Device shown on the dashboard (config/devices.yaml)
+DASHBOARD_DEVICE = 'simulation_device'
+
+# Live stream (/api/stream): poll interval (s), rows sent on connect, maximum rows
+# per event (slow clients skip ahead instead of queueing) and keep-alive period (s)
+STREAM_INTERVAL = 0.5
+STREAM_HISTORY = 100
+STREAM_MAX_BATCH = 1000
+STREAM_HEARTBEAT = 15
+
+# Status fields whose change triggers a ``status`` event (row count and last
+# update change with every block and travel with the measurement events)
+STREAM_STATE_FIELDS = ('device_connected', 'measuring')
+
+# Distinguishes event ids of this server process from those of a previous run
+STREAM_EPOCH = f'{time.time_ns():x}'
+
+# Content encodings offered for binary measurement responses, preferred first
+WIRE_ENCODINGS = available_encodings()
+
+# Refreshes of the cached analysis that may be invalidated by concurrent
+# appends before one is served uncached
+ANALYSIS_ATTEMPTS = 3
+
+# Batch analysis jobs (/api/analysis/jobs) by id; the oldest finished ones are
+# forgotten beyond this many
+ANALYSIS_JOBS_KEPT = 20
+analysis_jobs: Dict[str, 'AnalysisJob'] = {}
 
 # Device status
-device_status = {
+device_status: Dict[str, Any] = {
     'connected': False,
     'measuring': False,
     'last_update': None
 }
 
-def generate_initial_data():
+def to_json_columns(data: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Convert buffer views to JSON-serializable column lists"""
+    columns = {key: values.tolist() for key, values in data.items() if key != 'timestamp'}
+    columns['timestamp'] = np.datetime_as_string(data['timestamp'], unit='us').tolist()
+    return columns
+
+def columns_response(data: Dict[str, np.ndarray], **meta: Any) -> Response:
+    """Respond with columns as JSON, or in the binary wire format if the Accept header prefers it
+    
+    Binary responses are compressed with the best encoding the client accepts
+    (timestamps then go out delta-encoded).
+    """
+    if request.accept_mimetypes.best_match(['application/json', WIRE_MIMETYPE]) == WIRE_MIMETYPE:
+        encoding = request.accept_encodings.best_match(WIRE_ENCODINGS)
+        payload = encode_columns(data, meta, delta=encoding is not None)
+        response = app.response_class(compress(payload, encoding) if encoding else payload, mimetype=WIRE_MIMETYPE)
+        if encoding:
+            response.content_encoding = encoding
+    else:
+        response = jsonify(dict(to_json_columns(data), **meta))
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def parse_time_arg(name: str) -> Optional[np.datetime64]:
+    """Parse an ISO-8601 query parameter into a (local, naive) datetime64"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    timestamp = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return np.datetime64(timestamp, 'ns')
+
+def parse_channels_arg() -> Tuple[str, ...]:
+    """Parse the comma-separated ``channels`` query parameter"""
+    value = request.args.get('channels')
+    if not value:
+        return measurement_data.channels
+    channels = tuple(name.strip() for name in value.split(',') if name.strip())
+    unknown = [name for name in channels if name not in measurement_data.channels]
+    if unknown:
+        raise ValueError(f"Unknown channels: {', '.join(unknown)}")
+    return channels
+
+def downsample_arg(data: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Apply the optional ``points``/``method`` query parameters to a column dict"""
+    points = request.args.get('points', type=int)
+    if not points:
+        return data
+    if points < 2:
+        raise ValueError('points must be at least 2')
+    method = request.args.get('method', 'minmax')
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Available: {', '.join(METHODS)}")
+    return downsample_columns(data, points, method)
+
+def aggregate_source() -> AggregatePyramid:
+    """The store's aggregate pyramid, or one built from the buffer if nothing is stored yet"""
+    if len(measurement_store) and measurement_store.pyramid is not None:
+        measurement_store.flush()
+        return measurement_store.pyramid
+    pyramid = AggregatePyramid(channels=measurement_data.channels)
+    data = measurement_data.view(copy=True)
+    pyramid.update(data.pop('timestamp'), **data)
+    return pyramid
+
+def query_measurements(start: Any = None, end: Any = None, channels: Optional[Iterable[str]] = None,
+                       limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Resolve a time range from memory, or from the store for ranges older than the buffer"""
+    if start is not None and len(measurement_store):
+        in_memory = len(measurement_data) and start >= measurement_data['timestamp'][0]
+        if not in_memory:
+            return measurement_store.query(start, end, channels, limit)
+    return measurement_data.between(start, end, channels, limit, copy=True)
+
+def parse_stream_cursor(value: Optional[str]) -> Optional[int]:
+    """Parse a ``<epoch>-<cursor>`` event id; None if it belongs to another server run"""
+    epoch, _, cursor = (value or '').partition('-')
+    if epoch != STREAM_EPOCH or not cursor.isdigit():
+        return None
+    return int(cursor)
+
+def format_event(event: str, payload: Any, event_id: Optional[str] = None) -> str:
+    """Format one Server-Sent Event"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(payload)}']
+    return '\n'.join(lines) + '\n\n'
+
+def stream_events(cursor: Optional[int] = None) -> Iterator[str]:
+    """Yield measurement deltas since ``cursor`` and status changes as SSE messages
+
+    Rows appended between two polls are coalesced into one event. Nothing is
+    queued per client: a client that reads slowly simply receives a bigger delta
+    next time, capped at ``STREAM_MAX_BATCH`` rows. When rows were skipped
+    (cap, eviction, clear or an unknown cursor) the event has ``reset`` set and
+    the client replaces its data instead of appending. Measurement events
+    also carry the row count and last update; ``status`` events are only sent
+    when the device or measurement state changes.
+    """
+    cleared_at = measurement_data.cleared_at
+    last_state = None
+    last_sent = time.monotonic()
+    while True:
+        total = measurement_data.total
+        if (cursor is None or cursor > total or cursor < measurement_data.cleared_at
+                or cleared_at != measurement_data.cleared_at):
+            cleared_at = measurement_data.cleared_at
+            data, new_cursor = measurement_data.since(total - STREAM_HISTORY, copy=True)
+            reset = True
+        elif cursor < total:
+            data, new_cursor = measurement_data.since(cursor, limit=STREAM_MAX_BATCH, copy=True)
+            reset = len(data['timestamp']) < new_cursor - cursor
+        else:
+            data = None
+        if data is not None:
+            cursor = new_cursor
+            status = status_payload()
+            payload = dict(to_json_columns(data), cursor=cursor, reset=reset,
+                           data_points=status['data_points'], last_update=status['last_update'])
+            yield format_event('measurements', payload, f'{STREAM_EPOCH}-{cursor}')
+            last_sent = time.monotonic()
+
+        status = status_payload()
+        state = tuple(status[key] for key in STREAM_STATE_FIELDS)
+        if state != last_state:
+            last_state = state
+            yield format_event('status', status)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= STREAM_HEARTBEAT:
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
+
+        time.sleep(STREAM_INTERVAL)
+
+def replay_stored_data() -> bool:
+    """Reload the most recent persisted measurements into memory"""
+    if not len(measurement_store):
+        return False
+    data = measurement_store.tail(measurement_data.capacity)
+    measurement_data.extend(data.pop('timestamp'), **data)
+    print(f"💾 Replayed {len(measurement_data)} stored data points from {measurement_store.root}")
+    return True
+
+def generate_initial_data() -> None:
     """Generate initial sample data for demonstration"""
     print("🔬 Generating initial quantum measurement data...")
     
@@ -42,170 +252,319 @@ def generate_initial_data():
     if sample_file.exists():
         try:
             load_data_from_csv(sample_file)
-            print(f"✅ Loaded {len(measurement_data['timestamp'])} data points from sample file")
+            print(f"✅ Loaded {len(measurement_data)} data points from sample file")
             return
         except Exception as e:
             print(f"⚠️ Could not load sample file: {e}")
     
-    # Generate 50 sample data points if no file exists
-    base_time = datetime.datetime.now() - datetime.timedelta(seconds=50)
-    
-    for i in range(50):
-        timestamp = base_time + datetime.timedelta(seconds=i)
-        
-        # Generate realistic quantum measurement data with some variation
-        base_current = 1e-9  # 1 nA base current
-        # Add some realistic variations and trends
-        trend = 0.1 * np.sin(i * 0.2)  # Slow sinusoidal trend
-        noise = np.random.normal(0, base_current * 0.02)  # 2% noise
-        current = base_current * (1 + trend) + noise
-        
-        # Voltage with slight correlation to current
-        voltage = 1.0 + np.random.normal(0, 0.001) + (current - base_current) * 1e6
-        
-        # Resistance calculation
-        resistance = voltage / current if current != 0 else 1e12
-        
-        # Temperature with slow drift
-        temperature = 23.0 + 0.1 * np.sin(i * 0.1) + np.random.normal(0, 0.05)
-        
-        # Store data
-        measurement_data['timestamp'].append(timestamp)
-        measurement_data['current'].append(current)
-        measurement_data['voltage'].append(voltage)
-        measurement_data['resistance'].append(resistance)
-        measurement_data['temperature'].append(temperature)
-    
-    print(f"✅ Generated {len(measurement_data['timestamp'])} initial data points")
-    print(f"📊 Current range: {min(measurement_data['current']):.2e} - {max(measurement_data['current']):.2e} A")
-    print(f"🔋 Voltage range: {min(measurement_data['voltage']):.6f} - {max(measurement_data['voltage']):.6f} V")
-    print(f"🌡️ Temperature range: {min(measurement_data['temperature']):.1f} - {max(measurement_data['temperature']):.1f} °C")
-
-def load_data_from_csv(filepath):
-    """Load measurement data from CSV file"""
-    df = pd.read_csv(filepath)
-    
-    # Clear existing data
-    for key in measurement_data:
-        measurement_data[key] = []
-    
-    # Convert timestamp strings to datetime objects
-    timestamps = [datetime.datetime.fromisoformat(ts) for ts in df['timestamp']]
+    # Generate 50 sample data points (1 Hz, slow trends) if no file exists
+    simulator = MeasurementSimulator(profile='demo')
+    data = simulator.block(50, 1.0, start=datetime.datetime.now() - datetime.timedelta(seconds=50))
+    measurement_data.extend(data.pop('timestamp'), **data)
     
-    # Load data
-    measurement_data['timestamp'] = timestamps
-    measurement_data['current'] = df['current'].tolist()
-    measurement_data['voltage'] = df['voltage'].tolist()
-    measurement_data['resistance'] = df['resistance'].tolist()
-    measurement_data['temperature'] = df['temperature'].tolist()
+    print(f"✅ Generated {len(measurement_data)} initial data points")
+    print(f"📊 Current range: {measurement_data['current'].min():.2e} - {measurement_data['current'].max():.2e} A")
+    print(f"🔋 Voltage range: {measurement_data['voltage'].min():.6f} - {measurement_data['voltage'].max():.6f} V")
+    print(f"🌡️ Temperature range: {measurement_data['temperature'].min():.1f} - {measurement_data['temperature'].max():.1f} °C")
+
+def load_data_from_csv(source: Source) -> Dict[str, object]:
+    """Load measurement data from a CSV file path or stream, chunk by chunk"""
+    summary = load_csv(measurement_data, source)
     
-    print(f"📁 Loaded {len(measurement_data['timestamp'])} data points from {filepath}")
-    print(f"📊 Data range: {min(timestamps)} to {max(timestamps)}")
+    print(f"📁 Loaded {summary['rows']} data points ({len(measurement_data)} kept in memory)")
+    if summary['rows']:
+        print(f"📊 Data range: {summary['first']} to {summary['last']}")
+    return summary
+
+def dashboard_devices() -> Dict[str, Dict[str, Any]]:
+    """Configuration of the device the dashboard acquires (``DASHBOARD_DEVICE``)"""
+    devices = load_config()['devices']
+    return {DASHBOARD_DEVICE: devices[DASHBOARD_DEVICE]} if DASHBOARD_DEVICE in devices else {}
 
 class DataSimulator:
-    """Simulate quantum measurement data for web dashboard"""
+    """Acquire the dashboard device for the web dashboard
+    
+    An AcquisitionScheduler drives ``DASHBOARD_DEVICE`` from an asyncio loop
+    in a background thread, feeding ``measurement_data`` and the store. The
+    other configured devices are not opened, since the dashboard shows none
+    of them. With ``ACQUISITION_PROCESS`` the scheduler runs in an
+    AcquisitionProcess and the thread only forwards its blocks to the store.
+    """
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.running = False
-        self.thread = None
+        self.thread: Optional[threading.Thread] = None
+        self.scheduler: Optional[Union[AcquisitionScheduler, AcquisitionProcess]] = None
         
-    def start(self):
-        """Start data simulation"""
+    def start(self) -> None:
+        """Start data acquisition"""
         if not self.running:
             self.running = True
-            self.thread = threading.Thread(target=self._simulate_data)
+            if isinstance(measurement_data, SharedMeasurementBuffer):
+                # ACQUISITION_PROCESS: the buffer lives in shared memory
+                process = AcquisitionProcess(dashboard_devices(),
+                                             buffers={DASHBOARD_DEVICE: measurement_data},
+                                             capacity=measurement_data.capacity,
+                                             on_block=self._store_block)
+                self.scheduler = process
+                self.thread = threading.Thread(target=process.run)
+            else:
+                scheduler = AcquisitionScheduler(dashboard_devices(),
+                                                 buffers={DASHBOARD_DEVICE: measurement_data},
+                                                 capacity=measurement_data.capacity,
+                                                 on_block=self._store_block)
+                self.scheduler = scheduler
+                self.thread = threading.Thread(target=asyncio.run, args=(scheduler.run(),))
             self.thread.daemon = True
             self.thread.start()
             
-    def stop(self):
-        """Stop data simulation"""
+    def stop(self) -> None:
+        """Stop data acquisition"""
         self.running = False
+        if self.scheduler is not None and self.thread is not None:
+            self.scheduler.stop()
+            self.thread.join()
+        measurement_store.flush()
         
-    def _simulate_data(self):
-        """Simulate quantum measurement data"""
-        while self.running:
-            # Generate realistic quantum measurement data
-            timestamp = datetime.datetime.now()
-            
-            base_current = 1e-9  # 1 nA base current
-            noise = np.random.normal(0, base_current * 0.01)
-            current = base_current + noise
-            
-            voltage = 1.0 + np.random.normal(0, 0.001)
-            resistance = voltage / current if current != 0 else 1e12
-            temperature = 23.0 + np.random.normal(0, 0.1)
-            
-            # Store data (keep only last 1000 points)
-            measurement_data['timestamp'].append(timestamp)
-            measurement_data['current'].append(current)
-            measurement_data['voltage'].append(voltage)
-            measurement_data['resistance'].append(resistance)
-            measurement_data['temperature'].append(temperature)
-            
-            # Limit data size
-            if len(measurement_data['timestamp']) > 1000:
-                for key in measurement_data:
-                    measurement_data[key] = measurement_data[key][-1000:]
-                    
-            device_status['last_update'] = timestamp
-            time.sleep(1)  # 1 Hz sampling
+    def _store_block(self, device_id: str, block: Dict[str, np.ndarray]) -> None:
+        """Persist dashboard samples (the ring buffer evicts them, the store keeps them)"""
+        if device_id != DASHBOARD_DEVICE:
+            return
+        measurement_store.append(block['timestamp'], **{key: values for key, values in block.items()
+                                                          if key != 'timestamp'})
+        device_status['last_update'] = block['timestamp'][-1].astype('datetime64[us]').item()
 
 # Initialize data simulator
 data_simulator = DataSimulator()
 
-# Generate initial data on startup
-generate_initial_data()
+class AnalysisCache:
+    """Latest /api/ai/analysis response, keyed on the buffer's ``(total, cleared_at)`` version
+    
+    Clients polling between appends share one serialized result and its ETag.
+    When new samples arrive, one request refreshes it under the lock; the
+    others wait for and reuse that refresh. The statistics and detectors
+    update incrementally, so a refresh only processes the new samples.
+    
+    The acquisition thread does not take the lock, so a refresh is only
+    published when the version is unchanged after computing it; otherwise it
+    is recomputed (up to ``ANALYSIS_ATTEMPTS`` times, then sent uncached and
+    without an ETag).
+    """
+    
+    def __init__(self, buffer: MeasurementBuffer, monitor: AnomalyMonitor) -> None:
+        self.buffer = buffer
+        self.monitor = monitor
+        self.version: Optional[Tuple[int, int]] = None
+        self.body: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.lock = threading.Lock()
+        
+    def get(self) -> Tuple[str, Optional[str]]:
+        """Return ``(body, etag)`` of the analysis for the buffer's current contents"""
+        with self.lock:
+            for _ in range(ANALYSIS_ATTEMPTS):
+                version = (self.buffer.total, self.buffer.cleared_at)
+                if version == self.version and self.body is not None:
+                    return self.body, self.etag
+                body = app.json.dumps(self.compute())
+                if (self.buffer.total, self.buffer.cleared_at) == version:
+                    self.body = body
+                    self.etag = f'{STREAM_EPOCH}-{version[1]:x}-{version[0]:x}'
+                    self.version = version
+                    return body, self.etag
+            return body, None
+            
+    def compute(self) -> Dict[str, Any]:
+        # Statistics are maintained incrementally; the detectors only see new samples
+        analysis: Dict[str, Any] = self.buffer.read_consistent(lambda: self.buffer.stats.summary(('current', 'voltage')))
+        self.monitor.update()
+        analysis.update(self.monitor.summary())
+        current_stats = analysis['current']
+        analysis['quality_score'] = 1.0 - (current_stats['std'] / current_stats['mean'])
+        return analysis
+
+analysis_cache = AnalysisCache(measurement_data, anomaly_monitor)
+
+class AnalysisJob:
+    """Batch analysis of the stored history (``src.core.batch``) in the background
+    
+    The analysis runs as ``python -m src.core.batch`` in a child process that
+    starts its own worker pool, so workers never re-import this module and a
+    long analysis takes no CPU time from request handlers. Progress is read
+    from the child's ``--progress`` lines.
+    """
+    
+    def __init__(self, arguments: List[str]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.status = 'running'
+        self.done = 0
+        self.total = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = datetime.datetime.now()
+        self.thread = threading.Thread(target=self._run, args=(arguments,), daemon=True)
+        self.thread.start()
+        
+    def as_dict(self, result: bool = True) -> Dict[str, Any]:
+        """Job state for the API (with the result once finished, unless ``result`` is False)"""
+        data: Dict[str, Any] = {'id': self.id, 'status': self.status, 'created': self.created.isoformat(),
+                'progress': {'done': self.done, 'total': self.total}}
+        if self.error is not None:
+            data['error'] = self.error
+        if result and self.result is not None:
+            data['result'] = self.result
+        return data
+        
+    def _run(self, arguments: List[str]) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'result.json'
+            command = [sys.executable, '-m', 'src.core.batch', *arguments, '--output', str(output), '--progress']
+            messages: List[str] = []
+            try:
+                process = subprocess.Popen(command, cwd=PROJECT_ROOT, stderr=subprocess.PIPE, text=True)
+                for line in cast(IO[str], process.stderr):
+                    if line.startswith('progress '):
+                        self.done, self.total = (int(value) for value in line.split()[1:3])
+                    elif line.strip():
+                        text = line.strip()
+                        messages.append(text[2:] if text.startswith('❌ ') else text)
+                if process.wait() == 0:
+                    self.result = json.loads(output.read_text())
+                    self.status = 'done'
+                    return
+                self.error = messages[-1] if messages else f'analysis exited with code {process.returncode}'
+            except Exception as e:
+                self.error = str(e)
+            self.status = 'failed'
+            print(f"⚠️ Analysis job {self.id} failed: {self.error}")
+
+# Replay persisted data on startup, or generate initial data on first start
+if not replay_stored_data():
+    generate_initial_data()
 
 @app.route('/')
-def index():
+def index() -> ResponseReturnValue:
     """Main dashboard page"""
-    return render_template('dashboard.html')
+    return render_template('dashboard.html', export_formats=export_formats())
 
 @app.route('/api/status')
-def get_status():
+def get_status() -> ResponseReturnValue:
     """Get device and measurement status"""
-    return jsonify({
+    return jsonify(status_payload())
+
+def status_payload() -> Dict[str, Any]:
+    """Device and measurement status as a JSON-serializable dict"""
+    return {
         'device_connected': device_status['connected'],
         'measuring': device_status['measuring'],
         'last_update': device_status['last_update'].isoformat() if device_status['last_update'] else None,
-        'data_points': len(measurement_data['timestamp'])
-    })
+        'data_points': len(measurement_data)
+    }
+
+@app.route('/api/stream')
+def stream_measurements() -> ResponseReturnValue:
+    """Server-Sent Events stream of new measurements and status changes
+    
+    Clients resume from the ``Last-Event-ID`` header (sent automatically by
+    EventSource on reconnect) or the ``cursor`` query parameter.
+    """
+    cursor = parse_stream_cursor(request.headers.get('Last-Event-ID') or request.args.get('cursor'))
+    return Response(stream_events(cursor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/measurements/current')
-def get_current_measurements():
-    """Get current measurement data"""
-    if not measurement_data['timestamp']:
+def get_current_measurements() -> ResponseReturnValue:
+    """Get current measurement data
+    
+    Returns the last 100 raw measurements, or the whole buffer decimated to
+    about ``points`` rows per channel when ``points`` is given.
+    """
+    if not len(measurement_data):
         return jsonify({'error': 'No data available'})
         
-    # Return last 100 measurements
-    recent_data = {key: values[-100:] for key, values in measurement_data.items()}
-    
-    # Convert timestamps to strings
-    recent_data['timestamp'] = [ts.isoformat() for ts in recent_data['timestamp']]
+    try:
+        if request.args.get('points'):
+            recent_data = downsample_arg(measurement_data.view(copy=True))
+        else:
+            # Return last 100 measurements
+            recent_data = measurement_data.view(100, copy=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(recent_data)
+    return columns_response(recent_data)
 
 @app.route('/api/measurements/history')
-def get_measurement_history():
-    """Get historical measurement data"""
-    if not measurement_data['timestamp']:
+def get_measurement_history() -> ResponseReturnValue:
+    """Get historical measurement data
+    
+    Query parameters: ``start``/``end`` (ISO-8601), ``channels`` (comma-separated),
+    ``limit`` (keep the most recent rows of the range) and ``points``/``method``
+    (min/max or LTTB decimation of the result).
+    """
+    if not len(measurement_data) and not len(measurement_store):
         return jsonify({'error': 'No data available'})
         
-    # Convert timestamps to strings
-    data = {key: values.copy() for key, values in measurement_data.items()}
-    data['timestamp'] = [ts.isoformat() for ts in data['timestamp']]
+    try:
+        start = parse_time_arg('start')
+        end = parse_time_arg('end')
+        channels = parse_channels_arg()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 0:
+        return jsonify({'error': 'limit must not be negative'}), 400
+        
+    # Only the requested slice and channels are serialized
+    data = query_measurements(start, end, channels, limit)
+    try:
+        data = downsample_arg(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return columns_response(data)
+
+@app.route('/api/measurements/aggregate')
+def get_measurement_aggregates() -> ResponseReturnValue:
+    """Get min/max/mean/count per time bucket for long-range charts
     
-    return jsonify(data)
+    Reads the coarsest pyramid level that still gives about ``points`` buckets
+    (default 1000) over ``start``/``end``, or the named ``level`` (1s, 10s,
+    1min, 10min, 1h), without scanning raw data. ``channels`` selects channels;
+    columns are named ``<channel>_<statistic>``.
+    """
+    if not len(measurement_data) and not len(measurement_store):
+        return jsonify({'error': 'No data available'})
+        
+    try:
+        start = parse_time_arg('start')
+        end = parse_time_arg('end')
+        channels = parse_channels_arg()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    points = request.args.get('points', DEFAULT_POINTS, type=int)
+    if points < 1:
+        return jsonify({'error': 'points must be at least 1'}), 400
+    level_names = [name for name, seconds in LEVELS]
+    level = request.args.get('level')
+    if level is not None and level not in level_names:
+        return jsonify({'error': f"Unknown level '{level}'. Available: {', '.join(level_names)}"}), 400
+        
+    pyramid = aggregate_source()
+    index = pyramid.select_level(start, end, points) if level is None else level_names.index(level)
+    data = pyramid.query(start, end, points, channels, index)
+    name, seconds = pyramid.levels[index]
+    return columns_response(data, level=name, bucket_seconds=seconds)
 
 @app.route('/api/device/connect', methods=['POST'])
-def connect_device():
+def connect_device() -> ResponseReturnValue:
     """Connect to quantum measurement device"""
     device_status['connected'] = True
     device_status['last_update'] = datetime.datetime.now()
     return jsonify({'status': 'connected'})
 
 @app.route('/api/device/disconnect', methods=['POST'])
-def disconnect_device():
+def disconnect_device() -> ResponseReturnValue:
     """Disconnect from quantum measurement device"""
     device_status['connected'] = False
     device_status['measuring'] = False
@@ -213,7 +572,7 @@ def disconnect_device():
     return jsonify({'status': 'disconnected'})
 
 @app.route('/api/measurement/start', methods=['POST'])
-def start_measurement():
+def start_measurement() -> ResponseReturnValue:
     """Start measurement collection"""
     if not device_status['connected']:
         return jsonify({'error': 'Device not connected'}), 400
@@ -223,36 +582,55 @@ def start_measurement():
     return jsonify({'status': 'started'})
 
 @app.route('/api/measurement/stop', methods=['POST'])
-def stop_measurement():
+def stop_measurement() -> ResponseReturnValue:
     """Stop measurement collection"""
     device_status['measuring'] = False
     data_simulator.stop()
     return jsonify({'status': 'stopped'})
 
-@app.route('/api/export/csv')
-def export_csv():
-    """Export data as CSV"""
-    if not measurement_data['timestamp']:
+@app.route('/api/export/<fmt>')
+def export_data(fmt: str) -> ResponseReturnValue:
+    """Stream measurement data as a file download (csv, json, excel, parquet, hdf5 or arrow)
+    
+    Exports the persisted history (or the in-memory buffer if nothing is stored
+    yet) chunk by chunk, so the download starts at once and memory stays
+    constant. Optional query parameters: ``start``/``end`` and ``channels``.
+    """
+    if fmt not in export_formats():
+        return jsonify({'error': f"Unknown export format '{fmt}'. Available: {', '.join(export_formats())}"}), 404
+    if not len(measurement_data) and not len(measurement_store):
         return jsonify({'error': 'No data to export'}), 400
         
-    # Create DataFrame
-    df = pd.DataFrame(measurement_data)
-    
-    # Save to file
-    filename = f"quantum_measurements_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    filepath = Path('data') / filename
-    filepath.parent.mkdir(exist_ok=True)
-    df.to_csv(filepath, index=False)
+    try:
+        start = parse_time_arg('start')
+        end = parse_time_arg('end')
+        channels = parse_channels_arg()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+        
+    chunks: Iterable[Dict[str, np.ndarray]]
+    if len(measurement_store):
+        chunks = measurement_store.chunks(EXPORT_CHUNK_ROWS, start, end, channels)
+    elif start is None and end is None:
+        chunks = measurement_data.chunks(EXPORT_CHUNK_ROWS, channels)
+    else:
+        # The buffer holds at most ``capacity`` rows, so one copy stays bounded
+        chunks = [measurement_data.between(start, end, channels, copy=True)]
     
-    return jsonify({
-        'filename': filename,
-        'filepath': str(filepath),
-        'data_points': len(df)
-    })
+    exporter = EXPORTERS[fmt]
+    filename = f"quantum_measurements_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{exporter.extension}"
+    return Response(stream_export(chunks, fmt, ('timestamp',) + tuple(channels)), mimetype=exporter.mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+def export_formats() -> List[str]:
+    """Configured export formats that are implemented and installed"""
+    return available_formats(settings.get('export_formats', ['csv']))
 
 @app.route('/api/load/sample', methods=['POST'])
-def load_sample_data():
+def load_sample_data() -> ResponseReturnValue:
     """Load sample data from CSV file"""
+    if data_simulator.running:
+        return jsonify({'error': 'Stop the measurement before loading data'}), 409
     try:
         sample_file = Path('data/sample_quantum_data.csv')
         if not sample_file.exists():
@@ -262,16 +640,19 @@ def load_sample_data():
         
         return jsonify({
             'status': 'success',
-            'message': f'Loaded {len(measurement_data["timestamp"])} data points from sample file',
-            'data_points': len(measurement_data['timestamp'])
+            'message': f'Loaded {len(measurement_data)} data points from sample file',
+            'data_points': len(measurement_data)
         })
         
     except Exception as e:
         return jsonify({'error': f'Failed to load sample data: {str(e)}'}), 500
 
 @app.route('/api/load/csv', methods=['POST'])
-def load_csv_data():
+def load_csv_data() -> ResponseReturnValue:
     """Load data from uploaded CSV file"""
+    if data_simulator.running:
+        # The acquisition thread or process is the only writer of the buffer while it runs
+        return jsonify({'error': 'Stop the measurement before loading data'}), 409
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -280,64 +661,85 @@ def load_csv_data():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
             
-        if not file.filename.endswith('.csv'):
+        if not (file.filename or '').endswith('.csv'):
             return jsonify({'error': 'File must be a CSV'}), 400
         
-        # Save uploaded file temporarily
-        temp_file = Path('data/temp_upload.csv')
-        temp_file.parent.mkdir(exist_ok=True)
-        file.save(temp_file)
-        
-        # Load data from file
-        load_data_from_csv(temp_file)
-        
-        # Clean up temp file
-        temp_file.unlink()
+        # Parse the upload stream directly, without saving it first
+        summary = load_data_from_csv(file.stream)
         
         return jsonify({
             'status': 'success',
-            'message': f'Loaded {len(measurement_data["timestamp"])} data points from {file.filename}',
-            'data_points': len(measurement_data['timestamp'])
+            'message': f"Loaded {summary['rows']} data points from {file.filename}",
+            'data_points': len(measurement_data),
+            'rows_read': summary['rows']
         })
         
     except Exception as e:
         return jsonify({'error': f'Failed to load CSV data: {str(e)}'}), 500
 
 @app.route('/api/ai/analysis')
-def get_ai_analysis():
-    """Get AI analysis results"""
-    if len(measurement_data['current']) < 10:
+def get_ai_analysis() -> ResponseReturnValue:
+    """Get AI analysis results (conditional: ``If-None-Match`` gets 304 until new data arrives)"""
+    if len(measurement_data) < 10:
         return jsonify({'error': 'Insufficient data for analysis'}), 400
         
-    # Simple AI analysis
-    current_values = np.array(measurement_data['current'])
-    voltage_values = np.array(measurement_data['voltage'])
-    
-    # Calculate statistics
-    analysis = {
-        'current': {
-            'mean': float(np.mean(current_values)),
-            'std': float(np.std(current_values)),
-            'min': float(np.min(current_values)),
-            'max': float(np.max(current_values))
-        },
-        'voltage': {
-            'mean': float(np.mean(voltage_values)),
-            'std': float(np.std(voltage_values)),
-            'min': float(np.min(voltage_values)),
-            'max': float(np.max(voltage_values))
-        },
-        'anomalies': {
-            'current_anomalies': int(np.sum(np.abs(current_values - np.mean(current_values)) > 3 * np.std(current_values))),
-            'voltage_anomalies': int(np.sum(np.abs(voltage_values - np.mean(voltage_values)) > 3 * np.std(voltage_values)))
-        },
-        'quality_score': float(1.0 - (np.std(current_values) / np.mean(current_values)))
-    }
+    body, etag = analysis_cache.get()
+    response = app.response_class(body, mimetype='application/json')
+    # Browsers revalidate on every poll instead of reusing a stale result
+    response.cache_control.no_cache = True
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@app.route('/api/analysis/jobs', methods=['POST'])
+def start_analysis_job() -> ResponseReturnValue:
+    """Start a batch analysis of the stored history on all CPU cores
     
-    return jsonify(analysis)
+    Optional query parameters: ``start``/``end``, ``channels`` and
+    ``chunk_seconds``. Returns 202 with the job; poll its ``Location``.
+    """
+    try:
+        start = parse_time_arg('start')
+        end = parse_time_arg('end')
+        channels = parse_channels_arg()
+        chunk_seconds = float(request.args.get('chunk_seconds', CHUNK_SECONDS))
+        if chunk_seconds <= 0:
+            raise ValueError('chunk_seconds must be positive')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    measurement_store.flush()
+    if not len(measurement_store):
+        return jsonify({'error': 'No stored data to analyze'}), 400
+        
+    arguments = [str(measurement_store.root.resolve()), '--channels', ','.join(channels),
+                 '--chunk-seconds', str(chunk_seconds)]
+    if start is not None:
+        arguments += ['--start', str(start)]
+    if end is not None:
+        arguments += ['--end', str(end)]
+    job = AnalysisJob(arguments)
+    analysis_jobs[job.id] = job
+    finished = [key for key, other in analysis_jobs.items() if other.status != 'running']
+    for key in finished[:max(0, len(analysis_jobs) - ANALYSIS_JOBS_KEPT)]:
+        del analysis_jobs[key]
+    return jsonify(job.as_dict()), 202, {'Location': f'/api/analysis/jobs/{job.id}'}
+
+@app.route('/api/analysis/jobs')
+def list_analysis_jobs() -> ResponseReturnValue:
+    """List batch analysis jobs (without their results)"""
+    return jsonify([job.as_dict(result=False) for job in analysis_jobs.values()])
+
+@app.route('/api/analysis/jobs/<job_id>')
+def get_analysis_job(job_id: str) -> ResponseReturnValue:
+    """Get the state of a batch analysis job, with its result once done"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown analysis job'}), 404
+    return jsonify(job.as_dict())
 
 @app.route('/static/<path:filename>')
-def static_files(filename):
+def static_files(filename: str) -> ResponseReturnValue:
     """Serve static files"""
     return send_from_directory('static', filename)
 
@@ -14,6 +14,15 @@ import time
 import json
 from pathlib import Path
 
+from src.core import MeasurementBuffer
+from src.core.anomaly import AnomalyMonitor
+from src.core.downsample import downsample_columns
+from src.core.ingest import load_csv
+from src.core.simulator import MeasurementSimulator
+
+# Points per chart series (LTTB-decimated from the full buffer)
+CHART_POINTS = 1000
+
 # Page configuration
 st.set_page_config(
     page_title="QuantumMeter Pro",
@@ -51,80 +60,48 @@ st.markdown("""
 
 # Initialize session state
 if 'measurement_data' not in st.session_state:
-    st.session_state.measurement_data = {
-        'timestamp': [],
-        'current': [],
-        'voltage': [],
-        'resistance': [],
-        'temperature': []
-    }
+    st.session_state.measurement_data = MeasurementBuffer()
 if 'measuring' not in st.session_state:
     st.session_state.measuring = False
 if 'device_connected' not in st.session_state:
     st.session_state.device_connected = False
+if 'simulator' not in st.session_state:
+    st.session_state.simulator = MeasurementSimulator()
 
 def load_sample_data():
     """Load sample quantum measurement data"""
     sample_file = Path('data/sample_quantum_data.csv')
     if sample_file.exists():
-        df = pd.read_csv(sample_file)
-        st.session_state.measurement_data = {
-            'timestamp': [datetime.fromisoformat(ts) for ts in df['timestamp']],
-            'current': df['current'].tolist(),
-            'voltage': df['voltage'].tolist(),
-            'resistance': df['resistance'].tolist(),
-            'temperature': df['temperature'].tolist()
-        }
+        data = MeasurementBuffer()
+        load_csv(data, sample_file)
+        st.session_state.measurement_data = data
         return True
     return False
 
 def simulate_quantum_measurement():
-    """Simulate quantum measurement data"""
-    timestamp = datetime.now()
-    
-    # Generate realistic quantum measurement data
-    base_current = 1e-9  # 1 nA base current
-    noise = np.random.normal(0, base_current * 0.01)
-    current = base_current + noise
-    
-    voltage = 1.0 + np.random.normal(0, 0.001)
-    resistance = voltage / current if current != 0 else 1e12
-    temperature = 23.0 + np.random.normal(0, 0.1)
-    
-    return {
-        'timestamp': timestamp,
-        'current': current,
-        'voltage': voltage,
-        'resistance': resistance,
-        'temperature': temperature
-    }
+    """Simulate the next quantum measurement sample as a block of columns"""
+    timestamps = np.array([np.datetime64(datetime.now(), 'ns')])
+    return dict(st.session_state.simulator.generate(timestamps), timestamp=timestamps)
+
+def anomaly_monitor(data):
+    """The session's anomaly detectors for ``data`` (recreated when the buffer is replaced)"""
+    monitor = st.session_state.get('anomaly_monitor')
+    if monitor is None or monitor.buffer is not data:
+        monitor = st.session_state.anomaly_monitor = AnomalyMonitor(data)
+    return monitor
 
 def perform_ai_analysis(data):
     """Perform AI analysis on measurement data"""
-    if not data['current']:
+    if not len(data):
         return None
     
-    current_array = np.array(data['current'])
-    voltage_array = np.array(data['voltage'])
-    
-    # Statistical analysis
-    current_stats = {
-        'mean': np.mean(current_array),
-        'std': np.std(current_array),
-        'min': np.min(current_array),
-        'max': np.max(current_array)
-    }
-    
-    voltage_stats = {
-        'mean': np.mean(voltage_array),
-        'std': np.std(voltage_array),
-        'min': np.min(voltage_array),
-        'max': np.max(voltage_array)
-    }
-    
-    # Anomaly detection (3-sigma rule)
-    current_anomalies = np.sum(np.abs(current_array - current_stats['mean']) > 3 * current_stats['std'])
-    voltage_anomalies = np.sum(np.abs(voltage_array - voltage_stats['mean']) > 3 * voltage_stats['std'])
+    # Statistics are maintained incrementally; the detectors only see new samples
+    summary = data.stats.summary(('current', 'voltage'))
+    monitor = anomaly_monitor(data)
+    monitor.update()
+    detection = monitor.summary()
+    current_stats = summary['current']
+    voltage_stats = summary['voltage']
     
     # Quality score calculation
     current_stability = 1 - (current_stats['std'] / current_stats['mean']) if current_stats['mean'] != 0 else 0
@@ -134,10 +111,8 @@ def perform_ai_analysis(data):
     return {
         'current': current_stats,
         'voltage': voltage_stats,
-        'anomalies': {
-            'current_anomalies': int(current_anomalies),
-            'voltage_anomalies': int(voltage_anomalies)
-        },
+        'anomalies': detection['anomalies'],
+        'change_points': detection['change_points'],
         'quality_score': quality_score
     }
 
@@ -173,8 +148,8 @@ def main():
                 st.error("Sample data file not found")
         
         if st.button("💾 Export Data"):
-            if st.session_state.measurement_data['timestamp']:
-                df = pd.DataFrame(st.session_state.measurement_data)
+            if len(st.session_state.measurement_data):
+                df = pd.DataFrame(st.session_state.measurement_data.view())
                 csv = df.to_csv(index=False)
                 st.download_button(
                     label="📥 Download CSV",
@@ -198,7 +173,7 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     # Real-time metrics
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         latest_idx = -1
         with col1:
             st.metric(
@@ -228,14 +203,16 @@ def main():
             )
     
     # Real-time charts
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("📈 Real-time Measurements")
         
+        chart_data = downsample_columns(st.session_state.measurement_data.view(), CHART_POINTS, 'lttb')
+        
         # Create charts
         fig_current = go.Figure()
         fig_current.add_trace(go.Scatter(
-            x=st.session_state.measurement_data['timestamp'],
-            y=st.session_state.measurement_data['current'],
+            x=chart_data['timestamp'],
+            y=chart_data['current'],
             mode='lines+markers',
             name='Current (A)',
             line=dict(color='#1f77b4', width=2)
@@ -249,8 +226,8 @@ def main():
         
         fig_voltage = go.Figure()
         fig_voltage.add_trace(go.Scatter(
-            x=st.session_state.measurement_data['timestamp'],
-            y=st.session_state.measurement_data['voltage'],
+            x=chart_data['timestamp'],
+            y=chart_data['voltage'],
             mode='lines+markers',
             name='Voltage (V)',
             line=dict(color='#ff7f0e', width=2)
@@ -264,8 +241,8 @@ def main():
         
         fig_resistance = go.Figure()
         fig_resistance.add_trace(go.Scatter(
-            x=st.session_state.measurement_data['timestamp'],
-            y=st.session_state.measurement_data['resistance'],
+            x=chart_data['timestamp'],
+            y=chart_data['resistance'],
             mode='lines+markers',
             name='Resistance (Ω)',
             line=dict(color='#2ca02c', width=2)
@@ -279,8 +256,8 @@ def main():
         
         fig_temperature = go.Figure()
         fig_temperature.add_trace(go.Scatter(
-            x=st.session_state.measurement_data['timestamp'],
-            y=st.session_state.measurement_data['temperature'],
+            x=chart_data['timestamp'],
+            y=chart_data['temperature'],
             mode='lines+markers',
             name='Temperature (°C)',
             line=dict(color='#d62728', width=2)
@@ -304,7 +281,7 @@ def main():
             st.plotly_chart(fig_temperature, use_container_width=True)
     
     # AI Analysis
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("🤖 AI Analysis")
         
         analysis = perform_ai_analysis(st.session_state.measurement_data)
@@ -327,6 +304,7 @@ def main():
                 st.subheader("⚠️ Anomaly Detection")
                 st.metric("Current Anomalies", analysis['anomalies']['current_anomalies'])
                 st.metric("Voltage Anomalies", analysis['anomalies']['voltage_anomalies'])
+                st.metric("Level Changes", sum(analysis['change_points'].values()))
                 st.metric("Quality Score", f"{analysis['quality_score'] * 100:.1f}%")
                 
                 if analysis['quality_score'] > 0.95:
@@ -337,25 +315,16 @@ def main():
                     st.error("🔴 Needs Improvement")
     
     # Data table
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("📋 Measurement Data")
-        df = pd.DataFrame(st.session_state.measurement_data)
+        df = pd.DataFrame(st.session_state.measurement_data.view())
         st.dataframe(df, use_container_width=True)
     
     # Auto-refresh for real-time updates
     if st.session_state.measuring and st.session_state.device_connected:
         time.sleep(1)
         new_data = simulate_quantum_measurement()
-        st.session_state.measurement_data['timestamp'].append(new_data['timestamp'])
-        st.session_state.measurement_data['current'].append(new_data['current'])
-        st.session_state.measurement_data['voltage'].append(new_data['voltage'])
-        st.session_state.measurement_data['resistance'].append(new_data['resistance'])
-        st.session_state.measurement_data['temperature'].append(new_data['temperature'])
-        
-        # Keep only last 100 data points
-        if len(st.session_state.measurement_data['timestamp']) > 100:
-            for key in st.session_state.measurement_data:
-                st.session_state.measurement_data[key] = st.session_state.measurement_data[key][-100:]
+        st.session_state.measurement_data.extend(new_data.pop('timestamp'), **new_data)
         
         st.rerun()
 
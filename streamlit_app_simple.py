@@ -12,6 +12,15 @@ from datetime import datetime, timedelta
 import time
 from pathlib import Path
 
+from src.core import MeasurementBuffer
+from src.core.anomaly import AnomalyMonitor
+from src.core.downsample import downsample_columns
+from src.core.ingest import load_csv
+from src.core.simulator import MeasurementSimulator
+
+# Points per chart series (LTTB-decimated from the full buffer)
+CHART_POINTS = 1000
+
 # Page configuration
 st.set_page_config(
     page_title="QuantumMeter Pro",
@@ -57,31 +66,22 @@ st.markdown("""
 
 # Initialize session state
 if 'measurement_data' not in st.session_state:
-    st.session_state.measurement_data = {
-        'timestamp': [],
-        'current': [],
-        'voltage': [],
-        'resistance': [],
-        'temperature': []
-    }
+    st.session_state.measurement_data = MeasurementBuffer()
 if 'measuring' not in st.session_state:
     st.session_state.measuring = False
 if 'device_connected' not in st.session_state:
     st.session_state.device_connected = False
+if 'simulator' not in st.session_state:
+    st.session_state.simulator = MeasurementSimulator()
 
 def load_sample_data():
     """Load sample quantum measurement data"""
     try:
         sample_file = Path('data/sample_quantum_data.csv')
         if sample_file.exists():
-            df = pd.read_csv(sample_file)
-            st.session_state.measurement_data = {
-                'timestamp': [datetime.fromisoformat(ts) for ts in df['timestamp']],
-                'current': df['current'].tolist(),
-                'voltage': df['voltage'].tolist(),
-                'resistance': df['resistance'].tolist(),
-                'temperature': df['temperature'].tolist()
-            }
+            data = MeasurementBuffer()
+            load_csv(data, sample_file)
+            st.session_state.measurement_data = data
             return True
         else:
             # Generate sample data if file doesn't exist
@@ -93,80 +93,37 @@ def load_sample_data():
 
 def generate_sample_data():
     """Generate sample quantum measurement data"""
-    base_time = datetime.now() - timedelta(seconds=50)
-    data = {
-        'timestamp': [],
-        'current': [],
-        'voltage': [],
-        'resistance': [],
-        'temperature': []
-    }
-    
-    for i in range(50):
-        timestamp = base_time + timedelta(seconds=i)
-        base_current = 1e-9
-        trend = 0.1 * np.sin(i * 0.2)
-        noise = np.random.normal(0, base_current * 0.02)
-        current = base_current * (1 + trend) + noise
-        voltage = 1.0 + np.random.normal(0, 0.001) + (current - base_current) * 1e6
-        resistance = voltage / current if current != 0 else 1e12
-        temperature = 23.0 + 0.1 * np.sin(i * 0.1) + np.random.normal(0, 0.05)
-        
-        data['timestamp'].append(timestamp)
-        data['current'].append(current)
-        data['voltage'].append(voltage)
-        data['resistance'].append(resistance)
-        data['temperature'].append(temperature)
+    simulator = MeasurementSimulator(profile='demo')
+    block = simulator.block(50, 1.0, start=datetime.now() - timedelta(seconds=50))
+    data = MeasurementBuffer()
+    data.extend(block.pop('timestamp'), **block)
     
     st.session_state.measurement_data = data
 
 def simulate_quantum_measurement():
-    """Simulate quantum measurement data"""
-    timestamp = datetime.now()
-    
-    # Generate realistic quantum measurement data
-    base_current = 1e-9  # 1 nA base current
-    noise = np.random.normal(0, base_current * 0.01)
-    current = base_current + noise
-    
-    voltage = 1.0 + np.random.normal(0, 0.001)
-    resistance = voltage / current if current != 0 else 1e12
-    temperature = 23.0 + np.random.normal(0, 0.1)
-    
-    return {
-        'timestamp': timestamp,
-        'current': current,
-        'voltage': voltage,
-        'resistance': resistance,
-        'temperature': temperature
-    }
+    """Simulate the next quantum measurement sample as a block of columns"""
+    timestamps = np.array([np.datetime64(datetime.now(), 'ns')])
+    return dict(st.session_state.simulator.generate(timestamps), timestamp=timestamps)
+
+def anomaly_monitor(data):
+    """The session's anomaly detectors for ``data`` (recreated when the buffer is replaced)"""
+    monitor = st.session_state.get('anomaly_monitor')
+    if monitor is None or monitor.buffer is not data:
+        monitor = st.session_state.anomaly_monitor = AnomalyMonitor(data)
+    return monitor
 
 def perform_ai_analysis(data):
     """Perform AI analysis on measurement data"""
-    if not data['current']:
+    if not len(data):
         return None
     
-    current_array = np.array(data['current'])
-    voltage_array = np.array(data['voltage'])
-    
-    # Statistical analysis
-    current_stats = {
-        'mean': np.mean(current_array),
-        'std': np.std(current_array),
-        'min': np.min(current_array),
-        'max': np.max(current_array)
-    }
-    
-    voltage_stats = {
-        'mean': np.mean(voltage_array),
-        'std': np.std(voltage_array),
-        'min': np.min(voltage_array),
-        'max': np.max(voltage_array)
-    }
-    
-    # Anomaly detection (3-sigma rule)
-    current_anomalies = np.sum(np.abs(current_array - current_stats['mean']) > 3 * current_stats['std'])
-    voltage_anomalies = np.sum(np.abs(voltage_array - voltage_stats['mean']) > 3 * voltage_stats['std'])
+    # Statistics are maintained incrementally; the detectors only see new samples
+    summary = data.stats.summary(('current', 'voltage'))
+    monitor = anomaly_monitor(data)
+    monitor.update()
+    detection = monitor.summary()
+    current_stats = summary['current']
+    voltage_stats = summary['voltage']
     
     # Quality score calculation
     current_stability = 1 - (current_stats['std'] / current_stats['mean']) if current_stats['mean'] != 0 else 0
@@ -176,10 +133,8 @@ def perform_ai_analysis(data):
     return {
         'current': current_stats,
         'voltage': voltage_stats,
-        'anomalies': {
-            'current_anomalies': int(current_anomalies),
-            'voltage_anomalies': int(voltage_anomalies)
-        },
+        'anomalies': detection['anomalies'],
+        'change_points': detection['change_points'],
         'quality_score': quality_score
     }
 
@@ -226,8 +181,8 @@ def main():
                 st.error("Sample data file not found")
         
         if st.button("💾 Export Data"):
-            if st.session_state.measurement_data['timestamp']:
-                df = pd.DataFrame(st.session_state.measurement_data)
+            if len(st.session_state.measurement_data):
+                df = pd.DataFrame(st.session_state.measurement_data.view())
                 csv = df.to_csv(index=False)
                 st.download_button(
                     label="📥 Download CSV",
@@ -251,7 +206,7 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     # Real-time metrics
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         latest_idx = -1
         with col1:
             display_metric_card(
@@ -285,11 +240,11 @@ def main():
             )
     
     # Real-time charts using Streamlit's built-in charting
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("📈 Real-time Measurements")
         
         # Create DataFrame for charts
-        df = pd.DataFrame(st.session_state.measurement_data)
+        df = pd.DataFrame(downsample_columns(st.session_state.measurement_data.view(), CHART_POINTS, 'lttb'))
         
         # Current chart
         st.subheader("⚡ Current Measurement")
@@ -308,7 +263,7 @@ def main():
         st.line_chart(df.set_index('timestamp')['temperature'])
     
     # AI Analysis
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("🤖 AI Analysis")
         
         analysis = perform_ai_analysis(st.session_state.measurement_data)
@@ -331,6 +286,7 @@ def main():
                 st.subheader("⚠️ Anomaly Detection")
                 st.metric("Current Anomalies", analysis['anomalies']['current_anomalies'])
                 st.metric("Voltage Anomalies", analysis['anomalies']['voltage_anomalies'])
+                st.metric("Level Changes", sum(analysis['change_points'].values()))
                 st.metric("Quality Score", f"{analysis['quality_score'] * 100:.1f}%")
                 
                 if analysis['quality_score'] > 0.95:
@@ -341,43 +297,36 @@ def main():
                     st.error("🔴 Needs Improvement")
     
     # Data table
-    if st.session_state.measurement_data['timestamp']:
+    if len(st.session_state.measurement_data):
         st.header("📋 Measurement Data")
-        df = pd.DataFrame(st.session_state.measurement_data)
+        df = pd.DataFrame(st.session_state.measurement_data.view())
         st.dataframe(df, use_container_width=True)
         
         # Summary statistics
         st.subheader("📊 Summary Statistics")
         col1, col2 = st.columns(2)
+        current_stats = st.session_state.measurement_data.stats['current']
+        voltage_stats = st.session_state.measurement_data.stats['voltage']
         
         with col1:
             st.write("**Current Statistics:**")
-            st.write(f"- Mean: {df['current'].mean():.2e} A")
-            st.write(f"- Std Dev: {df['current'].std():.2e} A")
-            st.write(f"- Min: {df['current'].min():.2e} A")
-            st.write(f"- Max: {df['current'].max():.2e} A")
+            st.write(f"- Mean: {current_stats.mean:.2e} A")
+            st.write(f"- Std Dev: {current_stats.std:.2e} A")
+            st.write(f"- Min: {current_stats.min:.2e} A")
+            st.write(f"- Max: {current_stats.max:.2e} A")
         
         with col2:
             st.write("**Voltage Statistics:**")
-            st.write(f"- Mean: {df['voltage'].mean():.6f} V")
-            st.write(f"- Std Dev: {df['voltage'].std():.6f} V")
-            st.write(f"- Min: {df['voltage'].min():.6f} V")
-            st.write(f"- Max: {df['voltage'].max():.6f} V")
+            st.write(f"- Mean: {voltage_stats.mean:.6f} V")
+            st.write(f"- Std Dev: {voltage_stats.std:.6f} V")
+            st.write(f"- Min: {voltage_stats.min:.6f} V")
+            st.write(f"- Max: {voltage_stats.max:.6f} V")
     
     # Auto-refresh for real-time updates
     if st.session_state.measuring and st.session_state.device_connected:
         time.sleep(1)
         new_data = simulate_quantum_measurement()
-        st.session_state.measurement_data['timestamp'].append(new_data['timestamp'])
-        st.session_state.measurement_data['current'].append(new_data['current'])
-        st.session_state.measurement_data['voltage'].append(new_data['voltage'])
-        st.session_state.measurement_data['resistance'].append(new_data['resistance'])
-        st.session_state.measurement_data['temperature'].append(new_data['temperature'])
-        
-        # Keep only last 100 data points
-        if len(st.session_state.measurement_data['timestamp']) > 100:
-            for key in st.session_state.measurement_data:
-                st.session_state.measurement_data[key] = st.session_state.measurement_data[key][-100:]
+        st.session_state.measurement_data.extend(new_data.pop('timestamp'), **new_data)
         
         st.rerun()
 
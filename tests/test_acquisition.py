@@ -0,0 +1,105 @@
+"""
+Acquisition scheduler deadlines: slow reads skip ticks without shifting the grid
+"""
+
+import asyncio
+
+import numpy as np
+
+from src.core.acquisition import AcquisitionScheduler
+from src.drivers import MeasurementDriver
+
+RATE = 100.0
+INTERVAL = 0.05
+DEVICE = 'meter'
+
+
+class SlowSource(MeasurementDriver):
+    """Records when each read starts; read ``k`` takes ``delays.get(k, 0.005)`` s
+
+    Stops the scheduler after ``reads`` reads; read numbers in ``failures`` raise.
+    """
+
+    def __init__(self, reads, delays=None, failures=()):
+        super().__init__()
+        self.reads = reads
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.scheduler = None
+        self.started = []
+        self.requested = []
+
+    async def read(self, timestamps):
+        index = len(self.started)
+        self.started.append(asyncio.get_running_loop().time())
+        self.requested.append(timestamps)
+        await asyncio.sleep(self.delays.get(index, 0.005))
+        if index + 1 == self.reads:
+            self.scheduler.stop()
+        if index in self.failures:
+            raise IOError('device busy')
+        return {'current': np.arange(len(timestamps), dtype=np.float64)}
+
+
+def acquire(source, **options):
+    scheduler = AcquisitionScheduler({DEVICE: {'sampling_rate': RATE}}, block_interval=INTERVAL,
+                                     sources={DEVICE: source}, **options)
+    source.scheduler = scheduler
+    asyncio.run(scheduler.run())
+    return scheduler
+
+
+def ticks(source):
+    """Grid deadline of every read, counted from the first; fails if a read is off the grid"""
+    offsets = (np.array(source.started) - source.started[0]) / INTERVAL
+    ticks = np.round(offsets).astype(np.int64)
+    # Reads wake within a fraction of an interval of their deadline, however
+    # many reads came before (drift would accumulate 10% of an interval per read)
+    assert np.all(np.abs(offsets - ticks) < 0.3), offsets
+    return ticks
+
+
+def test_slow_reads_skip_deadlines_without_drift():
+    # Read 2 takes 2.5 intervals (two deadlines pass), read 5 takes 1.2 (one passes)
+    source = SlowSource(reads=14, delays={2: 2.5 * INTERVAL, 5: 1.2 * INTERVAL})
+    scheduler = acquire(source)
+
+    grid = ticks(source)
+    skipped = np.diff(grid) - 1
+    assert np.array_equal(np.flatnonzero(skipped), [2, 5])
+    assert skipped[2] == 2 and skipped[5] == 1
+    assert scheduler.missed == {DEVICE: 3}
+    assert grid[-1] == 13 + 3
+
+
+def test_every_sample_is_read_once_on_the_timestamp_grid():
+    source = SlowSource(reads=10, delays={3: 3.4 * INTERVAL})
+    scheduler = acquire(source)
+
+    requested = np.concatenate(source.requested)
+    period = np.timedelta64(int(1e9 / RATE), 'ns')
+    assert np.array_equal(requested, requested[0] + np.arange(len(requested)) * period)
+    # Samples due during the slow read arrive in the next block
+    sizes = [len(block) for block in source.requested]
+    assert sizes[4] > 3 * sizes[2]
+    # Every sample due by the last read was requested
+    elapsed = source.started[-1] - source.started[0]
+    assert abs(len(requested) - (int(elapsed * RATE) + 1)) <= 1
+
+    buffer = scheduler.buffers[DEVICE]
+    assert np.array_equal(buffer['timestamp'], requested)
+    assert scheduler.missed[DEVICE] == 3
+
+
+def test_failed_reads_keep_the_schedule():
+    errors = []
+    source = SlowSource(reads=8, failures=(2, 3))
+    scheduler = acquire(source, on_error=lambda device_id, error: errors.append((device_id, str(error))))
+
+    assert np.array_equal(ticks(source), np.arange(8))
+    assert scheduler.missed[DEVICE] == 0
+    assert errors == [(DEVICE, 'device busy')] * 2
+    assert isinstance(scheduler.errors[DEVICE], IOError)
+    # The samples of the failed reads are lost; the others are buffered
+    delivered = np.concatenate([block for index, block in enumerate(source.requested) if index not in (2, 3)])
+    assert np.array_equal(scheduler.buffers[DEVICE]['timestamp'], delivered)
@@ -0,0 +1,117 @@
+"""
+Anomaly detectors: per-sample, block-wise and whole-recording modes give identical flags
+"""
+
+import numpy as np
+import pytest
+
+from src.core.anomaly import DETECTORS, AnomalyMonitor, RollingMADDetector, create_detector
+from src.core.buffer import MeasurementBuffer
+
+SPLITS = [[3000], [1] * 40 + [2960], [0, 5, 250, 1, 1744, 1000]]
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def signal(count=3000, seed=0):
+    """Noise with spikes, a level shift and a NaN gap"""
+    rng = np.random.default_rng(seed)
+    values = 1e-6 * (1 + 0.01 * rng.standard_normal(count))
+    values[rng.choice(count, 15, replace=False)] *= 1.5
+    values[2000:] += 5e-8
+    values[1200:1210] = np.nan
+    return values
+
+
+def split(values, sizes):
+    edges = np.cumsum(sizes)
+    return np.split(values, edges[edges < len(values)])
+
+
+CASES = [('mad', {}), ('mad', {'window': 5, 'min_samples': 3}), ('mad', {'window': 1}),
+         ('ewma', {}), ('ewma', {'alpha': 0.3, 'min_samples': 0}), ('cusum', {}), ('cusum', {'warmup': 2})]
+
+
+@pytest.mark.parametrize('kind, params', CASES)
+@pytest.mark.parametrize('sizes', SPLITS)
+def test_update_process_and_apply_agree(kind, params, sizes):
+    values = signal()
+    single = create_detector(kind, **params)
+    expected = np.array([single.update(value) for value in values])
+    assert not expected[np.isnan(values)].any()
+
+    stream = create_detector(kind, **params)
+    streamed = np.concatenate([stream.process(block) for block in split(values, sizes)])
+    assert np.array_equal(streamed, expected)
+    assert np.array_equal(stream.apply(values), expected)
+
+
+def test_mad_matches_direct_definition():
+    values = signal()
+    detector = RollingMADDetector(window=21, threshold=3.5, min_samples=5)
+    finite = values[~np.isnan(values)]
+    expected = np.zeros(len(finite), dtype=bool)
+    for index in range(5, len(finite)):
+        window = finite[max(0, index - 21):index]
+        median = np.median(window)
+        expected[index] = abs(finite[index] - median) > 3.5 * 1.4826 * np.median(np.abs(window - median))
+    assert np.array_equal(detector.apply(values)[~np.isnan(values)], expected)
+
+
+@pytest.mark.parametrize('kind', ['mad', 'ewma'])
+def test_outlier_detectors_find_spikes(kind):
+    values = 1e-6 * (1 + 0.001 * np.random.default_rng(1).standard_normal(2000))
+    spikes = np.arange(300, 2000, 250)
+    values[spikes] *= 1.1
+    flags = create_detector(kind).apply(values)
+    # Every spike is caught; pure noise only rarely crosses the threshold
+    assert flags[spikes].all()
+    assert np.count_nonzero(flags) < len(spikes) + 10
+
+
+def test_cusum_flags_a_level_shift_once():
+    values = 1e-6 * (1 + 0.001 * np.random.default_rng(2).standard_normal(4000))
+    values[2500:] += 2e-9
+    alarms = np.flatnonzero(create_detector('cusum').apply(values))
+    assert len(alarms) == 1 and 2500 <= alarms[0] < 2520
+
+
+def test_apply_leaves_the_stream_state_alone():
+    values = signal()
+    detector = create_detector('ewma')
+    first = detector.process(values[:1500])
+    detector.apply(values[::-1])
+    assert np.array_equal(np.concatenate((first, detector.process(values[1500:]))),
+                          create_detector('ewma').apply(values))
+
+
+def test_unknown_detector_lists_the_available_ones():
+    with pytest.raises(ValueError, match=', '.join(DETECTORS)):
+        create_detector('isolation_forest')
+
+
+def test_errors_raised_by_a_detector_are_not_reported_as_unknown(monkeypatch):
+    def broken(**params):
+        return {}['window']
+
+    monkeypatch.setitem(DETECTORS, 'broken', broken)
+    with pytest.raises(KeyError, match='window'):
+        create_detector('broken')
+
+
+def test_monitor_counts_match_apply():
+    values = signal(5000)
+    buffer = MeasurementBuffer(capacity=8192, channels=('current', 'voltage'))
+    monitor = AnomalyMonitor(buffer, recent=10)
+    timestamps = ORIGIN + np.arange(len(values)) * np.timedelta64(1, 'ms')
+    for rows in split(np.arange(len(values)), [1, 999, 2500, 1500]):
+        buffer.extend(timestamps[rows], current=values[rows], voltage=2 * values[rows])
+        monitor.update()
+
+    summary = monitor.summary()
+    for kind in DETECTORS:
+        flags = create_detector(kind).apply(values)
+        assert summary['detectors']['current'][kind] == np.count_nonzero(flags)
+    outliers = create_detector('mad').apply(values) | create_detector('ewma').apply(values)
+    assert summary['anomalies']['current_anomalies'] == np.count_nonzero(outliers)
+    assert summary['change_points']['current'] == np.count_nonzero(create_detector('cusum').apply(values))
+    assert len(summary['recent_anomalies']) == 10
@@ -0,0 +1,125 @@
+"""
+Batch analysis: chunked, merged results against single-pass statistics of the whole range
+"""
+
+import numpy as np
+import pytest
+
+from src.core import batch
+from src.core.batch import analyze_recording, plan_chunks
+from src.core.recording import Recording
+from src.core.storage import SegmentStore
+
+CHANNELS = ('current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+RATE = 10.0
+HOURS = 2
+
+
+@pytest.fixture(scope='module')
+def recorded(tmp_path_factory):
+    """Two hours at 10 Hz with a drift, spikes and gaps, stored in half-hour segments"""
+    rng = np.random.default_rng(0)
+    count = int(HOURS * 3600 * RATE)
+    seconds = np.arange(count) / RATE
+    data = {'timestamp': ORIGIN + (seconds * 1e9).astype('timedelta64[ns]'),
+            'current': 1e-9 * (1 + 0.01 * rng.standard_normal(count) + 0.002 * seconds / 3600),
+            'voltage': 1.0 + 0.001 * rng.standard_normal(count)}
+    spikes = rng.choice(count, 50, replace=False)
+    data['current'][spikes] += 1e-10 * rng.choice([-1, 1], 50)
+    data['voltage'][rng.random(count) < 0.01] = np.nan
+    root = tmp_path_factory.mktemp('batch') / 'store'
+    store = SegmentStore(root, channels=CHANNELS, segment_seconds=1800, aggregates=False)
+    store.append(data['timestamp'], **{name: data[name] for name in CHANNELS})
+    store.close()
+    return root, data
+
+
+def single_pass(data, name, threshold=3.0, bins=64):
+    """Statistics of one channel computed directly over all rows"""
+    values = data[name]
+    finite = ~np.isnan(values)
+    seconds = (data['timestamp'][finite] - data['timestamp'][0]) / np.timedelta64(1, 's')
+    values = values[finite]
+    mean, std = values.mean(), values.std()
+    return {
+        'count': len(values), 'mean': mean, 'variance': values.var(),
+        'min': values.min(), 'max': values.max(),
+        'drift_per_hour': np.polyfit(seconds, values, 1)[0] * 3600,
+        'anomalies': int(np.count_nonzero(np.abs(values - mean) > threshold * std)),
+        'histogram': np.histogram(values, np.histogram_bin_edges(np.array([values.min(), values.max()]), bins)),
+    }
+
+
+def check(result, data):
+    assert result['rows'] == len(data['timestamp'])
+    assert result['start'] == str(data['timestamp'][0].astype('datetime64[us]'))
+    assert result['end'] == str(data['timestamp'][-1].astype('datetime64[us]'))
+    for name in CHANNELS:
+        summary, expected = result['channels'][name], single_pass(data, name)
+        assert summary['count'] == expected['count']
+        assert summary['min'] == expected['min'] and summary['max'] == expected['max']
+        assert summary['mean'] == pytest.approx(expected['mean'], rel=1e-12)
+        assert summary['std'] ** 2 == pytest.approx(expected['variance'], rel=1e-9)
+        assert summary['drift_per_hour'] == pytest.approx(expected['drift_per_hour'], rel=1e-6)
+        assert summary['anomalies'] == expected['anomalies']
+        counts, edges = expected['histogram']
+        np.testing.assert_allclose(summary['histogram']['edges'], edges, rtol=1e-12)
+        assert summary['histogram']['counts'] == counts.tolist()
+
+
+@pytest.mark.parametrize('chunk_seconds', [600, 1234.5, 10**6])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merged_chunks_equal_a_single_pass(recorded, chunk_seconds, workers):
+    root, data = recorded
+    result = analyze_recording(root, chunk_seconds=chunk_seconds, workers=workers)
+    check(result, data)
+    assert len(result['chunks']) == -(-HOURS * 3600 // chunk_seconds)
+    assert result['workers'] == min(workers, len(result['chunks']))
+    assert sum(chunk['rows'] for chunk in result['chunks']) == len(data['timestamp'])
+
+
+def test_the_drift_and_spikes_are_found(recorded):
+    root, data = recorded
+    current = analyze_recording(root, chunk_seconds=900, workers=1)['channels']['current']
+    assert current['drift_per_hour'] == pytest.approx(2e-12, rel=0.1)
+    assert current['anomalies'] >= 40
+
+
+def test_small_blocks_and_a_time_range(recorded, monkeypatch):
+    root, data = recorded
+    monkeypatch.setattr(batch, 'BLOCK_ROWS', 777)
+    start, end = '2024-08-20T22:20:00.05', '2024-08-20T23:40:00'
+    done = []
+    result = analyze_recording(root, start, end, channels=('voltage',), chunk_seconds=1000, workers=1,
+                               progress=lambda *counts: done.append(counts))
+    mask = (data['timestamp'] >= np.datetime64(start, 'ns')) & (data['timestamp'] <= np.datetime64(end, 'ns'))
+    in_range = {key: values[mask] for key, values in data.items()}
+    assert list(result['channels']) == ['voltage']
+    summary, expected = result['channels']['voltage'], single_pass(in_range, 'voltage')
+    assert summary['count'] == expected['count'] and summary['anomalies'] == expected['anomalies']
+    assert summary['mean'] == pytest.approx(expected['mean'], rel=1e-12)
+    assert summary['std'] ** 2 == pytest.approx(expected['variance'], rel=1e-9)
+    chunks = len(result['chunks'])
+    assert done == [(index, 2 * chunks) for index in range(1, 2 * chunks + 1)]
+
+
+def test_plan_chunks_covers_the_range_once(recorded):
+    root, data = recorded
+    recording = Recording.open(root)
+    chunks = plan_chunks(recording, chunk_seconds=1800)
+    assert chunks == [(0, 18000), (18000, 36000), (36000, 54000), (54000, 72000)]
+    assert plan_chunks(recording, '2024-08-21T00:00:00', None) == []
+    assert plan_chunks(recording, '2024-08-20T22:59:59.85', '2024-08-20T23:00:00.15', 0.1) == [
+        (35999, 36000), (36000, 36001), (36001, 36002)]
+
+
+def test_empty_ranges_and_bad_arguments(recorded):
+    root, data = recorded
+    result = analyze_recording(root, start='2024-08-21T00:00:00', workers=1)
+    assert result['rows'] == 0 and result['chunks'] == [] and result['start'] is None
+    assert result['channels']['current']['count'] == 0 and result['channels']['current']['histogram'] is None
+    with pytest.raises(ValueError, match='chunk_seconds'):
+        analyze_recording(root, chunk_seconds=0)
+    with pytest.raises(ValueError, match='Unknown channels: pressure'):
+        analyze_recording(root, channels=('current', 'pressure'))
@@ -0,0 +1,200 @@
+"""
+Ring buffer reads: wraparound, empty buffers, cursors and time ranges
+"""
+
+import numpy as np
+import pytest
+
+from src.core.buffer import MeasurementBuffer
+
+CHANNELS = ('current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def timestamps(start, stop):
+    """Row ``k`` is stamped ORIGIN + k ms"""
+    return ORIGIN + np.arange(start, stop) * np.timedelta64(1, 'ms')
+
+
+def fill(buffer, start, stop, sizes=None):
+    """Append rows ``start..stop`` (current == k, voltage == -k) in blocks of ``sizes``"""
+    edges = np.cumsum(sizes or [stop - start])
+    for rows in np.split(np.arange(start, stop), edges[edges < stop - start]):
+        values = rows.astype(np.float64)
+        buffer.extend(timestamps(rows[0], rows[-1] + 1), current=values, voltage=-values)
+
+
+def assert_rows(data, start, stop):
+    assert list(data) == ['timestamp', *CHANNELS]
+    assert np.array_equal(data['timestamp'], timestamps(start, stop))
+    assert np.array_equal(data['current'], np.arange(start, stop))
+    assert np.array_equal(data['voltage'], -np.arange(start, stop))
+
+
+def new_buffer(capacity=100):
+    return MeasurementBuffer(capacity=capacity, channels=CHANNELS)
+
+
+@pytest.mark.parametrize('sizes', [[1] * 250, [7] * 36, [99, 1, 100, 50], [250], [30, 220]])
+def test_wraparound_keeps_the_newest_capacity_rows(sizes):
+    buffer = new_buffer()
+    fill(buffer, 0, 250, sizes)
+    assert len(buffer) == 100 and buffer.total == 250
+    assert_rows(buffer.view(), 150, 250)
+    assert_rows(buffer.view(30), 220, 250)
+    assert np.array_equal(buffer['current'], np.arange(150, 250))
+
+
+def test_single_appends_wrap_like_blocks():
+    buffer = new_buffer(capacity=3)
+    for row in range(5):
+        buffer.append(timestamps(row, row + 1)[0], current=float(row), voltage=-float(row))
+    assert_rows(buffer.view(), 2, 5)
+    assert buffer.latest() == {'timestamp': timestamps(4, 5)[0], 'current': 4.0, 'voltage': -4.0}
+
+
+def test_views_are_read_only_and_copies_are_not():
+    buffer = new_buffer()
+    fill(buffer, 0, 10)
+    with pytest.raises(ValueError):
+        buffer.view()['current'][0] = 1.0
+    copy = buffer.view(copy=True)
+    copy['current'][0] = 1.0
+    assert buffer['current'][0] == 0.0
+
+
+def test_missing_channels_are_nan_and_lengths_are_checked():
+    buffer = new_buffer()
+    buffer.extend(timestamps(0, 3), current=[1.0, 2.0, 3.0])
+    buffer.append(timestamps(3, 4)[0], voltage=4.0)
+    assert np.isnan(buffer['voltage'][:3]).all() and np.isnan(buffer['current'][3])
+    with pytest.raises(ValueError, match="column 'voltage' has 2 values, expected 3"):
+        buffer.extend(timestamps(4, 7), voltage=[1.0, 2.0])
+    with pytest.raises(ValueError):
+        MeasurementBuffer(capacity=0)
+
+
+def test_empty_buffer():
+    buffer = new_buffer()
+    for data in (buffer.view(), buffer.view(5, copy=True), buffer.since(0)[0], buffer.between(),
+                 buffer.between('2024-08-20T22:00:00', '2024-08-21T00:00:00')):
+        assert_rows(data, 0, 0)
+        assert data['timestamp'].dtype == np.dtype('datetime64[ns]')
+    assert buffer.since(0)[1] == 0
+    assert list(buffer.chunks(10)) == []
+    assert buffer.latest() is None
+    assert len(buffer) == 0 and buffer.total == 0
+
+    fill(buffer, 0, 10)
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.total == 10 and buffer.cleared_at == 10
+    assert buffer.latest() is None and list(buffer.chunks(10)) == []
+    assert_rows(buffer.between(), 0, 0)
+
+
+def test_since_returns_new_rows_and_advances_the_cursor():
+    buffer = new_buffer()
+    fill(buffer, 0, 40)
+    data, cursor = buffer.since(0)
+    assert_rows(data, 0, 40)
+    assert cursor == 40
+    fill(buffer, 40, 55)
+    data, cursor = buffer.since(cursor)
+    assert_rows(data, 40, 55)
+    assert cursor == 55
+    data, cursor = buffer.since(cursor)
+    assert_rows(data, 55, 55)
+    assert cursor == 55
+    # ``limit`` keeps the newest rows and still moves the cursor to the end
+    data, cursor = buffer.since(10, limit=5)
+    assert_rows(data, 50, 55)
+    assert cursor == 55
+
+
+def test_since_with_a_stale_cursor_skips_evicted_and_cleared_rows():
+    buffer = new_buffer()
+    fill(buffer, 0, 40)
+    cursor = buffer.total
+    # The reader fell behind by more than the capacity
+    fill(buffer, 40, 300, [60] * 5)
+    data, cursor = buffer.since(cursor, copy=True)
+    assert_rows(data, 200, 300)
+    assert cursor == 300
+
+    fill(buffer, 300, 320)
+    buffer.clear()
+    fill(buffer, 320, 330)
+    data, cursor = buffer.since(cursor)
+    assert_rows(data, 320, 330)
+    assert cursor == 330
+    # A cursor from the future (another buffer) returns nothing
+    data, cursor = buffer.since(10**6)
+    assert_rows(data, 0, 0)
+    assert cursor == 330
+
+
+@pytest.mark.parametrize('start, end, first, last', [
+    (None, None, 150, 250),
+    (160, 170, 160, 171),          # both bounds on samples are included
+    (159.5, 170.5, 160, 171),      # bounds between samples
+    (160, 160, 160, 161),          # one sample
+    (160.2, 160.8, 0, 0),          # no sample in range
+    (0, 155, 150, 156),            # start before the oldest retained row
+    (245, 10**6, 245, 250),        # end after the newest
+    (None, 149, 0, 0),             # only evicted rows
+    (200, 199, 0, 0),              # reversed range
+])
+def test_between_selects_the_inclusive_time_range(start, end, first, last):
+    def at(row):
+        return None if row is None else ORIGIN + np.timedelta64(int(row * 1e6), 'ns')
+
+    buffer = new_buffer()
+    fill(buffer, 0, 250, [70] * 4)
+    for copy in (False, True):
+        assert_rows(buffer.between(at(start), at(end), copy=copy), first, last)
+
+
+def test_between_limit_and_channel_selection():
+    buffer = new_buffer()
+    fill(buffer, 0, 250)
+    assert_rows(buffer.between(timestamps(160, 161)[0], timestamps(199, 200)[0], limit=10), 190, 200)
+    assert_rows(buffer.between(limit=1000), 150, 250)
+    assert_rows(buffer.between(limit=0), 0, 0)
+    data = buffer.between(timestamps(200, 201)[0], channels=('voltage',))
+    assert list(data) == ['timestamp', 'voltage']
+    assert np.array_equal(data['voltage'], -np.arange(200, 250))
+    # Strings are accepted as bounds
+    assert len(buffer.between('2024-08-20T22:00:00.2', '2024-08-20T22:00:00.209')['current']) == 10
+
+
+@pytest.mark.parametrize('size', [1, 7, 100, 1000])
+def test_chunks_cover_the_retained_rows_in_order(size):
+    buffer = new_buffer()
+    fill(buffer, 0, 250, [33] * 8)
+    chunks = list(buffer.chunks(size))
+    assert all(0 < len(chunk['timestamp']) <= size for chunk in chunks)
+    assert_rows({key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}, 150, 250)
+    assert list(buffer.chunks(size, channels=('current',)))[0].keys() == {'timestamp', 'current'}
+
+
+def test_chunks_skip_rows_evicted_during_iteration():
+    buffer = new_buffer()
+    fill(buffer, 0, 100)
+    chunks = buffer.chunks(30)
+    assert_rows(next(chunks), 0, 30)
+    # 45 new rows evict rows 0..44; chunks stop at the rows held when iteration started
+    fill(buffer, 100, 145)
+    rest = list(chunks)
+    assert_rows({key: np.concatenate([chunk[key] for chunk in rest]) for key in rest[0]}, 45, 100)
+    # Writes never change a chunk already handed out
+    chunk = next(buffer.chunks(10))
+    fill(buffer, 145, 400)
+    assert_rows(chunk, 45, 55)
+
+
+def test_latest_is_the_newest_row():
+    buffer = new_buffer()
+    fill(buffer, 0, 123)
+    assert buffer.latest() == {'timestamp': timestamps(122, 123)[0], 'current': 122.0, 'voltage': -122.0}
+    fill(buffer, 123, 124)
+    assert buffer.latest()['current'] == 123.0
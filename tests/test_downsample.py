@@ -0,0 +1,84 @@
+"""
+Chart downsampling: LTTB and min/max bucket selections
+"""
+
+import numpy as np
+import pytest
+
+from src.core.downsample import METHODS, downsample_columns, lttb, lttb_indices, minmax_indices
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def series(count, seed=0):
+    timestamps = ORIGIN + np.arange(count) * np.timedelta64(1, 'ms')
+    values = np.sin(np.arange(count) / 50.0) + 0.1 * np.random.default_rng(seed).standard_normal(count)
+    return timestamps, values
+
+
+@pytest.mark.parametrize('count, points', [(10000, 1000), (1001, 1000), (500, 3), (7, 5)])
+def test_lttb_keeps_endpoints_and_size(count, points):
+    timestamps, values = series(count)
+    indices = lttb_indices(timestamps, values, points)
+    assert len(indices) == points
+    assert indices[0] == 0 and indices[-1] == count - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize('points', [2, 1000, 5000])
+def test_lttb_returns_short_series_unchanged(points):
+    timestamps, values = series(1000)
+    x, y = lttb(timestamps, values, points)
+    assert np.array_equal(x, timestamps) and np.array_equal(y, values)
+
+
+def test_lttb_picks_an_isolated_spike():
+    timestamps, values = series(10000)
+    values[4321] = 100.0
+    assert 4321 in lttb_indices(timestamps, values, 200)
+
+
+def test_lttb_tolerates_nan_gaps():
+    timestamps, values = series(5000)
+    values[1000:1500] = np.nan
+    indices = lttb_indices(timestamps, values, 100)
+    assert len(indices) == 100 and indices[0] == 0 and indices[-1] == 4999
+
+
+@pytest.mark.parametrize('count, points', [(10000, 1000), (10001, 999), (2500, 10)])
+def test_minmax_keeps_every_bucket_extreme(count, points):
+    _, values = series(count)
+    indices = minmax_indices(values, points)
+    assert len(indices) <= points
+    assert np.all(np.diff(indices) > 0)
+    assert values.argmin() in indices and values.argmax() in indices
+    # Each selected point is an extreme of its bucket, so the envelope survives
+    assert values[indices].min() == values.min() and values[indices].max() == values.max()
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_columns_share_rows(method):
+    timestamps, values = series(20000)
+    data = {'timestamp': timestamps, 'current': values, 'voltage': -values[::-1].copy()}
+    result = downsample_columns(data, 500, method)
+    rows = np.flatnonzero(np.isin(timestamps, result['timestamp']))
+    assert len(rows) == len(result['timestamp']) <= 2 * 500
+    for key in data:
+        assert np.array_equal(result[key], data[key][rows])
+    if method == 'minmax':
+        for key in ('current', 'voltage'):
+            assert (result[key].min(), result[key].max()) == (data[key].min(), data[key].max())
+    else:
+        assert result['timestamp'][0] == timestamps[0] and result['timestamp'][-1] == timestamps[-1]
+
+
+def test_columns_below_the_limit_are_returned_as_is():
+    timestamps, values = series(100)
+    data = {'timestamp': timestamps, 'current': values}
+    assert downsample_columns(data, 1000) is data
+
+
+def test_unknown_method_raises():
+    timestamps, values = series(2000)
+    with pytest.raises(ValueError, match='Unknown downsampling method'):
+        downsample_columns({'timestamp': timestamps, 'current': values}, 100, 'average')
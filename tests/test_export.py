@@ -0,0 +1,217 @@
+"""
+Chunked exporters: CSV formatting, streamed exports and file round trips
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import export
+from src.core.export import EXPORTERS, export_chunks, format_csv, get_exporter, stream_export
+
+COLUMNS = ('timestamp', 'current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def data(count=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    current = 1e-9 * (1 + 0.01 * rng.standard_normal(count))
+    current[::13] = np.nan
+    return {
+        'timestamp': ORIGIN + (np.arange(count) * 1234567).astype('timedelta64[ns]'),
+        'current': current,
+        'voltage': rng.standard_normal(count) * 10.0 ** rng.integers(-300, 300, count),
+    }
+
+
+def split(columns, size):
+    count = len(columns['timestamp'])
+    return [{key: values[row:row + size] for key, values in columns.items()} for row in range(0, count, size)]
+
+
+def test_format_csv_round_trips_floats_and_writes_nan_as_empty():
+    block = data(50)
+    lines = format_csv(block, COLUMNS).splitlines()
+    assert len(lines) == 50
+    for row, line in enumerate(lines):
+        timestamp, current, voltage = line.split(',')
+        assert timestamp == str(block['timestamp'][row].astype('datetime64[us]'))
+        if np.isnan(block['current'][row]):
+            assert current == ''
+        else:
+            assert float(current) == block['current'][row]
+        assert float(voltage) == block['voltage'][row]
+
+
+def test_format_csv_selects_columns_and_handles_empty_blocks():
+    block = data(3)
+    assert format_csv(block, ('voltage',)).splitlines() == [repr(value) for value in block['voltage'].tolist()]
+    assert format_csv({key: values[:0] for key, values in block.items()}, COLUMNS) == ''
+    assert format_csv(block, ()) == ''
+
+
+@pytest.mark.parametrize('size', [1, 7, 1000, 5000])
+def test_streamed_csv_reads_back(size):
+    columns = data()
+    content = b''.join(stream_export(split(columns, size), 'csv', COLUMNS))
+    frame = pd.read_csv(io.BytesIO(content), parse_dates=['timestamp'], float_precision='round_trip')
+    assert list(frame.columns) == list(COLUMNS)
+    assert np.array_equal(frame['timestamp'].to_numpy(), columns['timestamp'].astype('datetime64[us]'))
+    for name in COLUMNS[1:]:
+        np.testing.assert_array_equal(frame[name].to_numpy(), columns[name])
+
+
+def test_stream_yields_while_chunks_are_produced():
+    produced = []
+
+    def chunks():
+        for chunk in split(data(), 100):
+            produced.append(len(chunk['timestamp']))
+            yield chunk
+
+    stream = stream_export(chunks(), 'csv', COLUMNS)
+    first = next(stream)
+    # Header and the first chunk are out before the rest is read
+    assert first.startswith(b'timestamp,current,voltage\n')
+    assert len(produced) == 1
+    rest = list(stream)
+    assert len(produced) == 10 and len(rest) >= 9
+
+
+def test_stream_matches_the_written_file(tmp_path):
+    columns = data()
+    path = tmp_path / 'export.csv'
+    assert export_chunks(split(columns, 300), path, 'csv', COLUMNS) == 1000
+    assert path.read_bytes() == b''.join(stream_export(split(columns, 300), 'csv', COLUMNS))
+
+
+def test_empty_export_has_only_the_header():
+    assert b''.join(stream_export([], 'csv', COLUMNS)) == b'timestamp,current,voltage\n'
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError, match="Unknown export format 'xlsx'"):
+        get_exporter('xlsx')
+    with pytest.raises(ValueError):
+        list(stream_export([], 'xlsx', COLUMNS))
+
+
+def read_arrow_table(table):
+    import pyarrow as pa
+
+    assert table.schema.names == list(COLUMNS)
+    assert table.schema.field('timestamp').type == pa.timestamp('ns')
+    assert all(table.schema.field(name).type == pa.float64() for name in COLUMNS[1:])
+    return {name: table.column(name).to_numpy() for name in COLUMNS}
+
+
+def read_parquet(path):
+    import pyarrow.parquet as pq
+
+    return read_arrow_table(pq.read_table(path))
+
+
+def read_arrow(path):
+    import pyarrow as pa
+
+    with pa.memory_map(str(path)) as source:
+        return read_arrow_table(pa.ipc.open_file(source).read_all())
+
+
+def read_hdf5(path):
+    import h5py
+
+    with h5py.File(path, 'r') as fh:
+        assert fh['timestamp'].dtype == np.int64 and fh['timestamp'].attrs['unit'].startswith('ns')
+        columns = {name: fh[name][:] for name in COLUMNS}
+    columns['timestamp'] = columns['timestamp'].view('datetime64[ns]')
+    return columns
+
+
+def from_rows(rows):
+    """Columns of text/spreadsheet rows: microsecond timestamps, None as NaN"""
+    fields = list(zip(*rows)) or [()] * len(COLUMNS)
+    columns = {'timestamp': np.array(fields[0], dtype='datetime64[us]')}
+    for name, values in zip(COLUMNS[1:], fields[1:]):
+        columns[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return columns
+
+
+def read_json(path):
+    rows = json.loads(path.read_text())
+    assert all(list(row) == list(COLUMNS) for row in rows)
+    return from_rows([[row[name] for name in COLUMNS] for row in rows])
+
+
+def read_excel(path):
+    import openpyxl
+
+    rows = []
+    for sheet in openpyxl.load_workbook(path, read_only=True).worksheets:
+        header, *values = sheet.values
+        assert header == COLUMNS
+        rows += values
+    return from_rows(rows)
+
+
+READERS = {'parquet': read_parquet, 'arrow': read_arrow, 'hdf5': read_hdf5, 'json': read_json, 'excel': read_excel}
+
+
+def check_columns(name, table, columns):
+    # JSON keeps microseconds, the binary formats nanoseconds; Excel dates read
+    # back to the millisecond and its numbers keep 15 significant digits
+    unit = 'us' if name in ('json', 'excel') else 'ns'
+    assert list(table) == list(COLUMNS)
+    assert table['timestamp'].dtype == np.dtype(f'datetime64[{unit}]')
+    expected = columns['timestamp'].astype(f'datetime64[{unit}]')
+    if name == 'excel':
+        assert np.all(np.abs(table['timestamp'] - expected) <= np.timedelta64(1, 'ms'))
+    else:
+        assert np.array_equal(table['timestamp'], expected)
+    for column in COLUMNS[1:]:
+        assert table[column].dtype == np.float64
+        np.testing.assert_allclose(table[column], columns[column], rtol=1e-15 if name == 'excel' else 0, atol=0)
+
+
+@pytest.mark.parametrize('name', sorted(READERS))
+@pytest.mark.parametrize('count', [0, 1, 2500])
+def test_files_read_back_with_the_same_columns(tmp_path, name, count):
+    for module in EXPORTERS[name].requires:
+        pytest.importorskip(module)
+    columns = data(count)
+    path = tmp_path / f'export.{EXPORTERS[name].extension}'
+    assert export_chunks(split(columns, 1000), path, name, COLUMNS) == count
+    check_columns(name, READERS[name](path), columns)
+
+
+@pytest.mark.parametrize('name', sorted(READERS))
+def test_streamed_files_read_back(tmp_path, name):
+    for module in EXPORTERS[name].requires:
+        pytest.importorskip(module)
+    columns = data(500)
+    path = tmp_path / f'streamed.{EXPORTERS[name].extension}'
+    path.write_bytes(b''.join(stream_export(split(columns, 100), name, COLUMNS)))
+    check_columns(name, READERS[name](path), columns)
+
+
+def test_excel_continues_on_new_sheets(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip('openpyxl')
+    monkeypatch.setattr(export, 'EXCEL_SHEET_ROWS', 400)
+    columns = data(1000)
+    path = tmp_path / 'export.xlsx'
+    export_chunks(split(columns, 300), path, 'excel', COLUMNS)
+    assert openpyxl.load_workbook(path, read_only=True).sheetnames == [
+        'Measurements', 'Measurements 2', 'Measurements 3']
+    check_columns('excel', read_excel(path), columns)
+
+
+def test_json_writes_non_finite_values_as_null():
+    columns = {'timestamp': ORIGIN + np.arange(3).astype('timedelta64[s]'),
+               'current': np.array([np.nan, np.inf, 1.5]), 'voltage': np.array([-np.inf, 0.0, 2.0])}
+    rows = json.loads(b''.join(stream_export([columns], 'json', COLUMNS)))
+    assert rows == [{'timestamp': '2024-08-20T22:00:00.000000', 'current': None, 'voltage': None},
+                    {'timestamp': '2024-08-20T22:00:01.000000', 'current': None, 'voltage': 0.0},
+                    {'timestamp': '2024-08-20T22:00:02.000000', 'current': 1.5, 'voltage': 2.0}]
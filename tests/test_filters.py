@@ -0,0 +1,66 @@
+"""
+Streaming filters: block-wise processing against whole-array and per-sample references
+"""
+
+import numpy as np
+import pytest
+
+from src.core.filters import FILTERS, create_filter
+
+SPLITS = [[2000], [1] * 30 + [1970], [0, 7, 1, 500, 3, 1489]]
+
+
+def reference(kind, params, values):
+    """Direct per-sample definition of each filter (warm-up covers the samples seen so far)"""
+    result = np.empty_like(values)
+    if kind == 'ema':
+        state = values[0]
+        for index, value in enumerate(values):
+            state = state + params['alpha'] * (value - state)
+            result[index] = state
+        return result
+    reduce = np.mean if kind == 'moving_average' else np.median
+    for index in range(len(values)):
+        result[index] = reduce(values[max(0, index - params['window'] + 1):index + 1])
+    return result
+
+
+CASES = [('moving_average', {'window': 1}), ('moving_average', {'window': 25}),
+         ('ema', {'alpha': 0.2}), ('ema', {'alpha': 0.9}), ('ema', {'alpha': 1.0}),
+         ('median', {'window': 1}), ('median', {'window': 7})]
+
+
+@pytest.mark.parametrize('kind, params', CASES)
+@pytest.mark.parametrize('sizes', SPLITS)
+def test_blocks_match_apply_and_reference(kind, params, sizes):
+    values = 1e-9 * (1 + 0.01 * np.random.default_rng(0).standard_normal(2000))
+    values[::97] *= 5  # spikes
+    stream = create_filter(kind, **params)
+    edges = np.cumsum(sizes)[:-1]
+    blocks = [stream.process(block) for block in np.split(values, edges)]
+    streamed = np.concatenate(blocks)
+
+    expected = reference(kind, params, values)
+    np.testing.assert_allclose(streamed, expected, rtol=1e-9, atol=0)
+    np.testing.assert_allclose(stream.apply(values), streamed, rtol=1e-12, atol=0)
+
+
+def test_apply_leaves_the_stream_state_alone():
+    stream = create_filter('moving_average', window=3)
+    stream.process([1.0, 2.0])
+    stream.apply([100.0, 200.0, 300.0])
+    assert stream.process([3.0])[0] == pytest.approx(2.0)
+
+
+def test_unknown_filter_lists_the_available_ones():
+    with pytest.raises(ValueError, match=', '.join(FILTERS)):
+        create_filter('kalman')
+
+
+def test_errors_raised_by_a_filter_are_not_reported_as_unknown(monkeypatch):
+    def broken(**params):
+        return {}['window']
+
+    monkeypatch.setitem(FILTERS, 'broken', broken)
+    with pytest.raises(KeyError, match='window'):
+        create_filter('broken')
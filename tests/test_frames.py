@@ -0,0 +1,93 @@
+"""
+Binary sample frames: round trip, checksum rejection and resynchronization
+"""
+
+import numpy as np
+import pytest
+
+from src.drivers.frames import FRAME_SIZE, SYNC_WORD, encode_frames, frames_to_columns, parse_frames
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def block(count, first=0):
+    rng = np.random.default_rng(first)
+    sequence = np.arange(first, first + count)
+    return {
+        'sequence': sequence,
+        'timestamps': ORIGIN + sequence * np.timedelta64(1, 'ms'),
+        'current': 1e-6 * (1 + 0.01 * rng.standard_normal(count)),
+        'voltage': 1e-3 * (1 + 0.01 * rng.standard_normal(count)),
+        'temperature': 25 + rng.standard_normal(count),
+    }
+
+
+def encode(samples):
+    return encode_frames(samples['sequence'], samples['timestamps'], samples['current'],
+                         samples['voltage'], samples['temperature'])
+
+
+def stream(chunks):
+    """Feed chunks the way the serial driver does, keeping unconsumed bytes"""
+    pending, frames, skipped = b'', [], 0
+    for chunk in chunks:
+        pending += chunk
+        parsed, consumed, dropped = parse_frames(pending)
+        pending = pending[consumed:]
+        frames.append(parsed)
+        skipped += dropped
+    return np.concatenate(frames), skipped, pending
+
+
+def test_round_trip():
+    samples = block(500)
+    frames, consumed, skipped = parse_frames(encode(samples))
+    assert (consumed, skipped) == (500 * FRAME_SIZE, 0)
+    assert (frames['sync'] == SYNC_WORD).all()
+    assert np.array_equal(frames['sequence'], samples['sequence'])
+
+    columns = frames_to_columns(frames)
+    assert np.array_equal(columns['timestamp'], samples['timestamps'])
+    for name in ('current', 'voltage', 'temperature'):
+        assert np.array_equal(columns[name], samples[name])
+    np.testing.assert_allclose(columns['resistance'], samples['voltage'] / samples['current'], rtol=1e-15)
+
+
+def test_corrupt_frame_is_rejected_by_checksum():
+    data = bytearray(encode(block(10)))
+    data[3 * FRAME_SIZE + 20] ^= 0x01
+    frames, consumed, skipped = parse_frames(bytes(data))
+    assert list(frames['sequence']) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert (consumed, skipped) == (len(data), FRAME_SIZE)
+
+
+def test_resync_after_noise():
+    noise = bytes([0x5A, 0xA5, 0x00, 0x5A]) + np.random.default_rng(1).integers(0, 256, 37, dtype=np.uint8).tobytes()
+    data = encode(block(4)) + noise + encode(block(6, first=4))
+    frames, consumed, skipped = parse_frames(data)
+    assert list(frames['sequence']) == list(range(10))
+    assert (consumed, skipped) == (len(data), len(noise))
+
+
+@pytest.mark.parametrize('cut', [1, 2, FRAME_SIZE // 2, FRAME_SIZE - 1])
+def test_trailing_partial_frame_is_kept(cut):
+    data = encode(block(5))
+    frames, consumed, skipped = parse_frames(data[:4 * FRAME_SIZE + cut])
+    assert list(frames['sequence']) == [0, 1, 2, 3]
+    assert (consumed, skipped) == (4 * FRAME_SIZE, 0)
+
+
+def test_chunked_stream_with_noise_loses_nothing_else():
+    samples = block(2000)
+    data = bytearray(encode(samples))
+    rng = np.random.default_rng(2)
+    corrupt = rng.choice(2000, 20, replace=False)
+    for index in corrupt:
+        data[index * FRAME_SIZE + rng.integers(2, FRAME_SIZE)] ^= 0xFF
+    edges = np.sort(rng.choice(len(data), 300, replace=False))
+    chunks = [bytes(part) for part in np.split(np.frombuffer(bytes(data), dtype=np.uint8), edges)]
+
+    frames, skipped, pending = stream(chunks)
+    assert np.array_equal(frames['sequence'], np.setdiff1d(samples['sequence'], corrupt))
+    assert skipped == len(corrupt) * FRAME_SIZE
+    assert pending == b''
@@ -0,0 +1,138 @@
+"""
+CSV ingest: the pyarrow and pandas readers agree, chunk by chunk, into a buffer
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from src.core import ingest
+from src.core.buffer import CHANNELS, MeasurementBuffer
+from src.core.ingest import load_csv, parse_timestamps, read_csv_chunks
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+@pytest.fixture(params=['pyarrow', 'pandas'])
+def reader(request, monkeypatch):
+    """Run a test once per CSV reader; the pandas run hides pyarrow"""
+    if request.param == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    else:
+        pytest.importorskip('pandas')
+        find_spec = ingest.importlib.util.find_spec
+        monkeypatch.setattr(ingest.importlib.util, 'find_spec',
+                            lambda name, *args: None if name == 'pyarrow' else find_spec(name, *args))
+    return request.param
+
+
+def data(count=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {'timestamp': ORIGIN + (np.arange(count) * 1234567).astype('timedelta64[ns]')}
+    for name in CHANNELS:
+        columns[name] = rng.standard_normal(count) * 10.0 ** rng.integers(-12, 12, count)
+    columns['current'][::17] = np.nan
+    return columns
+
+
+def to_csv(columns, names=('timestamp', *CHANNELS), separator='T'):
+    lines = [','.join(names)]
+    for row in range(len(columns['timestamp'])):
+        fields = []
+        for name in names:
+            value = columns[name][row]
+            if name == 'timestamp':
+                fields.append(np.datetime_as_string(value, unit='ns').replace('T', separator))
+            else:
+                fields.append('' if np.isnan(value) else repr(float(value)))
+        lines.append(','.join(fields))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def assert_loaded(buffer, columns):
+    loaded = buffer.between()
+    assert np.array_equal(loaded['timestamp'], columns['timestamp'])
+    for name in CHANNELS:
+        np.testing.assert_array_equal(loaded[name], columns[name])
+
+
+@pytest.mark.parametrize('count', [0, 1, 1000])
+def test_load_csv_round_trips_every_column(reader, count):
+    columns = data(count)
+    buffer = MeasurementBuffer(capacity=2000)
+    summary = load_csv(buffer, io.BytesIO(to_csv(columns)))
+    assert summary['rows'] == count
+    assert len(buffer) == count
+    if count:
+        assert summary['first'] == columns['timestamp'][0] and summary['last'] == columns['timestamp'][-1]
+    else:
+        assert summary['first'] is None and summary['last'] is None
+    assert_loaded(buffer, columns)
+
+
+def test_file_is_read_in_bounded_chunks(reader, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, 'INGEST_BLOCK_BYTES', 4096)
+    columns = data(3000)
+    path = tmp_path / 'measurements.csv'
+    path.write_bytes(to_csv(columns))
+    chunks = list(read_csv_chunks(path, chunk_rows=256))
+    assert len(chunks) > 5
+    if reader == 'pandas':
+        assert max(len(chunk['timestamp']) for chunk in chunks) == 256
+    merged = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    assert merged['timestamp'].dtype == np.dtype('datetime64[ns]')
+    for name, values in columns.items():
+        np.testing.assert_array_equal(merged[name], values)
+
+
+def test_missing_channels_are_nan_and_extra_columns_ignored(reader):
+    columns = data(50)
+    columns['comment'] = np.zeros(50)
+    content = to_csv(columns, names=('comment', 'voltage', 'timestamp', 'current'), separator=' ')
+    buffer = MeasurementBuffer(capacity=100)
+    load_csv(buffer, io.BytesIO(content))
+    loaded = buffer.between()
+    assert np.array_equal(loaded['timestamp'], columns['timestamp'])
+    np.testing.assert_array_equal(loaded['voltage'], columns['voltage'])
+    np.testing.assert_array_equal(loaded['current'], columns['current'])
+    assert np.isnan(loaded['resistance']).all() and np.isnan(loaded['temperature']).all()
+
+
+def test_buffer_keeps_the_newest_rows_of_a_large_file(reader):
+    columns = data(1000)
+    buffer = MeasurementBuffer(capacity=300)
+    buffer.extend(ORIGIN - np.timedelta64(1, 's'), **{name: 0.0 for name in CHANNELS})
+    assert load_csv(buffer, io.BytesIO(to_csv(columns)), chunk_rows=128)['rows'] == 1000
+    assert_loaded(buffer, {name: values[-300:] for name, values in columns.items()})
+
+
+def test_load_without_clearing_appends(reader):
+    columns = data(200)
+    first, second = ({name: values[rows] for name, values in columns.items()} for rows in (slice(0, 120), slice(120, None)))
+    buffer = MeasurementBuffer(capacity=500)
+    load_csv(buffer, io.BytesIO(to_csv(first)))
+    load_csv(buffer, io.BytesIO(to_csv(second)), clear=False)
+    assert_loaded(buffer, columns)
+
+
+def test_missing_timestamp_column_raises(reader):
+    with pytest.raises(ValueError, match="no 'timestamp' column"):
+        load_csv(MeasurementBuffer(capacity=10), io.BytesIO(b'current,voltage\n1.0,2.0\n'))
+
+
+def test_text_streams_use_pandas():
+    pytest.importorskip('pandas')
+    columns = data(100)
+    buffer = MeasurementBuffer(capacity=100)
+    load_csv(buffer, io.StringIO(to_csv(columns).decode()))
+    assert_loaded(buffer, columns)
+
+
+def test_parse_timestamps_falls_back_to_pandas():
+    pytest.importorskip('pandas')
+    iso = parse_timestamps(np.array(['2024-08-20T22:00:00.5', '2024-08-20 22:00:01'], dtype=object))
+    assert iso.dtype == np.dtype('datetime64[ns]')
+    assert np.array_equal(iso, ORIGIN + np.array([500, 1000], dtype='timedelta64[ms]'))
+    other = parse_timestamps(np.array(['08/20/2024 22:00:00', '08/20/2024 22:00:02'], dtype=object))
+    assert np.array_equal(other, ORIGIN + np.array([0, 2], dtype='timedelta64[s]'))
@@ -0,0 +1,98 @@
+"""
+Aggregate pyramid: incrementally folded buckets against direct per-bucket reductions
+"""
+
+import numpy as np
+import pytest
+
+from src.core.pyramid import LEVELS, AggregatePyramid
+
+CHANNELS = ('current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def samples(count=6000, seed=0):
+    """Irregularly spaced samples (with repeated timestamps and NaN) over about three hours"""
+    rng = np.random.default_rng(seed)
+    timestamps = ORIGIN + np.cumsum(rng.integers(0, 3 * 10**9, count)).astype('timedelta64[ns]')
+    data = {'timestamp': timestamps}
+    for name in CHANNELS:
+        data[name] = rng.normal(0.0, 1.0, count)
+        data[name][rng.random(count) < 0.05] = np.nan
+    return data
+
+
+def reference(data, seconds):
+    """min/max/mean/count per bucket computed directly from the samples"""
+    ticks = data['timestamp'].view(np.int64)
+    starts = ticks - ticks % (seconds * 10**9)
+    expected = {'timestamp': np.unique(starts).view('datetime64[ns]')}
+    groups = [np.flatnonzero(starts == start) for start in np.unique(starts)]
+    for name in CHANNELS:
+        finite = [data[name][rows][np.isfinite(data[name][rows])] for rows in groups]
+        expected[f'{name}_count'] = np.array([len(values) for values in finite])
+        expected[f'{name}_min'] = np.array([values.min() if len(values) else np.nan for values in finite])
+        expected[f'{name}_max'] = np.array([values.max() if len(values) else np.nan for values in finite])
+        expected[f'{name}_mean'] = np.array([values.mean() if len(values) else np.nan for values in finite])
+    return expected
+
+
+def feed(pyramid, data, sizes):
+    edges = np.cumsum(sizes)
+    for rows in np.split(np.arange(len(data['timestamp'])), edges[edges < len(data['timestamp'])]):
+        pyramid.update(data['timestamp'][rows], **{name: data[name][rows] for name in CHANNELS})
+        pyramid.flush()
+
+
+def check(pyramid, data):
+    for level, (name, seconds) in enumerate(LEVELS):
+        result = pyramid.query(points=10**9, level=level)
+        expected = reference(data, seconds)
+        assert np.array_equal(result['timestamp'], expected['timestamp']), name
+        for key in expected.keys() - {'timestamp'}:
+            np.testing.assert_allclose(result[key], expected[key], rtol=1e-12, atol=1e-12, err_msg=f'{name} {key}')
+
+
+@pytest.mark.parametrize('sizes', [[6000], [1] * 20 + [5980], [13, 2000, 1, 987, 3000]])
+def test_levels_match_direct_reduction(sizes):
+    data = samples()
+    pyramid = AggregatePyramid(channels=CHANNELS)
+    feed(pyramid, data, sizes)
+    check(pyramid, data)
+
+
+def test_stored_levels_survive_reopening(tmp_path):
+    data = samples()
+    head = {key: values[:2500] for key, values in data.items()}
+    tail = {key: values[2500:] for key, values in data.items()}
+
+    feed(AggregatePyramid(tmp_path, channels=CHANNELS), head, [1000, 1500])
+    pyramid = AggregatePyramid(tmp_path, channels=CHANNELS)
+    feed(pyramid, tail, [3500])
+    check(pyramid, data)
+    check(AggregatePyramid(tmp_path, channels=CHANNELS, readonly=True), data)
+
+
+def test_merged_buckets_keep_counts_and_extremes():
+    data = samples()
+    pyramid = AggregatePyramid(channels=CHANNELS)
+    feed(pyramid, data, [6000])
+    # Thousands of 1 s buckets squeezed into 20 points are merged in groups
+    result = pyramid.query(points=20, level=0)
+    assert 10 < len(result['timestamp']) <= 20
+    assert result['current_count'].sum() == np.isfinite(data['current']).sum()
+    assert np.nanmax(result['voltage_max']) == np.nanmax(data['voltage'])
+
+
+def test_unordered_block_is_sorted_and_late_samples_are_rejected():
+    data = samples()
+    pyramid = AggregatePyramid(channels=CHANNELS)
+    order = np.random.default_rng(1).permutation(3000)
+    pyramid.update(data['timestamp'][order], **{name: data[name][order] for name in CHANNELS})
+
+    late = data['timestamp'][2999] - np.timedelta64(10, 's')
+    pyramid.update(late.reshape(1), current=[1e6], voltage=[1e6])
+    assert pyramid.rejected == 1
+
+    feed(pyramid, {key: values[3000:] for key, values in data.items()}, [3000])
+    check(pyramid, data)
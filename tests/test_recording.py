@@ -0,0 +1,201 @@
+"""
+Recordings: every on-disk layout opens to the same rows; long overviews come from the pyramid
+"""
+
+import numpy as np
+import pytest
+
+from src.core.recording import Recording
+from src.core.storage import INDEX_FILE, TIMESTAMP_FILE, SegmentStore, column_file
+
+CHANNELS = ('current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+RATE = 100.0
+
+
+def samples(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return {'timestamp': ORIGIN + (np.arange(count) * (1e9 / RATE)).astype('timedelta64[ns]'),
+            'current': rng.standard_normal(count), 'voltage': rng.standard_normal(count)}
+
+
+def rows(data, mask):
+    return {key: values[mask] for key, values in data.items()}
+
+
+def in_range(data, start=None, end=None):
+    mask = np.ones(len(data['timestamp']), dtype=bool)
+    if start is not None:
+        mask &= data['timestamp'] >= np.datetime64(start, 'ns')
+    if end is not None:
+        mask &= data['timestamp'] <= np.datetime64(end, 'ns')
+    return rows(data, mask)
+
+
+def assert_columns_equal(result, expected, channels=CHANNELS):
+    assert list(result) == ['timestamp', *channels]
+    assert result['timestamp'].dtype == np.dtype('datetime64[ns]')
+    for key in ('timestamp', *channels):
+        assert np.array_equal(result[key], expected[key]), key
+
+
+def write_store(root, data, aggregates=True):
+    store = SegmentStore(root, channels=CHANNELS, segment_seconds=600, flush_interval=3600, aggregates=aggregates)
+    for block in range(0, len(data['timestamp']), 7000):
+        store.append(data['timestamp'][block:block + 7000],
+                     **{name: data[name][block:block + 7000] for name in CHANNELS})
+    store.close()
+
+
+def write_raw(directory, data):
+    directory.mkdir()
+    data['timestamp'].view(np.int64).astype('<i8').tofile(directory / TIMESTAMP_FILE)
+    for name in CHANNELS:
+        data[name].astype('<f8').tofile(directory / column_file(name))
+
+
+def write_npy(directory, data):
+    directory.mkdir()
+    for key, values in data.items():
+        np.save(directory / f'{key}.npy', values)
+
+
+def write_records(path, data):
+    records = np.empty(len(data['timestamp']), dtype=[('timestamp', 'datetime64[ns]'), ('current', '<f8'),
+                                                      ('flags', '<i4'), ('voltage', '<f8')])
+    for key in ('timestamp', *CHANNELS):
+        records[key] = data[key]
+    np.save(path, records)
+
+
+@pytest.fixture(scope='module')
+def data():
+    return samples(180000)   # half an hour: three ten-minute segments
+
+
+@pytest.fixture
+def layouts(tmp_path, data):
+    """Paths that open the same data in every supported layout"""
+    write_store(tmp_path / 'store', data)
+    write_raw(tmp_path / 'raw', data)
+    write_npy(tmp_path / 'npy', data)
+    write_records(tmp_path / 'records.npy', data)
+    return {'store': tmp_path / 'store', 'index': tmp_path / 'store' / INDEX_FILE,
+            'raw': tmp_path / 'raw', 'raw file': tmp_path / 'raw' / TIMESTAMP_FILE,
+            'npy': tmp_path / 'npy', 'records': tmp_path / 'records.npy'}
+
+
+@pytest.mark.parametrize('layout', ['store', 'index', 'raw', 'raw file', 'npy', 'records'])
+def test_every_layout_opens_to_the_same_rows(layouts, data, layout):
+    recording = Recording.open(layouts[layout])
+    assert recording.channels == CHANNELS
+    assert len(recording) == 180000
+    assert len(recording.parts) == (3 if layout in ('store', 'index') else 1)
+    assert recording.start == data['timestamp'][0] and recording.end == data['timestamp'][-1]
+
+    assert_columns_equal(recording.rows(0, len(recording)), data)
+    # Ranges across segment boundaries, on samples and between them
+    for start, end in [('2024-08-20T22:09:59.5', '2024-08-20T22:20:00.5'),
+                       ('2024-08-20T22:10:00.005', '2024-08-20T22:10:00.035'),
+                       (None, '2024-08-20T22:00:00'), ('2024-08-20T23:00:00', None)]:
+        assert_columns_equal(recording.between(start, end), in_range(data, start, end))
+    assert_columns_equal(recording.rows(59990, 120010), rows(data, slice(59990, 120010)))
+    indices = np.array([0, 59999, 60000, 119999, 179999])
+    assert_columns_equal(recording.take(indices, channels=('voltage',)), rows(data, indices), ('voltage',))
+    assert recording.index_of('2024-08-20T22:10:00') == 60000
+    assert recording.index_of('2024-08-20T22:10:00', 'right') == 60001
+
+
+def test_columns_missing_from_a_layout_are_nan(tmp_path):
+    data = samples(100)
+    directory = tmp_path / 'raw'
+    write_raw(directory, data)
+    # A shorter column limits the rows; extra columns follow the known channels
+    (directory / column_file('voltage')).write_bytes(data['voltage'][:90].astype('<f8').tobytes())
+    np.arange(100, dtype='<f8').tofile(directory / column_file('pressure'))
+    recording = Recording.open(directory)
+    assert recording.channels == ('current', 'voltage', 'pressure') and len(recording) == 90
+    result = recording.between(channels=('voltage', 'temperature'))
+    assert np.array_equal(result['voltage'], data['voltage'][:90])
+    assert np.isnan(result['temperature']).all()
+
+
+def test_npy_layouts_accept_integer_timestamps(tmp_path):
+    data = samples(50)
+    ticks = dict(data, timestamp=data['timestamp'].view(np.int64))
+    write_npy(tmp_path / 'npy', ticks)
+    records = np.empty(50, dtype=[('timestamp', '<i8'), ('current', '<f4'), ('count', '<i8')])
+    records['timestamp'], records['current'], records['count'] = ticks['timestamp'], data['current'], 1
+    np.save(tmp_path / 'records.npy', records)
+
+    assert_columns_equal(Recording.open(tmp_path / 'npy').between(), data)
+    recording = Recording.open(tmp_path / 'records.npy')
+    assert recording.channels == ('current',)
+    result = recording.between()
+    assert np.array_equal(result['timestamp'], data['timestamp'])
+    assert np.array_equal(result['current'], data['current'].astype('<f4'))
+
+
+def test_unsupported_paths_raise(tmp_path):
+    (tmp_path / 'empty').mkdir()
+    with pytest.raises(ValueError, match='No recording found'):
+        Recording.open(tmp_path / 'empty')
+    (tmp_path / 'data.csv').write_text('timestamp,current\n')
+    with pytest.raises(ValueError, match='Unsupported recording'):
+        Recording.open(tmp_path / 'data.csv')
+    np.save(tmp_path / 'plain.npy', np.zeros(3))
+    with pytest.raises(ValueError, match="structured array with a 'timestamp' field"):
+        Recording.open(tmp_path / 'plain.npy')
+
+
+def test_empty_store_opens(tmp_path):
+    SegmentStore(tmp_path, channels=CHANNELS).close()
+    recording = Recording.open(tmp_path)
+    assert len(recording) == 0 and recording.start is None and recording.end is None
+    assert_columns_equal(recording.between(), rows(samples(0), slice(None)))
+    assert len(recording.overview()['timestamp']) == 0
+
+
+def test_long_overviews_come_from_the_pyramid(layouts, data, monkeypatch):
+    recording = Recording.open(layouts['store'])
+    assert recording.pyramid is not None
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError('rows were read')
+
+    monkeypatch.setattr(Recording, 'rows', unexpected)
+    monkeypatch.setattr(Recording, 'take', unexpected)
+    # Bucket-aligned, so the buckets hold exactly the rows in range
+    start, end = '2024-08-20T22:05:00', '2024-08-20T22:24:59.99'
+    expected = in_range(data, start, end)
+    overview = recording.overview(start, end, points=100)
+    assert list(overview) == ['timestamp', *CHANNELS]
+    assert 0 < len(overview['timestamp']) <= 100
+    assert overview['timestamp'][0] == np.datetime64(start, 'ns')
+    assert np.all(np.diff(overview['timestamp']) >= np.timedelta64(0, 'ns'))
+    for name in CHANNELS:
+        # The min/max envelope keeps the extremes of the range
+        assert overview[name].min() == expected[name].min()
+        assert overview[name].max() == expected[name].max()
+    assert np.isnan(recording.overview(start, end, points=100, channels=('temperature',))['temperature']).all()
+
+
+def test_overviews_without_a_pyramid_sample_the_rows(layouts, data):
+    recording = Recording.open(layouts['raw'])
+    assert recording.pyramid is None
+    overview = recording.overview(points=100)
+    assert 0 < len(overview['timestamp']) <= 100 * len(CHANNELS)
+    # Every point is a recorded row
+    indices = np.searchsorted(data['timestamp'], overview['timestamp'])
+    assert_columns_equal(overview, rows(data, indices))
+
+
+def test_short_overviews_are_read_in_full(layouts, data):
+    recording = Recording.open(layouts['store'])
+    start, end = '2024-08-20T22:09:59', '2024-08-20T22:10:01'
+    # 201 rows across a segment boundary, within the points budget
+    assert_columns_equal(recording.overview(start, end, points=500), in_range(data, start, end))
+    overview = recording.overview(start, end, points=50)
+    assert len(overview['timestamp']) <= 100
+    for name in CHANNELS:
+        assert overview[name].max() == in_range(data, start, end)[name].max()
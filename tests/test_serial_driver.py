@@ -0,0 +1,84 @@
+"""
+Serial driver end to end over the pseudo-terminal loopback meter
+"""
+
+import asyncio
+import sys
+
+import numpy as np
+import pytest
+
+from src.core.simulator import MeasurementSimulator
+from src.drivers.frames import FRAME_SIZE
+from src.drivers.serial_driver import SerialDriver
+
+pytest.importorskip('serial')
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='the loopback meter needs a POSIX pty')
+
+RATE = 1000.0
+
+
+def stream(seconds, **options):
+    """Read the loopback meter through a SerialDriver for ``seconds``
+
+    Returns the driver, the device and the received columns plus the
+    sequence number of every received frame.
+    """
+    from src.drivers.loopback import LoopbackDevice
+
+    async def run(device):
+        driver = SerialDriver({'connection': {'type': 'serial', 'port': device.port}})
+        await driver.open(RATE)
+        blocks = []
+        try:
+            loop = asyncio.get_running_loop()
+            stop = loop.time() + seconds
+            while loop.time() < stop:
+                await asyncio.sleep(0.01)
+                blocks.append(await driver.read(np.empty(0, dtype='datetime64[ns]')))
+        finally:
+            await driver.close()
+        return driver, blocks
+
+    with LoopbackDevice(**options) as device:
+        driver, blocks = asyncio.run(run(device))
+    data = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+    # Frame k is stamped started_at + k ms
+    data['sequence'] = (data['timestamp'] - device.started_at) // np.timedelta64(1, 'ms')
+    return driver, device, data
+
+
+def expected_values(seed, count):
+    """The loopback meter's samples by sequence number (the steady profile ignores time)"""
+    return MeasurementSimulator(seed=seed).generate(np.zeros(count, dtype='datetime64[ns]'))
+
+
+def test_clean_stream_delivers_every_frame():
+    driver, device, data = stream(0.5, seed=4)
+    count = len(data['sequence'])
+    assert count > 100
+    assert np.array_equal(data['sequence'], np.arange(count))
+    assert (driver.frames, driver.lost_frames, driver.skipped_bytes) == (count, 0, 0)
+
+    expected = expected_values(4, count)
+    for name in ('current', 'voltage', 'temperature'):
+        assert np.array_equal(data[name], expected[name])
+
+
+def test_noise_and_bad_checksums_lose_only_the_damaged_frames():
+    driver, device, data = stream(1.0, noise=0.3, corrupt=0.3, seed=5)
+    received = data['sequence']
+    last = int(received[-1])
+    damaged = np.array([index for index in device.corrupted if index <= last], dtype=np.int64)
+    assert len(damaged) and device.noise_bytes
+
+    # No frame is duplicated or reordered, and only the damaged ones are missing
+    assert np.array_equal(received, np.setdiff1d(np.arange(last + 1), damaged))
+    assert driver.frames == len(received)
+    assert driver.lost_frames == np.count_nonzero(damaged > received[0])
+    # Everything skipped is injected noise or a damaged frame
+    assert len(damaged) * FRAME_SIZE <= driver.skipped_bytes <= device.noise_bytes + len(damaged) * FRAME_SIZE
+
+    expected = expected_values(5, last + 1)
+    for name in ('current', 'voltage', 'temperature'):
+        assert np.array_equal(data[name], expected[name][received])
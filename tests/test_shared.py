@@ -0,0 +1,162 @@
+"""
+Shared-memory buffer across processes: read-only attach and a consistent header under concurrent writes
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.shared import SharedMeasurementBuffer
+
+CHANNELS = ('current', 'voltage')
+CAPACITY = 512
+ROWS = 40 * CAPACITY
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+ROOT = Path(__file__).resolve().parents[1]
+
+# Child process: write ROWS rows (current == voltage == seq, stamped ORIGIN + seq ms)
+# in blocks of random size, paced so that reads overlap the writes
+WRITER = '''
+import sys
+import time
+import numpy as np
+from src.core.shared import SharedMeasurementBuffer
+
+buffer = SharedMeasurementBuffer.attach(sys.argv[1], writable=True)
+rows, origin = int(sys.argv[2]), np.datetime64(sys.argv[3], 'ns')
+rng = np.random.default_rng(0)
+seq = 0
+while seq < rows:
+    stop = min(rows, seq + int(rng.integers(1, 200)))
+    values = np.arange(seq, stop, dtype=np.float64)
+    buffer.extend(origin + values.astype(np.int64) * np.timedelta64(1, 'ms'),
+                  current=values, voltage=values)
+    seq = stop
+    time.sleep(0.001)
+buffer.missed = 7
+buffer.report_error('writer done')
+buffer.close()
+'''
+
+# Child process: attach read-only, report what it sees and whether writes are refused
+READER = '''
+import json
+import sys
+import numpy as np
+from src.core.shared import SharedMeasurementBuffer
+
+buffer = SharedMeasurementBuffer.attach(sys.argv[1])
+data = buffer.view(copy=True)
+result = {
+    'channels': buffer.channels, 'capacity': buffer.capacity, 'total': buffer.total, 'length': len(buffer),
+    'current': data['current'].tolist(), 'timestamps': data['timestamp'].view(np.int64).tolist(),
+    'count': buffer.stats['current'].count, 'mean': buffer.stats['current'].mean,
+    'missed': buffer.missed, 'error': buffer.last_error(),
+}
+try:
+    buffer.append(data['timestamp'][-1], current=0.0)
+except ValueError as e:
+    result['refused'] = str(e)
+buffer.close()
+print(json.dumps(result))
+'''
+
+
+def spawn(script, name, **kwargs):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (str(ROOT), os.environ.get('PYTHONPATH')))))
+    return subprocess.Popen([sys.executable, '-c', script, name, str(ROWS), str(ORIGIN)], env=env, cwd=ROOT, **kwargs)
+
+
+@pytest.fixture
+def shared():
+    buffer = SharedMeasurementBuffer.create(CAPACITY, channels=CHANNELS)
+    yield buffer
+    buffer.close()
+    buffer.unlink()
+
+
+def check_rows(data):
+    """Rows must come from single writes: current == voltage == seq and time follows seq"""
+    seq = data['current']
+    assert np.array_equal(seq, data['voltage'])
+    assert np.array_equal(data['timestamp'], ORIGIN + seq.astype(np.int64) * np.timedelta64(1, 'ms'))
+    assert np.all(np.diff(seq) == 1)
+
+
+def test_reader_process_attaches_read_only(shared):
+    values = np.arange(1000, dtype=np.float64)
+    shared.extend(ORIGIN + values.astype(np.int64) * np.timedelta64(1, 'ms'), current=values, voltage=-values)
+    shared.missed = 3
+    shared.report_error('sensor unplugged')
+
+    output = spawn(READER, shared.name, stdout=subprocess.PIPE).communicate(timeout=60)[0]
+    result = json.loads(output)
+    assert result['channels'] == list(CHANNELS) and result['capacity'] == CAPACITY
+    assert result['total'] == 1000 and result['length'] == CAPACITY
+    assert result['current'] == values[-CAPACITY:].tolist()
+    assert result['timestamps'] == shared['timestamp'].view(np.int64).tolist()
+    assert result['count'] == 1000 and result['mean'] == pytest.approx(499.5)
+    assert result['missed'] == 3 and result['error'] == [1, 'sensor unplugged']
+    assert 'read-only' in result['refused']
+
+    # The reader left the segment in place and unchanged
+    assert shared.total == 1000
+    again = SharedMeasurementBuffer.attach(shared.name)
+    assert np.array_equal(again['current'], values[-CAPACITY:])
+    again.close()
+
+
+def test_read_only_handles_refuse_every_write(shared):
+    reader = SharedMeasurementBuffer.attach(shared.name)
+    try:
+        for write in (lambda: reader.append(ORIGIN, current=1.0),
+                      lambda: reader.extend([ORIGIN], current=[1.0]), reader.clear):
+            with pytest.raises(ValueError, match='read-only'):
+                write()
+        # Writes of the creator show up in the other mapping
+        shared.extend([ORIGIN], current=[2.0], voltage=[2.0])
+        assert reader.latest()['current'] == 2.0 and reader.stats['current'].count == 1
+        shared.clear()
+        assert len(reader) == 0 and reader.cleared_at == 1 and reader.stats['current'].count == 0
+    finally:
+        reader.close()
+
+
+def test_header_and_stats_stay_consistent_while_another_process_writes(shared):
+    reader = SharedMeasurementBuffer.attach(shared.name)
+    writer = spawn(WRITER, shared.name)
+    cursor, reads, received = 0, 0, []
+    try:
+        while writer.poll() is None or cursor < reader.total:
+            total, cleared_at, length, count, high = reader.read_consistent(
+                lambda: (reader.total, reader.cleared_at, len(reader),
+                         reader.stats['current'].count, reader.stats['current'].max))
+            # Header and statistics are published together
+            assert cleared_at == 0 and count == total
+            assert total == 0 or high == total - 1
+            assert length == min(total, CAPACITY)
+
+            check_rows(reader.view(copy=True))
+            data, new_cursor = reader.since(cursor, copy=True)
+            check_rows(data)
+            if len(data['current']):
+                assert data['current'][0] >= cursor and data['current'][-1] == new_cursor - 1
+                received.append(data['current'])
+            cursor = new_cursor
+            reads += 1
+    finally:
+        assert writer.wait(timeout=60) == 0
+        reader.close()
+
+    # The reader saw the writes happen, not just their result
+    assert reads > 10 and len(received) > 1
+    assert cursor == shared.total == ROWS
+    seen = np.concatenate(received)
+    assert np.all(np.diff(seen) > 0) and seen[-1] == ROWS - 1
+    check_rows(shared.view())
+    assert shared.missed == 7 and shared.last_error() == (1, 'writer done')
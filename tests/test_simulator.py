@@ -0,0 +1,90 @@
+"""
+Measurement simulator: seeded output does not depend on how samples are split into blocks
+"""
+
+import numpy as np
+import pytest
+
+from src.core.simulator import MeasurementSimulator
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+KEYS = ('current', 'voltage', 'resistance', 'temperature')
+
+# Every parameter that shapes the output: trends, drifts, coupling and spikes
+SHAPED = {'profile': 'demo', 'current_drift': 0.5, 'temperature_drift': 2.0, 'anomaly_rate': 0.01}
+
+
+def timestamps(count, rate=1000.0):
+    return ORIGIN + (np.arange(count) * (1e9 / rate)).astype('timedelta64[ns]')
+
+
+def split(values, sizes):
+    edges = np.cumsum(sizes)[:-1]
+    return np.split(values, edges)
+
+
+def merge(blocks):
+    return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+
+@pytest.mark.parametrize('options', [{}, SHAPED], ids=['steady', 'shaped'])
+@pytest.mark.parametrize('sizes', [[5000], [1] * 50 + [4950], [2500, 2500], [0, 1234, 0, 3766], [999] * 5 + [5]])
+def test_same_seed_gives_the_same_data_however_it_is_split(options, sizes):
+    whole = MeasurementSimulator(seed=42, **options).generate(timestamps(5000))
+    simulator = MeasurementSimulator(seed=42, **options)
+    blocks = merge([simulator.generate(block) for block in split(timestamps(5000), sizes)])
+    assert simulator.samples == 5000
+    for key in KEYS:
+        assert np.array_equal(blocks[key], whole[key]), key
+
+
+def test_blocks_continue_the_timestamp_grid():
+    whole = MeasurementSimulator(seed=3, **SHAPED).block(3000, 250.0, start=ORIGIN)
+    simulator = MeasurementSimulator(seed=3, **SHAPED)
+    blocks = [simulator.block(size, 250.0, start=ORIGIN if index == 0 else None)
+              for index, size in enumerate([1, 700, 1299, 1000])]
+    merged = merge(blocks)
+    assert np.array_equal(merged['timestamp'], timestamps(3000, rate=250.0))
+    for key in ('timestamp', *KEYS):
+        assert np.array_equal(merged[key], whole[key]), key
+
+
+def test_origin_defaults_to_the_first_timestamp():
+    # Trends and drifts are relative to the origin, so a later first block is
+    # equivalent to an explicit origin at its first sample
+    later = timestamps(1000) + np.timedelta64(3, 'h')
+    implicit = MeasurementSimulator(seed=1, **SHAPED).generate(later)
+    explicit = MeasurementSimulator(seed=1, origin=later[0], **SHAPED).generate(later)
+    shifted = MeasurementSimulator(seed=1, origin=ORIGIN, **SHAPED).generate(later)
+    assert np.array_equal(implicit['current'], explicit['current'])
+    assert not np.array_equal(implicit['current'], shifted['current'])
+
+
+def test_seeds_and_profiles_change_the_data():
+    first = MeasurementSimulator(seed=1).generate(timestamps(100))
+    assert not np.array_equal(first['current'], MeasurementSimulator(seed=2).generate(timestamps(100))['current'])
+    assert not np.array_equal(first['voltage'], MeasurementSimulator(seed=1, profile='demo').generate(
+        timestamps(100))['voltage'])
+    # Unseeded simulators differ from run to run
+    assert not np.array_equal(MeasurementSimulator().generate(timestamps(100))['current'],
+                              MeasurementSimulator().generate(timestamps(100))['current'])
+
+
+def test_anomaly_rate_and_spike_height():
+    steady = MeasurementSimulator(seed=5).generate(timestamps(200000))
+    spiky = MeasurementSimulator(seed=5, anomaly_rate=0.01, anomaly_scale=10.0).generate(timestamps(200000))
+    spikes = spiky['current'] != steady['current']
+    assert 0.009 < spikes.mean() < 0.011
+    deviation = np.abs(spiky['current'][spikes] - steady['current'][spikes])
+    np.testing.assert_allclose(deviation, 10.0 * 1e-9 * 0.01, rtol=1e-9)
+
+
+def test_from_config_and_invalid_parameters():
+    configured = MeasurementSimulator.from_config({'seed': 9, 'profile': 'demo', 'current': 2e-9})
+    assert configured.params['current'] == 2e-9 and configured.params['current_noise'] == 0.02
+    assert np.array_equal(configured.generate(timestamps(10))['current'],
+                          MeasurementSimulator(seed=9, profile='demo', current=2e-9).generate(timestamps(10))['current'])
+    with pytest.raises(ValueError, match="Unknown profile 'noisy'"):
+        MeasurementSimulator(profile='noisy')
+    with pytest.raises(ValueError, match='current_jitter'):
+        MeasurementSimulator(current_jitter=1.0)
@@ -0,0 +1,78 @@
+"""
+Streaming statistics against direct numpy reductions
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.core.stats import RunningStats, TrendStats, WindowedStats
+
+
+def split(values, sizes):
+    edges = np.cumsum(sizes)
+    return np.split(values, edges[edges < len(values)])
+
+
+@pytest.mark.parametrize('sizes', [[1000], [1] * 50 + [950], [7, 300, 1, 692]])
+def test_running_stats_blocks_match_numpy(sizes):
+    # A large offset exposes the cancellation a naive sum of squares would suffer
+    values = 1e6 + np.random.default_rng(0).normal(0.0, 1e-3, 1000)
+    stats = RunningStats()
+    for block in split(values, sizes):
+        stats.update(block)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-15)
+    assert stats.variance == pytest.approx(np.var(values), rel=1e-6)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_running_stats_merge_matches_numpy():
+    rng = np.random.default_rng(1)
+    parts = [rng.normal(mean, scale, count) for mean, scale, count in ((0, 1, 10), (5, 2, 1000), (-3, 0.1, 1))]
+    merged = RunningStats()
+    for part in parts:
+        partial = RunningStats()
+        partial.update(part)
+        merged.merge(partial)
+    merged.merge(RunningStats())
+    values = np.concatenate(parts)
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(np.var(values), rel=1e-12)
+    assert merged.std == pytest.approx(np.std(values), rel=1e-12)
+
+
+def test_running_stats_ignores_nan_and_reports_empty():
+    stats = RunningStats()
+    assert math.isnan(stats.as_dict()['mean']) and math.isnan(stats.std)
+    stats.update([1.0, np.nan, 3.0])
+    assert stats.as_dict() == {'mean': 2.0, 'std': 1.0, 'min': 1.0, 'max': 3.0, 'count': 2}
+
+
+def test_trend_stats_merge_matches_polyfit():
+    rng = np.random.default_rng(2)
+    times = np.arange(5000) * 0.1
+    values = 3.0 + 0.02 * times + rng.normal(0.0, 0.5, len(times))
+    merged = TrendStats()
+    for part_times, part_values in zip(split(times, [1, 999, 4000]), split(values, [1, 999, 4000])):
+        partial = TrendStats()
+        partial.update(part_times, part_values)
+        merged.merge(partial)
+    assert merged.slope == pytest.approx(np.polyfit(times, values, 1)[0], rel=1e-9)
+
+
+@pytest.mark.parametrize('window', [1, 10, 64])
+def test_windowed_stats_match_last_window(window):
+    values = 1e6 + np.random.default_rng(3).normal(0.0, 1.0, 500)
+    stats = WindowedStats(window)
+    seen = 0
+    for block in split(values, [3, 1, 100, 7, 389]):
+        stats.update(block)
+        seen += len(block)
+        recent = values[max(0, seen - window):seen]
+        assert stats.count == len(recent)
+        assert stats.mean == pytest.approx(recent.mean(), rel=1e-12)
+        assert stats.variance == pytest.approx(np.var(recent), rel=1e-6, abs=1e-9)
+        assert (stats.min, stats.max) == (recent.min(), recent.max())
@@ -0,0 +1,218 @@
+"""
+Segment store: crash recovery, retention, time order and range reads across segments
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.core.storage import INDEX_FILE, TIMESTAMP_FILE, SegmentStore, column_file
+
+CHANNELS = ('current', 'voltage')
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def samples(count=3000, start=ORIGIN, rate=10.0):
+    """``count`` rows at ``rate`` Hz: five one-minute segments by default"""
+    timestamps = start + (np.arange(count) * (1e9 / rate)).astype('timedelta64[ns]')
+    values = np.arange(count, dtype=np.float64)
+    return {'timestamp': timestamps, 'current': values, 'voltage': -values}
+
+
+def open_store(root, **options):
+    options = dict({'channels': CHANNELS, 'segment_seconds': 60, 'flush_interval': 3600,
+                    'aggregates': False}, **options)
+    return SegmentStore(root, **options)
+
+
+def write(store, data, sizes=(3000,)):
+    edges = np.cumsum(sizes)
+    for rows in np.split(np.arange(len(data['timestamp'])), edges[edges < len(data['timestamp'])]):
+        store.append(data['timestamp'][rows], **{name: data[name][rows] for name in CHANNELS})
+    store.flush()
+
+
+def rows(data, mask):
+    return {key: values[mask] for key, values in data.items()}
+
+
+def assert_columns_equal(result, expected):
+    assert list(result) == ['timestamp', *CHANNELS]
+    for key, values in expected.items():
+        assert np.array_equal(result[key], values), key
+
+
+def test_rows_are_partitioned_into_segments(tmp_path):
+    store = open_store(tmp_path)
+    write(store, samples(), sizes=(1, 999, 1500, 500))
+    segments = store.segments()
+    assert [entry['rows'] for entry in segments] == [600] * 5
+    assert len(store) == 3000
+    assert [entry['name'] for entry in segments][:2] == ['2024-08-20T220000', '2024-08-20T220100']
+    assert np.array_equal(store.read_segment(segments[1]['name'])['current'], np.arange(600, 1200))
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, None),
+    ('2024-08-20T22:00:30', '2024-08-20T22:03:10'),   # across three boundaries
+    ('2024-08-20T22:01:00', '2024-08-20T22:02:00'),   # exactly on boundaries
+    ('2024-08-20T22:02:00.05', '2024-08-20T22:02:00.08'),  # between two samples
+    ('2024-08-20T23:00:00', None),
+])
+def test_query_and_chunks_return_the_inclusive_range(tmp_path, start, end):
+    data = samples()
+    store = open_store(tmp_path)
+    write(store, data)
+    mask = np.ones(3000, dtype=bool)
+    if start is not None:
+        mask &= data['timestamp'] >= np.datetime64(start, 'ns')
+    if end is not None:
+        mask &= data['timestamp'] <= np.datetime64(end, 'ns')
+
+    assert_columns_equal(store.query(start, end), rows(data, mask))
+    chunks = list(store.chunks(250, start, end))
+    assert all(0 < len(chunk['timestamp']) <= 250 for chunk in chunks)
+    if chunks:
+        assert_columns_equal({key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]},
+                             rows(data, mask))
+
+
+def test_query_limit_and_tail_keep_the_newest_rows(tmp_path):
+    data = samples()
+    store = open_store(tmp_path)
+    write(store, data)
+    newest = np.arange(3000) >= 3000 - 700
+    assert_columns_equal(store.query(limit=700), rows(data, newest))
+    assert_columns_equal(store.tail(700), rows(data, newest))
+    assert_columns_equal(store.tail(10**6), data)
+
+    # Rows 300..1799 are in range; the limit keeps the newest 1000 of them
+    result = store.query('2024-08-20T22:00:30', '2024-08-20T22:02:59.95', limit=1000)
+    assert_columns_equal(result, rows(data, slice(800, 1800)))
+
+
+def test_queries_include_pending_rows(tmp_path):
+    data = samples(100)
+    store = open_store(tmp_path)
+    store.append(data['timestamp'], current=data['current'], voltage=data['voltage'])
+    assert_columns_equal(store.query(), data)
+
+
+def test_empty_store(tmp_path):
+    store = open_store(tmp_path)
+    assert len(store) == 0 and store.segments() == []
+    assert len(store.query()['timestamp']) == 0
+    assert store.query()['timestamp'].dtype == np.dtype('datetime64[ns]')
+    assert list(store.chunks(10)) == []
+    assert len(store.tail(5)['current']) == 0
+
+
+def test_unordered_block_is_sorted_and_late_rows_are_rejected(tmp_path):
+    data = samples(600)
+    store = open_store(tmp_path)
+    order = np.random.default_rng(0).permutation(400)
+    store.append(data['timestamp'][order], current=data['current'][order], voltage=data['voltage'][order])
+    # Rows before the newest accepted sample (the clock went back) are dropped
+    late = np.r_[390:399, 400:410]
+    store.append(data['timestamp'][late], current=data['current'][late], voltage=data['voltage'][late])
+    assert store.rejected == 9
+    write(store, rows(data, np.arange(600) >= 410))
+    assert store.rejected == 9
+    assert_columns_equal(store.query(), data)
+    # The newest sample survives a reopen
+    reopened = open_store(tmp_path)
+    reopened.append(data['timestamp'][:5], current=np.zeros(5), voltage=np.zeros(5))
+    assert reopened.rejected == 5 and len(reopened) == 600
+
+
+def test_torn_trailing_write_is_trimmed_on_open(tmp_path):
+    data = samples()
+    write(open_store(tmp_path), data)
+    newest = open_store(tmp_path).segments()[-1]['name']
+    directory = tmp_path / newest
+    # A crash after the timestamps and part of one column of the next rows were written
+    with open(directory / TIMESTAMP_FILE, 'ab') as fh:
+        fh.write(np.arange(3, dtype='<i8').tobytes() + b'\x01\x02\x03')
+    with open(directory / column_file('current'), 'ab') as fh:
+        fh.write(b'\x00' * 12)
+
+    store = open_store(tmp_path)
+    assert len(store) == 3000
+    for name in (TIMESTAMP_FILE, column_file('current'), column_file('voltage')):
+        assert (directory / name).stat().st_size == 600 * 8
+    assert_columns_equal(store.query(), data)
+    # Appends continue right after the surviving rows
+    more = samples(10, start=data['timestamp'][-1] + np.timedelta64(100, 'ms'))
+    write(store, more)
+    assert_columns_equal(store.tail(11), rows({key: np.concatenate((data[key], more[key])) for key in data},
+                                               np.arange(3010) >= 2999))
+
+
+def test_missing_column_is_restored_as_nan(tmp_path):
+    write(open_store(tmp_path), samples())
+    name = open_store(tmp_path).segments()[0]['name']
+    (tmp_path / name / column_file('voltage')).unlink()
+    data = open_store(tmp_path).read_segment(name)
+    assert len(data['voltage']) == 600 and np.isnan(data['voltage']).all()
+    assert np.array_equal(data['current'], np.arange(600))
+
+
+def test_index_survives_reopening(tmp_path):
+    write(open_store(tmp_path), samples())
+    segments = open_store(tmp_path).segments()
+    index = json.loads((tmp_path / INDEX_FILE).read_text())
+    assert index['channels'] == list(CHANNELS) and index['segment_seconds'] == 60
+    assert index['segments'] == segments
+    assert sum(entry['rows'] for entry in segments) == 3000
+    assert segments[0]['start'] == int(ORIGIN.astype(np.int64))
+
+    # A damaged index is rebuilt from the segment files
+    (tmp_path / INDEX_FILE).write_text('{')
+    assert open_store(tmp_path).segments() == segments
+    # A stale entry (rows written after the index) is rescanned
+    stale = dict(index, segments=[dict(entry, rows=1, end=entry['start']) for entry in segments])
+    (tmp_path / INDEX_FILE).write_text(json.dumps(stale))
+    assert open_store(tmp_path).segments() == segments
+
+
+def test_retention_deletes_expired_segments(tmp_path):
+    now = np.datetime64('2024-09-01T12:00:00', 'ns')
+    old = samples(1200, start=now - np.timedelta64(3, 'D'))
+    recent = samples(600, start=now - np.timedelta64(1, 'h'))
+    store = open_store(tmp_path)
+    write(store, old)
+    write(store, recent)
+
+    store.retention_days = 2
+    store.enforce_retention(now=now)
+    assert [entry['rows'] for entry in store.segments()] == [600]
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == [store.segments()[0]['name']]
+    assert_columns_equal(store.query(), recent)
+    assert open_store(tmp_path).segments() == store.segments()
+
+
+def test_retention_applies_on_open_and_on_new_segments(tmp_path):
+    stale = samples(600, start=np.datetime64('2000-01-01T00:00:00', 'ns'))
+    write(open_store(tmp_path / 'reopened'), stale)
+    assert len(open_store(tmp_path / 'reopened', retention_days=30)) == 0
+    assert not (tmp_path / 'reopened' / '2000-01-01T000000').exists()
+
+    store = open_store(tmp_path / 'live', retention_days=30)
+    write(store, stale)
+    assert len(store) == 0
+
+
+def test_aggregates_follow_the_stored_rows(tmp_path):
+    data = samples()
+    store = open_store(tmp_path / 'aggregated', aggregates=True)
+    write(store, data, sizes=(1000, 2000))
+    result = store.pyramid.query(points=10**6, level=2)   # one-minute buckets
+    assert np.array_equal(result['current_count'], [600] * 5)
+    assert np.array_equal(result['current_max'], np.arange(599, 3000, 600))
+
+    # Stores written without aggregates get them on the first open with aggregates
+    other = tmp_path / 'plain'
+    write(open_store(other), data)
+    rebuilt = open_store(other, aggregates=True).pyramid.query(points=10**6, level=2)
+    assert np.array_equal(rebuilt['current_mean'], result['current_mean'])
@@ -0,0 +1,113 @@
+"""
+Cached /api/ai/analysis: one ETag per buffer version, 304 for clients that already have it
+"""
+
+import importlib
+import os
+
+import numpy as np
+import pytest
+
+from src.core.simulator import MeasurementSimulator
+
+pytest.importorskip('flask')
+pytest.importorskip('flask_cors')
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+@pytest.fixture(scope='module')
+def web(tmp_path_factory):
+    """The dashboard module, with its measurement store under a temporary directory"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('web'))
+    try:
+        yield importlib.import_module('src.web.app')
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(web):
+    web.measurement_data.clear()
+    web.analysis_cache.version = web.analysis_cache.body = web.analysis_cache.etag = None
+    return web.app.test_client()
+
+
+def append(web, count, start=0):
+    timestamps = ORIGIN + np.arange(start, start + count) * np.timedelta64(1, 'ms')
+    web.measurement_data.extend(timestamps, **MeasurementSimulator(seed=start).generate(timestamps))
+
+
+def count_computes(web, monkeypatch):
+    computed = []
+    compute = web.analysis_cache.compute
+
+    def counted():
+        computed.append(len(web.measurement_data))
+        return compute()
+
+    monkeypatch.setattr(web.analysis_cache, 'compute', counted)
+    return computed
+
+
+def test_too_little_data_is_refused(web, client):
+    append(web, 5)
+    assert client.get('/api/ai/analysis').status_code == 400
+
+
+def test_same_etag_and_304_until_the_buffer_changes(web, client, monkeypatch):
+    computed = count_computes(web, monkeypatch)
+    append(web, 500)
+    first = client.get('/api/ai/analysis')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+    assert set(first.get_json()) >= {'current', 'voltage', 'quality_score'}
+
+    again = client.get('/api/ai/analysis')
+    assert again.status_code == 200 and again.headers['ETag'] == etag and again.data == first.data
+    for _ in range(3):
+        cached = client.get('/api/ai/analysis', headers={'If-None-Match': etag})
+        assert cached.status_code == 304 and cached.data == b'' and cached.headers['ETag'] == etag
+    # One computation served every request of this version
+    assert computed == [500]
+
+    append(web, 10, start=500)
+    fresh = client.get('/api/ai/analysis', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.headers['ETag'] != etag
+    assert fresh.get_json()['current']['count'] == 510
+    assert client.get('/api/ai/analysis', headers={'If-None-Match': fresh.headers['ETag']}).status_code == 304
+    assert computed == [500, 510]
+
+
+def test_clearing_the_buffer_changes_the_etag(web, client):
+    append(web, 100)
+    before = client.get('/api/ai/analysis').headers['ETag']
+    web.measurement_data.clear()
+    append(web, 100, start=100)
+    response = client.get('/api/ai/analysis', headers={'If-None-Match': before})
+    assert response.status_code == 200 and response.headers['ETag'] != before
+    assert response.get_json()['current']['count'] == 100
+
+
+def test_results_invalidated_while_computing_are_sent_without_an_etag(web, client, monkeypatch):
+    computed = count_computes(web, monkeypatch)
+    compute = web.analysis_cache.compute
+
+    def racing():
+        # The acquisition thread appends while every refresh is being computed
+        result = compute()
+        append(web, 1, start=web.measurement_data.total)
+        return result
+
+    monkeypatch.setattr(web.analysis_cache, 'compute', racing)
+    append(web, 100)
+    response = client.get('/api/ai/analysis', headers={'If-None-Match': 'anything'})
+    assert response.status_code == 200 and 'ETag' not in response.headers
+    assert len(computed) == web.ANALYSIS_ATTEMPTS
+    assert web.analysis_cache.etag is None
+
+    # Once the buffer holds still, the next request is cached again
+    monkeypatch.setattr(web.analysis_cache, 'compute', compute)
+    assert 'ETag' in client.get('/api/ai/analysis').headers
@@ -0,0 +1,107 @@
+"""
+Binary column format: encode/decode round trips, alignment and compression
+"""
+
+import gzip
+import importlib.util
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from src.core.wire import ALIGNMENT, MAGIC, available_encodings, compress, decode_columns, encode_columns
+
+ORIGIN = np.datetime64('2024-08-20T22:00:00', 'ns')
+
+
+def columns(count=1000):
+    rng = np.random.default_rng(0)
+    current = 1e-6 * (1 + 0.01 * rng.standard_normal(count))
+    current[::97] = np.nan
+    return {
+        'timestamp': ORIGIN + np.cumsum(rng.integers(1, 10**7, count)).astype('timedelta64[ns]'),
+        'current': current,
+        'voltage': rng.standard_normal(count),
+        'sequence': np.arange(count, dtype=np.int32) - 5,
+    }
+
+
+def check(decoded, data):
+    assert list(decoded) == list(data)
+    for name, values in data.items():
+        assert len(decoded[name]) == len(values)
+        np.testing.assert_array_equal(decoded[name], values)
+    assert decoded['timestamp'].dtype == np.dtype('datetime64[ns]')
+    assert decoded['sequence'].dtype == np.dtype('int64')
+
+
+@pytest.mark.parametrize('delta', [False, True])
+@pytest.mark.parametrize('count', [0, 1, 1000])
+def test_round_trip(delta, count):
+    data = columns(count)
+    meta = {'device': 'desktop', 'points': count, 'nested': {'ok': True}}
+    decoded, decoded_meta = decode_columns(encode_columns(data, meta, delta=delta))
+    check(decoded, data)
+    assert decoded_meta == meta
+
+
+def test_columns_are_aligned_and_described():
+    data = columns(3)
+    payload = encode_columns(data, delta=True)
+    length, = struct.unpack_from('<I', payload, len(MAGIC))
+    start = len(MAGIC) + 4 + length
+    assert start % ALIGNMENT == 0
+    assert len(payload) == start + 4 * 3 * 8
+
+    header = json.loads(payload[len(MAGIC) + 4:start])
+    assert header['rows'] == 3 and header['meta'] == {}
+    assert [(column['name'], column['dtype'], column['encoding']) for column in header['columns']] == [
+        ('timestamp', 'datetime64[ns]', 'delta'), ('current', 'float64', 'plain'),
+        ('voltage', 'float64', 'plain'), ('sequence', 'int64', 'plain')]
+    # Delta timestamps: the first value, then differences
+    ticks = np.frombuffer(payload, dtype='<i8', count=3, offset=start)
+    expected = data['timestamp'].view(np.int64)
+    assert ticks[0] == expected[0] and np.array_equal(ticks[1:], np.diff(expected))
+
+
+@pytest.mark.parametrize('encoding', available_encodings())
+def test_compressed_round_trip(encoding):
+    data = columns()
+    payload = encode_columns(data, delta=True)
+    compressed = compress(payload, encoding)
+    assert len(compressed) < len(payload)
+    if encoding == 'gzip':
+        restored = gzip.decompress(compressed)
+    else:
+        import pyarrow as pa
+
+        restored = pa.Codec(encoding).decompress(compressed, decompressed_size=len(payload), asbytes=True)
+    check(decode_columns(restored)[0], data)
+
+
+def test_gzip_is_always_available_and_deterministic():
+    assert 'gzip' in available_encodings()
+    payload = encode_columns(columns())
+    assert compress(payload, 'gzip') == compress(payload, 'gzip')
+
+
+@pytest.mark.skipif(importlib.util.find_spec('pyarrow') is not None, reason='pyarrow installed')
+def test_zstd_needs_pyarrow():
+    assert available_encodings() == ['gzip']
+
+
+def test_unsupported_encoding_raises():
+    with pytest.raises(ValueError, match='br'):
+        compress(b'', 'br')
+
+
+def test_mismatched_lengths_raise():
+    with pytest.raises(ValueError, match="column 'voltage'"):
+        encode_columns({'current': np.zeros(3), 'voltage': np.zeros(2)})
+
+
+def test_bad_magic_raises():
+    payload = encode_columns(columns(3))
+    with pytest.raises(ValueError, match='not a QuantumMeter column frame'):
+        decode_columns(b'JSON' + payload[len(MAGIC):])